@@ -0,0 +1,132 @@
+"""
+Benchmark of the vote storage modes.
+
+Compares the write throughput of ``update_vote`` (one date at a time) and of
+``update_votes`` (whole ballots) in each storage mode against a temporary
+database, together with the cost of compaction, of loading a schedule
+afterwards and the resulting database file size.
+
+Usage:
+    python benchmarks/bench_votes.py --schedules 20 --voters 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from simple_schedule_bot.core.logger import logger
+from simple_schedule_bot.db.database import DatabaseManager
+from simple_schedule_bot.db.repository import ScheduleRepository, VOTE_STORAGE_MODES
+from simple_schedule_bot.models.schedule import Schedule, Vote, VoteStatus
+
+async def bench_mode(
+    mode: str,
+    schedules: int,
+    voters: int,
+    dates: int,
+    rounds: int,
+    seed: int = 0
+) -> Dict[str, float]:
+    """Run one storage mode and return its measurements."""
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(str(Path(tmp) / f"{mode}.db"))
+        await db.init()
+        try:
+            repository = ScheduleRepository(db, vote_storage=mode)
+            start = datetime(2030, 1, 1, 12, 0, tzinfo=timezone.utc)
+            created: List[Schedule] = []
+            for i in range(schedules):
+                schedule = Schedule.create(
+                    f"bench {i}", None, 1, 1,
+                    [start + timedelta(days=d) for d in range(dates)]
+                )
+                await repository.create_schedule(schedule)
+                created.append(schedule)
+
+            # 同じ投票者が何度も投票し直す（上書きが発生する）ワークロード
+            votes = [
+                Vote.create(
+                    schedule.id, user_id, date.date, rng.choice(list(VoteStatus))
+                )
+                for _ in range(rounds)
+                for schedule in created
+                for user_id in range(voters)
+                for date in schedule.dates
+            ]
+            rng.shuffle(votes)
+
+            started = time.perf_counter()
+            for vote in votes:
+                await repository.update_vote(vote)
+            write_seconds = time.perf_counter() - started
+
+            # 1ユーザーの全候補日をまとめて送る投票
+            ballots = [
+                [
+                    Vote.create(schedule.id, user_id, date.date, rng.choice(list(VoteStatus)))
+                    for date in schedule.dates
+                ]
+                for schedule in created
+                for user_id in range(voters)
+            ]
+            started = time.perf_counter()
+            for ballot in ballots:
+                await repository.update_votes(ballot)
+            ballot_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            compacted = await repository.compact_votes()
+            compact_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for schedule in created:
+                await repository.get_schedule(schedule.id)
+            load_seconds = time.perf_counter() - started
+
+            async with db.connect() as conn:
+                await conn.execute("VACUUM")
+
+            return {
+                "votes": len(votes),
+                "writes_per_second": len(votes) / write_seconds,
+                "ballots_per_second": len(ballots) / ballot_seconds,
+                "compacted": compacted,
+                "compact_ms": compact_seconds * 1000,
+                "load_ms_per_schedule": load_seconds * 1000 / schedules,
+                "file_kib": os.path.getsize(db.db_path) / 1024,
+            }
+        finally:
+            await db.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--schedules", type=int, default=20)
+    parser.add_argument("--voters", type=int, default=50)
+    parser.add_argument("--dates", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=2, help="times each voter re-votes")
+    parser.add_argument("--modes", default=",".join(VOTE_STORAGE_MODES))
+    args = parser.parse_args(argv)
+
+    logger.logger.setLevel(logging.WARNING)
+    for mode in args.modes.split(","):
+        result = asyncio.run(bench_mode(mode, args.schedules, args.voters, args.dates, args.rounds))
+        print(
+            f"{mode:>10}: {result['votes']} votes, "
+            f"{result['writes_per_second']:.0f} writes/s, "
+            f"{result['ballots_per_second']:.0f} ballots/s, "
+            f"compaction {result['compact_ms']:.1f}ms ({result['compacted']} events), "
+            f"load {result['load_ms_per_schedule']:.2f}ms/schedule, "
+            f"file {result['file_kib']:.0f}KiB"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
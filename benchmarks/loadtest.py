@@ -0,0 +1,333 @@
+"""
+Load generator for ScheduleCog.
+
+Drives the schedule command handlers with fake ``discord.Interaction`` objects
+against a real temporary SQLite database (or the in-memory backend with
+``--backend memory``). No network access is made: every
+Discord HTTP call (interaction responses, ``fetch_user``) is answered by a
+local stub with a configurable latency.
+
+Usage:
+    python benchmarks/loadtest.py --rate 100 --duration 10 --mix create=1,list=3
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from simple_schedule_bot.commands.schedule import ScheduleCog, ScheduleCreateModal, VoteBallotView
+from simple_schedule_bot.core.logger import logger
+from simple_schedule_bot.core.monitor import LoopLagMonitor
+from simple_schedule_bot.db.cache import CachedScheduleRepository
+from simple_schedule_bot.db.database import DatabaseManager
+from simple_schedule_bot.db.memory import InMemoryScheduleRepository
+from simple_schedule_bot.db.repository import ScheduleRepository
+from simple_schedule_bot.db.storage import STORAGE_BACKENDS, STORAGE_MEMORY
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.display_name = f"user{user_id}"
+        self.name = self.display_name
+
+    def __str__(self) -> str:
+        return self.name
+
+class FakeResponse:
+    """Stub of ``discord.InteractionResponse`` recording what was sent."""
+
+    def __init__(self, http_latency: float):
+        self.http_latency = http_latency
+        self.sent: List[Dict[str, Any]] = []
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _respond(self, **payload: Any) -> None:
+        if self._done:
+            raise RuntimeError("This interaction has already been responded to before")
+        await asyncio.sleep(self.http_latency)
+        self._done = True
+        self.sent.append(payload)
+
+    async def send_message(self, content: Optional[str] = None, **kwargs: Any) -> None:
+        await self._respond(content=content, **kwargs)
+
+    async def send_modal(self, modal: Any) -> None:
+        await self._respond(modal=modal)
+
+    async def defer(self, **kwargs: Any) -> None:
+        await self._respond(deferred=True, **kwargs)
+
+    async def edit_message(self, **kwargs: Any) -> None:
+        await self._respond(**kwargs)
+
+    @property
+    def failed(self) -> bool:
+        """エラーメッセージを返したかどうか"""
+        return any("エラー" in (payload.get("content") or "") for payload in self.sent)
+
+class FakeInteraction:
+    """Minimal stand-in for ``discord.Interaction``."""
+
+    def __init__(self, user_id: int, channel_id: int, guild_id: int, http_latency: float):
+        self.user = FakeUser(user_id)
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.response = FakeResponse(http_latency)
+        self.created_at = datetime.now(timezone.utc)
+
+class FakeBot:
+    """Stub of the bot exposing what the cogs use."""
+
+    def __init__(self, db: Optional[DatabaseManager], repository: Any, http_latency: float):
+        self.db = db
+        self.repository = repository
+        self.http_latency = http_latency
+        self.latency = http_latency
+
+    async def fetch_user(self, user_id: int) -> FakeUser:
+        await asyncio.sleep(self.http_latency)
+        return FakeUser(user_id)
+
+@dataclass
+class LoadContext:
+    bot: FakeBot
+    cog: ScheduleCog
+    rng: random.Random
+    channels: int
+    users: int
+    http_latency: float
+
+    def interaction(self) -> FakeInteraction:
+        return FakeInteraction(
+            user_id=self.rng.randrange(1, self.users + 1),
+            channel_id=self.rng.randrange(1, self.channels + 1),
+            guild_id=1,
+            http_latency=self.http_latency
+        )
+
+Scenario = Callable[[LoadContext, FakeInteraction], Awaitable[None]]
+
+async def scenario_list(ctx: LoadContext, interaction: FakeInteraction) -> None:
+    await ctx.cog.schedule.callback(ctx.cog, interaction, "list")
+
+async def scenario_create(ctx: LoadContext, interaction: FakeInteraction) -> None:
+    # /schedule create -> modal -> on_submit
+    await ctx.cog.schedule.callback(ctx.cog, interaction, "create")
+    modal: ScheduleCreateModal = interaction.response.sent[-1]["modal"]
+
+    start = datetime.now(timezone.utc) + timedelta(days=1)
+    modal.title_input._value = f"負荷テスト {ctx.rng.randrange(1_000_000)}"
+    modal.description_input._value = "load test"
+    modal.dates_input._value = "\n".join(
+        (start + timedelta(days=i)).strftime('%Y-%m-%d %H:%M') for i in range(3)
+    )
+
+    submit = FakeInteraction(interaction.user.id, interaction.channel_id,
+                             interaction.guild_id, ctx.http_latency)
+    await modal.on_submit(submit)
+    if submit.response.failed:
+        raise RuntimeError("modal submission returned an error message")
+
+async def scenario_vote(ctx: LoadContext, interaction: FakeInteraction) -> None:
+    # /schedule vote -> ballot view -> submit (whole ballot in one write)
+    matches = await ctx.cog.title_index.search(interaction.channel_id, "")
+    if not matches:
+        return
+    target, _ = ctx.rng.choice(matches)
+    await ctx.cog.schedule.callback(ctx.cog, interaction, "vote", target=target)
+    view: Optional[VoteBallotView] = interaction.response.sent[-1].get("view")
+    if view is None:
+        # 投票できる候補日時が無い（繰り返しの窓が空など）
+        return
+
+    for status in view.selected:
+        view.selected[status] = set()
+    # 繰り返しスケジュールは直近の窓（view.dates）だけが選択肢になる
+    for i, _ in enumerate(view.dates):
+        status = ctx.rng.choice(list(view.selected) + [None])
+        if status is not None:
+            view.selected[status].add(i)
+
+    submit = FakeInteraction(interaction.user.id, interaction.channel_id,
+                             interaction.guild_id, ctx.http_latency)
+    await view.submit.callback(submit)
+    if submit.response.failed:
+        raise RuntimeError("ballot submission returned an error message")
+
+# 新しいハンドラーはここに登録する
+SCENARIOS: Dict[str, Scenario] = {
+    "list": scenario_list,
+    "create": scenario_create,
+    "vote": scenario_vote,
+}
+
+@dataclass
+class LoadReport:
+    duration: float
+    completed: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    loop_lag: List[float] = field(default_factory=list)
+
+    @staticmethod
+    def _percentile(values: List[float], pct: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def format(self) -> str:
+        lines = [
+            f"duration      : {self.duration:.2f}s",
+            f"completed     : {self.completed}",
+            f"throughput    : {self.completed / self.duration:.1f} interactions/s",
+            f"errors        : {sum(self.errors.values())} {dict(self.errors) or ''}",
+        ]
+        for name, values in sorted(self.latencies.items()):
+            lines.append(
+                f"latency[{name}]: n={len(values)} "
+                f"p50={self._percentile(values, 50) * 1000:.1f}ms "
+                f"p99={self._percentile(values, 99) * 1000:.1f}ms "
+                f"max={max(values) * 1000:.1f}ms"
+            )
+        if self.loop_lag:
+            lines.append(
+                f"loop lag      : mean={statistics.mean(self.loop_lag) * 1000:.1f}ms "
+                f"p99={self._percentile(self.loop_lag, 99) * 1000:.1f}ms "
+                f"max={max(self.loop_lag) * 1000:.1f}ms"
+            )
+        return "\n".join(lines)
+
+async def run_load(
+    rate: float,
+    duration: float,
+    mix: Dict[str, float],
+    concurrency: int = 100,
+    channels: int = 5,
+    users: int = 200,
+    http_latency: float = 0.05,
+    cache_size: int = 256,
+    db_path: Optional[str] = None,
+    backend: str = "sqlite",
+    seed: int = 0
+) -> LoadReport:
+    """Fire interactions at ``rate`` per second for ``duration`` seconds."""
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db: Optional[DatabaseManager] = None
+        if backend == STORAGE_MEMORY:
+            repository: Any = InMemoryScheduleRepository()
+        else:
+            db = DatabaseManager(db_path or str(Path(tmp) / "loadtest.db"))
+            await db.init()
+            repository = ScheduleRepository(db)
+        if cache_size > 0:
+            repository = CachedScheduleRepository(repository, max_size=cache_size)
+
+        bot = FakeBot(db, repository, http_latency)
+        ctx = LoadContext(
+            bot=bot,
+            cog=ScheduleCog(bot),
+            rng=random.Random(seed),
+            channels=channels,
+            users=users,
+            http_latency=http_latency
+        )
+        report = LoadReport(duration=duration)
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fire(name: str) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    await SCENARIOS[name](ctx, ctx.interaction())
+                except Exception as e:
+                    key = f"{name}:{type(e).__name__}"
+                    report.errors[key] = report.errors.get(key, 0) + 1
+                    return
+                report.latencies.setdefault(name, []).append(time.perf_counter() - started)
+                report.completed += 1
+
+        monitor = LoopLagMonitor(interval=0.01, threshold=float("inf"), history=1_000_000)
+        monitor.start(watchdog=False)
+        loop = asyncio.get_running_loop()
+        tasks = []
+        started = loop.time()
+        total = int(rate * duration)
+        try:
+            # オープンループで一定間隔に到着させる
+            for i in range(total):
+                delay = started + i / rate - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                name = ctx.rng.choices(names, weights)[0]
+                tasks.append(asyncio.create_task(fire(name)))
+            await asyncio.gather(*tasks)
+        finally:
+            report.duration = loop.time() - started
+            await monitor.stop()
+            report.loop_lag = list(monitor.samples)
+            if db is not None:
+                await db.close()
+        return report
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=100, help="interactions per second")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to generate load")
+    parser.add_argument("--concurrency", type=int, default=100, help="max in-flight interactions")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("create=1,list=3,vote=3"),
+                        help=f"scenario weights, e.g. create=1,list=3,vote=3 (available: {', '.join(SCENARIOS)})")
+    parser.add_argument("--channels", type=int, default=5)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--http-latency", type=float, default=0.05, help="stubbed Discord API latency (s)")
+    parser.add_argument("--cache-size", type=int, default=256, help="schedule cache size (0 disables)")
+    parser.add_argument("--backend", choices=STORAGE_BACKENDS, default="sqlite", help="storage backend")
+    parser.add_argument("--db", help="database file (default: temporary)")
+    parser.add_argument("--verbose", action="store_true", help="keep per-command logging")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logger.logger.setLevel(logging.WARNING)
+
+    report = asyncio.run(run_load(
+        rate=args.rate,
+        duration=args.duration,
+        mix=args.mix,
+        concurrency=args.concurrency,
+        channels=args.channels,
+        users=args.users,
+        http_latency=args.http_latency,
+        cache_size=args.cache_size,
+        db_path=args.db,
+        backend=args.backend
+    ))
+    print(report.format())
+    return 1 if report.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+"""
+Opt-in pinned dashboard of the active schedules in a channel.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set, Tuple
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from ..core.config import config
+from ..core.dispatcher import Priority
+from ..core.logger import logger
+from ..db.repository import ScheduleListener
+from ..models.schedule import Schedule, ScheduleStatus, VoteStatus
+from .schedule import format_date_votes
+
+# Embed のフィールド数の上限
+MAX_SECTIONS = 25
+
+Section = Tuple[Tuple[str, str], str, str]
+
+def render_section(schedule: Schedule, tallies: Dict[datetime, Dict[VoteStatus, int]]) -> Section:
+    """Render one schedule and its vote tallies as (sort key, field name, field value)."""
+    dates = sorted(schedule.window_dates(limit=config.RECURRENCE_WINDOW))
+    lines = [format_date_votes(date, tallies) for date in dates]
+    value = f"**作成者**: <@{schedule.creator_id}>\n"
+    if schedule.recurrence is not None:
+        value += f"**繰り返し**: {schedule.recurrence.describe()}\n"
+    value += "\n".join(lines)
+    first_date = dates[0] if dates else schedule.created_at
+    return (first_date.isoformat(), schedule.id), f"📅 {schedule.title}"[:256], value[:1024]
+
+def next_rollover(schedule: Schedule, now: Optional[datetime] = None) -> Optional[datetime]:
+    """When the section changes without any write: after the first shown occurrence of a
+    recurring schedule passes, its window moves on (None for one-off schedules)."""
+    if schedule.recurrence is None:
+        return None
+    return next(schedule.recurrence.occurrences(after=now or datetime.now(timezone.utc)), None)
+
+@dataclass
+class ChannelDashboard:
+    channel_id: int
+    message_id: int
+    sections: Dict[str, Section] = field(default_factory=dict)
+    dirty: Set[str] = field(default_factory=set)
+    rollovers: Dict[str, datetime] = field(default_factory=dict)
+    loaded: bool = False
+    rendered: Optional[Dict[str, Any]] = None
+    flush_task: Optional[asyncio.Task] = None
+
+class DashboardManager(ScheduleListener):
+    """Keeps each channel's dashboard message in sync with repository changes.
+
+    Change notifications only mark the affected schedule as dirty and start a
+    flush timer for the channel; when the window elapses, the dirty sections
+    are re-rendered and the message is edited once, and only if the rendered
+    embed differs from the last one sent. Sections of recurring schedules are
+    also marked dirty when their window rolls over, and a failed edit marks
+    its sections dirty again so the next window retries it.
+    """
+
+    def __init__(self, bot: Any, repository: Any, window: float = 5.0):
+        self.bot = bot
+        self.repository = repository
+        self.window = window
+        self.dashboards: Dict[int, ChannelDashboard] = {}
+        self._schedule_channels: Dict[str, int] = {}
+        self._rollover_task: Optional[asyncio.Task] = None
+        self._rollover_at: Optional[datetime] = None
+        self.changes = 0
+        self.edits = 0
+        self.unchanged = 0
+        self.failures = 0
+
+    async def load(self) -> None:
+        """Restore the registered dashboards and refresh them once."""
+        for channel_id, message_id in await self.repository.get_dashboards():
+            self.dashboards[channel_id] = ChannelDashboard(channel_id, message_id)
+            self._mark(channel_id)
+
+    async def close(self) -> None:
+        """Cancel pending flushes."""
+        tasks = [d.flush_task for d in self.dashboards.values() if d.flush_task is not None]
+        if self._rollover_task is not None:
+            tasks.append(self._rollover_task)
+            self._rollover_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def enable(self, channel: Any) -> Tuple[Any, bool]:
+        """Post (and try to pin) a dashboard in ``channel``; return the message and whether it was pinned."""
+        dashboard = ChannelDashboard(channel.id, 0)
+        await self._render(dashboard)
+        embed = self.build_embed(dashboard)
+        message = await channel.send(embed=embed)
+        dashboard.message_id = message.id
+        dashboard.rendered = embed.to_dict()
+
+        pinned = True
+        try:
+            await message.pin()
+        except discord.HTTPException:
+            pinned = False
+
+        old = self.dashboards.get(channel.id)
+        if old is not None and old.flush_task is not None:
+            old.flush_task.cancel()
+        await self.repository.set_dashboard(channel.id, message.id)
+        self.dashboards[channel.id] = dashboard
+        return message, pinned
+
+    async def disable(self, channel_id: int) -> Optional[int]:
+        """Stop updating the channel's dashboard; return its message ID."""
+        dashboard = self.dashboards.pop(channel_id, None)
+        await self.repository.remove_dashboard(channel_id)
+        if dashboard is None:
+            return None
+        if dashboard.flush_task is not None:
+            dashboard.flush_task.cancel()
+        for schedule_id in dashboard.sections:
+            self._schedule_channels.pop(schedule_id, None)
+        return dashboard.message_id
+
+    def _mark(self, channel_id: int, schedule_id: Optional[str] = None) -> None:
+        dashboard = self.dashboards.get(channel_id)
+        if dashboard is None:
+            return
+        if schedule_id is not None:
+            dashboard.dirty.add(schedule_id)
+        self.changes += 1
+        # 窓の間の変更は同じフラッシュにまとめる
+        if dashboard.flush_task is None or dashboard.flush_task.done():
+            dashboard.flush_task = asyncio.create_task(
+                self._flush_later(channel_id), name=f"dashboard-flush-{channel_id}"
+            )
+
+    async def _flush_later(self, channel_id: int) -> None:
+        while True:
+            await asyncio.sleep(self.window)
+            try:
+                await self.flush(channel_id)
+            except Exception as e:
+                logger.log_error(e, "Dashboard update")
+            # 編集の送信中に届いた変更は次の窓で反映する
+            dashboard = self.dashboards.get(channel_id)
+            if dashboard is None or not dashboard.dirty:
+                return
+
+    def _schedule_rollover(self) -> None:
+        """(Re)arm the timer for the earliest section rollover of any dashboard."""
+        deadline = min(
+            (at for dashboard in self.dashboards.values() for at in dashboard.rollovers.values()),
+            default=None
+        )
+        if deadline == self._rollover_at and self._rollover_task is not None:
+            return
+        if self._rollover_task is not None:
+            self._rollover_task.cancel()
+            self._rollover_task = None
+        self._rollover_at = deadline
+        if deadline is not None:
+            self._rollover_task = asyncio.create_task(
+                self._rollover_later(deadline), name="dashboard-rollover"
+            )
+
+    async def _rollover_later(self, deadline: datetime) -> None:
+        await asyncio.sleep(max((deadline - datetime.now(timezone.utc)).total_seconds(), 0))
+        now = datetime.now(timezone.utc)
+        for dashboard in list(self.dashboards.values()):
+            for schedule_id, at in list(dashboard.rollovers.items()):
+                if at < now:
+                    del dashboard.rollovers[schedule_id]
+                    self._mark(dashboard.channel_id, schedule_id)
+        self._rollover_task = None
+        self._schedule_rollover()
+
+    async def _render(self, dashboard: ChannelDashboard) -> Set[str]:
+        """Re-render the dirty sections (every section on first use); return the re-rendered IDs."""
+        if not dashboard.loaded:
+            rows = await self.repository.get_active_schedule_titles(dashboard.channel_id)
+            dashboard.dirty.update(schedule_id for schedule_id, _ in rows)
+            dashboard.loaded = True
+
+        dirty, dashboard.dirty = dashboard.dirty, set()
+        for schedule_id in dirty:
+            schedule = await self.repository.get_schedule(schedule_id)
+            if (
+                schedule is None
+                or schedule.status != ScheduleStatus.ACTIVE
+                or schedule.channel_id != dashboard.channel_id
+            ):
+                dashboard.sections.pop(schedule_id, None)
+                dashboard.rollovers.pop(schedule_id, None)
+                self._schedule_channels.pop(schedule_id, None)
+            else:
+                tallies = await self.repository.get_vote_tallies(schedule_id)
+                dashboard.sections[schedule_id] = render_section(schedule, tallies)
+                self._schedule_channels[schedule_id] = dashboard.channel_id
+                rollover = next_rollover(schedule)
+                if rollover is None:
+                    dashboard.rollovers.pop(schedule_id, None)
+                else:
+                    dashboard.rollovers[schedule_id] = rollover
+        self._schedule_rollover()
+        return dirty
+
+    def build_embed(self, dashboard: ChannelDashboard) -> discord.Embed:
+        """Assemble the dashboard embed from the rendered sections."""
+        embed = discord.Embed(
+            title="📌 スケジュールダッシュボード",
+            color=discord.Color.blue()
+        )
+        sections = sorted(dashboard.sections.values())
+        if not sections:
+            embed.description = "アクティブなスケジュールはありません。"
+        for _, name, value in sections[:MAX_SECTIONS]:
+            embed.add_field(name=name, value=value, inline=False)
+        if len(sections) > MAX_SECTIONS:
+            embed.set_footer(text=f"他 {len(sections) - MAX_SECTIONS} 件")
+        return embed
+
+    async def flush(self, channel_id: int) -> bool:
+        """Apply pending changes to the channel's dashboard; return True if the message was edited."""
+        dashboard = self.dashboards.get(channel_id)
+        if dashboard is None:
+            return False
+
+        rerendered = await self._render(dashboard)
+        embed = self.build_embed(dashboard)
+        rendered = embed.to_dict()
+        if rendered == dashboard.rendered:
+            self.unchanged += 1
+            return False
+
+        message = self.bot.get_partial_messageable(channel_id).get_partial_message(dashboard.message_id)
+        dispatcher = getattr(self.bot, "dispatcher", None)
+        try:
+            if dispatcher is not None:
+                await dispatcher.edit(message, Priority.REFRESH, embed=embed)
+            else:
+                await message.edit(embed=embed)
+        except discord.NotFound:
+            # メッセージが削除されたらダッシュボードを解除する
+            logger.logger.info(f"Dashboard message in channel {channel_id} is gone, disabling it")
+            await self.disable(channel_id)
+            return False
+        except discord.HTTPException as e:
+            self.failures += 1
+            logger.log_error(e, "Dashboard edit")
+            # 反映できなかった変更は次の窓で再試行する
+            dashboard.dirty.update(rerendered or dashboard.sections)
+            return False
+
+        dashboard.rendered = rendered
+        self.edits += 1
+        return True
+
+    async def on_schedule_created(self, schedule: Schedule) -> None:
+        self._mark(schedule.channel_id, schedule.id)
+
+    async def on_schedule_status_changed(self, schedule_id: str, status: ScheduleStatus) -> None:
+        channel_id = self._schedule_channels.get(schedule_id)
+        if channel_id is not None:
+            self._mark(channel_id, schedule_id)
+
+    async def on_votes_updated(self, schedule_id: str) -> None:
+        channel_id = self._schedule_channels.get(schedule_id)
+        if channel_id is not None:
+            self._mark(channel_id, schedule_id)
+
+class DashboardCog(commands.Cog):
+    """Pinned, automatically updated schedule dashboards."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.repository = bot.repository
+        self.manager = DashboardManager(bot, self.repository, window=config.DASHBOARD_UPDATE_WINDOW)
+
+    async def cog_load(self):
+        """Attach to the repository and restore the registered dashboards."""
+        self.repository.add_listener(self.manager)
+        await self.manager.load()
+
+    async def cog_unload(self):
+        """Detach from the repository and stop pending updates."""
+        self.repository.remove_listener(self.manager)
+        await self.manager.close()
+
+    def metrics(self) -> Dict[str, float]:
+        """Counters of the dashboard updates for diagnostics."""
+        return {
+            "dashboard.channels": len(self.manager.dashboards),
+            "dashboard.changes": self.manager.changes,
+            "dashboard.edits": self.manager.edits,
+            "dashboard.unchanged": self.manager.unchanged,
+            "dashboard.failures": self.manager.failures,
+        }
+
+    @app_commands.command(
+        name="dashboard",
+        description="スケジュールのダッシュボードをこのチャンネルに固定表示します"
+    )
+    @app_commands.describe(action="実行するアクション（enable/disable）")
+    @app_commands.choices(action=[
+        app_commands.Choice(name="有効化", value="enable"),
+        app_commands.Choice(name="無効化", value="disable"),
+    ])
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.guild_only()
+    async def dashboard(self, interaction: discord.Interaction, action: str):
+        """Enable or disable the channel dashboard."""
+        logger.log_command(
+            "dashboard",
+            f"{interaction.user} (ID: {interaction.user.id}) called {action}"
+        )
+
+        if action == "enable":
+            if interaction.channel_id in self.manager.dashboards:
+                await interaction.response.send_message(
+                    "このチャンネルのダッシュボードは既に有効です。",
+                    ephemeral=True
+                )
+                return
+            await interaction.response.defer(ephemeral=True)
+            _, pinned = await self.manager.enable(interaction.channel)
+            note = "" if pinned else "\n（ピン留めの権限がないため、固定表示はされていません）"
+            await interaction.followup.send(
+                "ダッシュボードを作成しました。スケジュールの変更に合わせて自動で更新されます。" + note,
+                ephemeral=True
+            )
+        else:
+            message_id = await self.manager.disable(interaction.channel_id)
+            if message_id is None:
+                await interaction.response.send_message(
+                    "このチャンネルにダッシュボードはありません。",
+                    ephemeral=True
+                )
+                return
+            try:
+                await interaction.channel.get_partial_message(message_id).unpin()
+            except discord.HTTPException:
+                pass
+            await interaction.response.send_message(
+                "ダッシュボードの更新を停止しました。",
+                ephemeral=True
+            )
+
+async def setup(bot: commands.Bot):
+    """Set up the Dashboard cog."""
+    await bot.add_cog(DashboardCog(bot))
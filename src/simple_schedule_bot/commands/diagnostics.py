@@ -0,0 +1,156 @@
+"""
+Owner-only diagnostic commands.
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from ..core.diagnostics import MemoryProfiler, collect_cache_sizes
+from ..core.logger import logger
+from ..core.monitor import profile_cprofile, profile_sampling
+
+async def is_owner(interaction: discord.Interaction) -> bool:
+    """Allow only the application owner (or team members)."""
+    return await interaction.client.is_owner(interaction.user)
+
+class DiagnosticsCog(commands.Cog):
+    """Memory and event-loop diagnostics for the running bot process."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.profiler = MemoryProfiler()
+        self.profiling = False
+
+    async def cog_unload(self):
+        """Stop tracing when the cog is unloaded."""
+        self.profiler.stop()
+
+    async def cog_app_command_error(
+        self,
+        interaction: discord.Interaction,
+        error: app_commands.AppCommandError
+    ):
+        """Reply to failed checks and errors instead of failing silently."""
+        if isinstance(error, app_commands.CheckFailure):
+            await interaction.response.send_message(
+                "このコマンドはBotのオーナーのみ実行できます。",
+                ephemeral=True
+            )
+            return
+        logger.log_error(error, "diagnostics command")
+        message = "診断コマンドの実行中にエラーが発生しました。"
+        # defer 済み（プロファイル計測中など）の場合はフォローアップで返す
+        if interaction.response.is_done():
+            await interaction.followup.send(message, ephemeral=True)
+        else:
+            await interaction.response.send_message(message, ephemeral=True)
+
+    @app_commands.command(
+        name="memory",
+        description="メモリ使用状況を調査します（オーナー専用）"
+    )
+    @app_commands.describe(action="実行するアクション（start/snapshot/report/stop）")
+    @app_commands.choices(action=[
+        app_commands.Choice(name="計測開始", value="start"),
+        app_commands.Choice(name="スナップショット", value="snapshot"),
+        app_commands.Choice(name="レポート出力", value="report"),
+        app_commands.Choice(name="計測停止", value="stop"),
+    ])
+    @app_commands.check(is_owner)
+    async def memory(self, interaction: discord.Interaction, action: str):
+        """Control the tracemalloc session and produce reports."""
+        logger.log_command(
+            "memory",
+            f"{interaction.user} (ID: {interaction.user.id}) called {action}"
+        )
+
+        if action == "start":
+            self.profiler.start()
+            await interaction.response.send_message("tracemalloc を開始しました。", ephemeral=True)
+        elif action == "stop":
+            self.profiler.stop()
+            await interaction.response.send_message("tracemalloc を停止しました。", ephemeral=True)
+        elif action == "snapshot":
+            if not self.profiler.running:
+                await interaction.response.send_message(
+                    "先に計測を開始してください。",
+                    ephemeral=True
+                )
+                return
+            self.profiler.snapshot()
+            growth = self.profiler.growth(limit=5) or ["(増加なし)"]
+            await interaction.response.send_message(
+                "**前回からの増加上位**\n```\n" + "\n".join(growth)[:1800] + "\n```",
+                ephemeral=True
+            )
+        elif action == "report":
+            if self.profiler.running:
+                self.profiler.snapshot()
+            path = self.profiler.write_report(self.bot)
+            sizes = collect_cache_sizes(self.bot)
+            summary = "\n".join(f"{name}: {size}" for name, size in sorted(sizes.items()))
+            await interaction.response.send_message(
+                f"レポートを出力しました: `{path}`\n```\n{summary[:1800]}\n```",
+                file=discord.File(path),
+                ephemeral=True
+            )
+
+    @app_commands.command(
+        name="profile",
+        description="イベントループをプロファイルします（オーナー専用）"
+    )
+    @app_commands.describe(
+        mode="cprofile（関数別の集計）または sample（フレームグラフ用）",
+        seconds="計測時間（秒）"
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="cProfile", value="cprofile"),
+        app_commands.Choice(name="サンプリング", value="sample"),
+    ])
+    @app_commands.check(is_owner)
+    async def profile(
+        self,
+        interaction: discord.Interaction,
+        mode: str,
+        seconds: app_commands.Range[int, 1, 60] = 10
+    ):
+        """Run a time-bounded profiling session and attach the output file."""
+        logger.log_command(
+            "profile",
+            f"{interaction.user} (ID: {interaction.user.id}) called {mode} for {seconds}s"
+        )
+        if self.profiling:
+            await interaction.response.send_message(
+                "プロファイリングは既に実行中です。",
+                ephemeral=True
+            )
+            return
+
+        self.profiling = True
+        try:
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            stamp = f"{datetime.now(timezone.utc):%Y%m%d-%H%M%S}"
+            if mode == "cprofile":
+                path = await profile_cprofile(seconds, Path("logs") / f"profile-{stamp}.pstats")
+            else:
+                path = await profile_sampling(seconds, Path("logs") / f"profile-{stamp}.folded")
+        finally:
+            self.profiling = False
+
+        message = f"プロファイルを出力しました: `{path}`"
+        monitor = getattr(self.bot, "loop_monitor", None)
+        if monitor is not None:
+            stats = monitor.stats()
+            message += (
+                f"\nループ遅延: p50 {stats['p50'] * 1000:.1f}ms / "
+                f"p99 {stats['p99'] * 1000:.1f}ms / max {stats['max'] * 1000:.1f}ms "
+                f"(閾値超過 {stats['slow_count']:.0f}回)"
+            )
+        await interaction.followup.send(message, file=discord.File(path), ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    """Set up the Diagnostics cog."""
+    await bot.add_cog(DiagnosticsCog(bot))
@@ -4,13 +4,46 @@ Schedule command implementation for managing schedules.
 import discord
 from discord import app_commands
 from discord.ext import commands
-from datetime import datetime, timezone
-from typing import List, Optional
+from collections import OrderedDict
+from datetime import datetime, time, timezone
+from typing import Any, Dict, List, Optional, Set
+from time import perf_counter
 import re
 
+from ..core.config import config
+from ..core.lifecycle import reject_if_draining
 from ..core.logger import logger
+from ..core.metrics import registry
 from ..db.repository import ScheduleRepository
-from ..models.schedule import Schedule, ScheduleStatus, VoteStatus
+from ..db.title_index import TitleIndex
+from ..models.schedule import Frequency, RecurrenceRule, Schedule, ScheduleStatus, VoteStatus
+
+# 繰り返しの指定（例: 毎週 / 2週ごと / 3日ごと / every 3 days、後ろに「YYYY-MM-DDまで」か「N回」）
+RECURRENCE_PATTERN = re.compile(
+    r'^(?:(?P<weekly>毎週|weekly)|(?P<daily>毎日|daily)'
+    r'|(?P<weeks>\d+)週ごと|(?P<days>\d+)日ごと|every\s+(?P<every>\d+)\s+(?P<unit>weeks?|days?))'
+    r'(?:\s+(?:(?P<until>\d{4}-\d{2}-\d{2})まで|until\s+(?P<until_en>\d{4}-\d{2}-\d{2})'
+    r'|(?P<count>\d+)回|count\s+(?P<count_en>\d+)))?$',
+    re.IGNORECASE
+)
+
+COMMANDS_TOTAL = registry.counter(
+    "schedule_bot_commands_total", "/schedule invocations by action and outcome", ("action", "outcome")
+)
+COMMAND_DURATION = registry.histogram(
+    "schedule_bot_command_duration_seconds", "Time to handle /schedule by action", ("action",)
+)
+
+def format_date_votes(date: datetime, tallies: Dict[datetime, Dict[VoteStatus, int]]) -> str:
+    """候補日時1件の投票状況（例: ・2025-01-01 10:00 (⭕:1 🔺:0 ❌:2)）
+
+    tallies は repository.get_vote_tallies() の集計（投票の無い日時は含まれない）。
+    """
+    vote_counts = tallies.get(date) or {status: 0 for status in VoteStatus}
+    return (
+        f"・{date.strftime('%Y-%m-%d %H:%M')} "
+        f"(⭕:{vote_counts[VoteStatus.CIRCLE]} 🔺:{vote_counts[VoteStatus.TRIANGLE]} ❌:{vote_counts[VoteStatus.CROSS]})"
+    )
 
 class ScheduleCreateModal(discord.ui.Modal, title="スケジュール作成"):
     """Modal for creating a new schedule."""
@@ -33,16 +66,27 @@ class ScheduleCreateModal(discord.ui.Modal, title="スケジュール作成"):
     
     dates_input = discord.ui.TextInput(
         label="候補日時",
-        placeholder="YYYY-MM-DD HH:MM\n複数の場合は1行に1つ入力",
+        placeholder="YYYY-MM-DD HH:MM\n複数の場合は1行に1つ入力（繰り返しの場合は初回のみ）",
         style=discord.TextStyle.paragraph,
         required=True,
     )
+    
+    recurrence_input = discord.ui.TextInput(
+        label="繰り返し",
+        placeholder="任意。例: 毎週 / 2週ごと / 3日ごと / 毎週 2025-12-31まで / 毎週 10回",
+        max_length=50,
+        required=False,
+    )
 
     def __init__(self, repository: ScheduleRepository):
         super().__init__()
         self.repository = repository
         self.datetime_pattern = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}$')
 
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Refuse submissions while the bot drains for shutdown."""
+        return not await reject_if_draining(interaction)
+
     def validate_dates(self, dates_str: str) -> tuple[bool, str, Optional[List[datetime]]]:
         """Validate date strings and convert to datetime objects."""
         dates = []
@@ -77,11 +121,71 @@ class ScheduleCreateModal(discord.ui.Modal, title="スケジュール作成"):
                 
         return True, "", dates
 
+    def validate_recurrence(
+        self,
+        recurrence_str: str,
+        dates: List[datetime]
+    ) -> tuple[bool, str, Optional[RecurrenceRule]]:
+        """Parse the optional recurrence; the single candidate date is the first occurrence."""
+        recurrence_str = " ".join(recurrence_str.split())
+        if not recurrence_str:
+            return True, "", None
+
+        match = RECURRENCE_PATTERN.match(recurrence_str)
+        if not match:
+            return False, (
+                f"繰り返しの指定が不正です: {recurrence_str}\n"
+                "例: 毎週 / 2週ごと / 3日ごと / 毎週 2025-12-31まで / 毎週 10回"
+            ), None
+        if len(dates) != 1:
+            return False, "繰り返しの場合、候補日時には初回の日時を1つだけ入力してください。", None
+
+        groups = match.groupdict()
+        if groups["weekly"] or groups["daily"]:
+            frequency = Frequency.WEEKLY if groups["weekly"] else Frequency.DAILY
+            interval = 1
+        elif groups["weeks"] or groups["days"]:
+            frequency = Frequency.WEEKLY if groups["weeks"] else Frequency.DAILY
+            interval = int(groups["weeks"] or groups["days"])
+        else:
+            frequency = Frequency.WEEKLY if groups["unit"].lower().startswith("week") else Frequency.DAILY
+            interval = int(groups["every"])
+
+        until = None
+        until_str = groups["until"] or groups["until_en"]
+        if until_str:
+            try:
+                # 指定日の終わりまでを含める
+                until = datetime.combine(
+                    datetime.strptime(until_str, '%Y-%m-%d').date(), time.max, tzinfo=timezone.utc
+                )
+            except ValueError as e:
+                return False, f"無効な日付です: {until_str}\n{str(e)}", None
+        count_str = groups["count"] or groups["count_en"]
+
+        try:
+            rule = RecurrenceRule(
+                start=dates[0],
+                frequency=frequency,
+                interval=interval,
+                until=until,
+                count=int(count_str) if count_str else None
+            )
+        except (ValueError, OverflowError):
+            return False, (
+                "繰り返しの間隔・回数は1以上の大きすぎない値、終了日は初回以降を指定してください。"
+            ), None
+        return True, "", rule
+
     async def on_submit(self, interaction: discord.Interaction):
         """Handle form submission."""
         try:
             # Validate dates
             is_valid, error_message, dates = self.validate_dates(str(self.dates_input))
+            if is_valid:
+                is_valid, error_message, recurrence = self.validate_recurrence(
+                    str(self.recurrence_input), dates
+                )
             if not is_valid:
                 await interaction.response.send_message(
                     f"エラー: {error_message}",
@@ -95,7 +199,9 @@ class ScheduleCreateModal(discord.ui.Modal, title="スケジュール作成"):
                 description=str(self.description_input) if self.description_input.value else None,
                 creator_id=interaction.user.id,
                 channel_id=interaction.channel_id,
-                dates=dates
+                # 繰り返しの各回は投票されるまで保存しない
+                dates=[] if recurrence else dates,
+                recurrence=recurrence
             )
 
             # Save to database
@@ -106,8 +212,12 @@ class ScheduleCreateModal(discord.ui.Modal, title="スケジュール作成"):
                 title="スケジュール作成完了",
                 description=f"**{schedule.title}**\n" + \
                           (f"{schedule.description}\n\n" if schedule.description else "\n") + \
+                          (f"**繰り返し:** {recurrence.describe()}\n" if recurrence else "") + \
                           "**候補日時:**\n" + \
-                          "\n".join([f"• {date.date.strftime('%Y-%m-%d %H:%M')}" for date in schedule.dates]),
+                          "\n".join([
+                              f"• {date.strftime('%Y-%m-%d %H:%M')}"
+                              for date in schedule.window_dates(limit=config.RECURRENCE_WINDOW)
+                          ]),
                 color=discord.Color.green()
             )
             
@@ -120,36 +230,210 @@ class ScheduleCreateModal(discord.ui.Modal, title="スケジュール作成"):
             )
 
         except Exception as e:
-            logger.error(f"Error in schedule creation: {str(e)}")
+            logger.log_error(e, "schedule creation")
             await interaction.response.send_message(
                 "スケジュールの作成中にエラーが発生しました。",
                 ephemeral=True
             )
 
+class VoteBallotView(discord.ui.View):
+    """Ephemeral ballot that answers every candidate date of a schedule at once.
+
+    The voter picks the ⭕ and 🔺 dates from two select menus; the remaining
+    dates are ❌. Submitting writes the whole ballot in one transaction. For a
+    recurring schedule the ballot covers the next RECURRENCE_WINDOW occurrences.
+    """
+
+    def __init__(self, repository: ScheduleRepository, schedule: Schedule, user_id: int):
+        super().__init__(timeout=300)
+        self.repository = repository
+        self.schedule = schedule
+        self.user_id = user_id
+        self.dates = schedule.window_dates(limit=config.RECURRENCE_WINDOW)
+        # 既存の投票を初期値にする（未操作のセレクトメニューは values を返さないため自前で保持）
+        current = schedule.votes.get(user_id, {})
+        self.selected: Dict[VoteStatus, Set[int]] = {
+            status: {
+                i for i, date in enumerate(self.dates)
+                if date in current and current[date].vote_status == status
+            }
+            for status in (VoteStatus.CIRCLE, VoteStatus.TRIANGLE)
+        }
+        self.add_item(self._make_select(VoteStatus.CIRCLE, "⭕ 参加できる日程"))
+        self.add_item(self._make_select(VoteStatus.TRIANGLE, "🔺 未定の日程"))
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Refuse selections and submissions while the bot drains for shutdown."""
+        return not await reject_if_draining(interaction)
+
+    def _make_select(self, status: VoteStatus, placeholder: str) -> discord.ui.Select:
+        options = [
+            discord.SelectOption(
+                label=date.strftime('%Y-%m-%d %H:%M'),
+                value=str(i),
+                default=i in self.selected[status]
+            )
+            for i, date in enumerate(self.dates)
+        ]
+        select = discord.ui.Select(
+            placeholder=placeholder,
+            min_values=0,
+            max_values=len(options),
+            options=options,
+            row=0 if status == VoteStatus.CIRCLE else 1
+        )
+
+        async def on_select(interaction: discord.Interaction):
+            self.selected[status] = {int(value) for value in select.values}
+            await interaction.response.defer()
+
+        select.callback = on_select
+        return select
+
+    def build_ballot(self) -> Dict[datetime, VoteStatus]:
+        """Map every candidate date to the chosen status (unselected dates are ❌)."""
+        both = self.selected[VoteStatus.CIRCLE] & self.selected[VoteStatus.TRIANGLE]
+        if both:
+            date = self.dates[min(both)].strftime('%Y-%m-%d %H:%M')
+            raise ValueError(f"{date} が ⭕ と 🔺 の両方で選択されています。")
+
+        ballot = {}
+        for i, date in enumerate(self.dates):
+            if i in self.selected[VoteStatus.CIRCLE]:
+                ballot[date] = VoteStatus.CIRCLE
+            elif i in self.selected[VoteStatus.TRIANGLE]:
+                ballot[date] = VoteStatus.TRIANGLE
+            else:
+                ballot[date] = VoteStatus.CROSS
+        return ballot
+
+    @discord.ui.button(label="投票する", style=discord.ButtonStyle.primary, row=2)
+    async def submit(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Write the whole ballot."""
+        try:
+            ballot = self.build_ballot()
+        except ValueError as e:
+            await interaction.response.send_message(str(e), ephemeral=True)
+            return
+
+        schedule = await self.repository.get_schedule(self.schedule.id)
+        if schedule is None or schedule.status != ScheduleStatus.ACTIVE:
+            self.stop()
+            await interaction.response.edit_message(
+                content="このスケジュールは投票を受け付けていません。",
+                view=None
+            )
+            return
+
+        try:
+            # 検証と繰り返しの回の具体化はモデルに任せる。保存に失敗しても読み込んだ
+            # （キャッシュ上の）集約が変わらないよう、コピーに投票する
+            votes = schedule.copy().add_votes(self.user_id, ballot)
+        except ValueError:
+            self.stop()
+            await interaction.response.edit_message(
+                content="候補日時が変更されたため、もう一度 /schedule vote から投票してください。",
+                view=None
+            )
+            return
+
+        try:
+            await self.repository.update_votes(votes)
+        except Exception as e:
+            logger.log_error(e, "ballot submission")
+            await interaction.response.send_message(
+                "投票の保存中にエラーが発生しました。",
+                ephemeral=True
+            )
+            return
+
+        self.stop()
+        lines = [
+            f"・{date.strftime('%Y-%m-%d %H:%M')} {status.value}"
+            for date, status in ballot.items()
+        ]
+        await interaction.response.edit_message(
+            content=f"**{self.schedule.title}** に投票しました。\n" + "\n".join(lines),
+            view=None
+        )
+
 class ScheduleCog(commands.Cog):
     """Schedule management commands."""
+
+    SEARCH_PAGE_SIZE = 10
+    USER_NAME_CACHE_SIZE = 1024
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.db = bot.db  # DatabaseManager instance
-        self.repository = ScheduleRepository(self.db)
+        # Use the bot-wide repository (may be wrapped with a cache)
+        self.repository = getattr(bot, "repository", None) or ScheduleRepository(self.db)
+        # Prefix index over active titles for autocomplete
+        self.title_index = TitleIndex(self.repository)
+        self.repository.add_listener(self.title_index)
+        # Display names of schedule creators (LRU, avoids fetch_user per listing)
+        self.user_names: 'OrderedDict[int, str]' = OrderedDict()
+
+    async def cog_unload(self):
+        """Detach the title index from the repository."""
+        self.repository.remove_listener(self.title_index)
+
+    def export_warm_state(self) -> Dict[str, Any]:
+        """Hot state to carry over a restart."""
+        return {
+            "title_index": self.title_index.export_state(),
+            "user_names": [[user_id, name] for user_id, name in self.user_names.items()],
+        }
+
+    def import_warm_state(self, state: Dict[str, Any]) -> None:
+        """Restore the state written by export_warm_state()."""
+        self.title_index.import_state(state.get("title_index", {}))
+        for user_id, name in state.get("user_names", []):
+            self._remember_user_name(user_id, name)
+
+    def _remember_user_name(self, user_id: int, name: str) -> None:
+        self.user_names[user_id] = name
+        self.user_names.move_to_end(user_id)
+        while len(self.user_names) > self.USER_NAME_CACHE_SIZE:
+            self.user_names.popitem(last=False)
+
+    async def _get_user_name(self, user_id: int) -> str:
+        """Display name of a user, fetched from Discord only on a cache miss."""
+        name = self.user_names.get(user_id)
+        if name is not None:
+            self.user_names.move_to_end(user_id)
+            return name
+        try:
+            user = await self.bot.fetch_user(user_id)
+        except discord.HTTPException:
+            return "Unknown"
+        self._remember_user_name(user_id, user.display_name)
+        return user.display_name
     
     @app_commands.command(
         name="schedule",
         description="スケジュールの作成・管理を行います"
     )
     @app_commands.describe(
-        action="実行するアクション（create/list/cancel）"
+        action="実行するアクション（create/list/vote/cancel/search）",
+        target="対象のスケジュール（cancel/vote で使用）",
+        keyword="検索キーワード（search で使用）",
+        page="検索結果のページ番号（search で使用）"
     )
     @app_commands.choices(action=[
         app_commands.Choice(name="作成", value="create"),
         app_commands.Choice(name="一覧", value="list"),
+        app_commands.Choice(name="投票", value="vote"),
         app_commands.Choice(name="キャンセル", value="cancel"),
+        app_commands.Choice(name="検索", value="search"),
     ])
     async def schedule(
         self,
         interaction: discord.Interaction,
-        action: str
+        action: str,
+        target: Optional[str] = None,
+        keyword: Optional[str] = None,
+        page: app_commands.Range[int, 1, 100] = 1
     ):
         """Schedule command main handler."""
         logger.log_command(
@@ -157,6 +441,23 @@ class ScheduleCog(commands.Cog):
             f"{interaction.user} (ID: {interaction.user.id}) called {action}"
         )
 
+        started = perf_counter()
+        outcome = "error"
+        try:
+            await self._run_action(interaction, action, target, keyword, page)
+            outcome = "ok"
+        finally:
+            COMMAND_DURATION.observe(perf_counter() - started, action=action)
+            COMMANDS_TOTAL.inc(action=action, outcome=outcome)
+
+    async def _run_action(
+        self,
+        interaction: discord.Interaction,
+        action: str,
+        target: Optional[str],
+        keyword: Optional[str],
+        page: int
+    ):
         if action == "create":
             modal = ScheduleCreateModal(self.repository)
             await interaction.response.send_modal(modal)
@@ -180,21 +481,20 @@ class ScheduleCog(commands.Cog):
                 
                 for schedule in schedules:
                     # 作成者情報を取得
-                    creator = await self.bot.fetch_user(schedule.creator_id)
-                    creator_name = creator.display_name if creator else "Unknown"
+                    creator_name = await self._get_user_name(schedule.creator_id)
                     
-                    # 候補日時と投票状況を文字列化
-                    date_votes = []
-                    for date in schedule.dates:
-                        vote_counts = schedule.get_vote_count(date.date)
-                        date_str = date.date.strftime('%Y-%m-%d %H:%M')
-                        vote_str = f"(⭕:{vote_counts[VoteStatus.CIRCLE]} 🔺:{vote_counts[VoteStatus.TRIANGLE]} ❌:{vote_counts[VoteStatus.CROSS]})"
-                        date_votes.append(f"・{date_str} {vote_str}")
+                    # 候補日時と投票状況を文字列化（繰り返しは直近の回のみ）
+                    tallies = await self.repository.get_vote_tallies(schedule.id)
+                    date_votes = [
+                        format_date_votes(date, tallies)
+                        for date in schedule.window_dates(limit=config.RECURRENCE_WINDOW)
+                    ]
                     
                     # スケジュール情報をフィールドとして追加
                     field_value = f"**説明**: {schedule.description or '説明なし'}\n" + \
-                                f"**作成者**: {creator_name}\n\n" + \
-                                "**候補日時**:\n" + "\n".join(date_votes)
+                                f"**作成者**: {creator_name}\n" + \
+                                (f"**繰り返し**: {schedule.recurrence.describe()}\n" if schedule.recurrence else "") + \
+                                "\n**候補日時**:\n" + "\n".join(date_votes)
                     
                     embed.add_field(
                         name=f"📅 {schedule.title}",
@@ -203,12 +503,164 @@ class ScheduleCog(commands.Cog):
                     )
                 
                 await interaction.response.send_message(embed=embed)
+            elif action == "vote":
+                await self.vote(interaction, target)
+            elif action == "cancel":
+                await self.cancel(interaction, target)
+            elif action == "search":
+                await self.search(interaction, keyword, page)
             else:
                 await interaction.response.send_message(
                     f"Action '{action}' は現在実装されていません。",
                     ephemeral=True
                 )
 
+    @schedule.autocomplete("target")
+    async def target_autocomplete(
+        self,
+        interaction: discord.Interaction,
+        current: str
+    ) -> List[app_commands.Choice[str]]:
+        """Suggest active schedules in this channel whose title starts with the input."""
+        matches = await self.title_index.search(interaction.channel_id, current, limit=25)
+        return [
+            app_commands.Choice(name=title[:100], value=schedule_id)
+            for schedule_id, title in matches
+        ]
+
+    async def _resolve_target(
+        self,
+        interaction: discord.Interaction,
+        target: Optional[str]
+    ) -> Optional[Schedule]:
+        """Resolve the autocomplete value (schedule ID) to an active schedule in this channel."""
+        if not target:
+            await interaction.response.send_message(
+                "対象のスケジュールを指定してください。",
+                ephemeral=True
+            )
+            return None
+
+        schedule = await self.repository.get_schedule(target)
+        if (
+            schedule is None
+            or schedule.channel_id != interaction.channel_id
+            or schedule.status != ScheduleStatus.ACTIVE
+        ):
+            await interaction.response.send_message(
+                "指定されたスケジュールが見つかりません。",
+                ephemeral=True
+            )
+            return None
+        return schedule
+
+    @staticmethod
+    def searchable_channel_ids(interaction: discord.Interaction) -> List[int]:
+        """Channels and threads of the guild the user can view (only the current channel in DMs)."""
+        if interaction.guild is None:
+            return [interaction.channel_id]
+
+        user = interaction.user
+        channel_ids = [
+            channel.id for channel in interaction.guild.channels
+            if channel.permissions_for(user).view_channel
+        ]
+        for thread in interaction.guild.threads:
+            permissions = thread.permissions_for(user)
+            if not permissions.view_channel:
+                continue
+            # 非公開スレッドは参加者かスレッド管理権限を持つメンバーにだけ見える
+            if thread.is_private() and not permissions.manage_threads and not (
+                thread.owner_id == user.id or any(member.id == user.id for member in thread.members)
+            ):
+                continue
+            channel_ids.append(thread.id)
+        return channel_ids
+
+    async def search(self, interaction: discord.Interaction, keyword: Optional[str], page: int = 1):
+        """Search past and present schedules in this guild by keyword."""
+        if not keyword or not keyword.strip():
+            await interaction.response.send_message(
+                "検索キーワードを指定してください。",
+                ephemeral=True
+            )
+            return
+
+        schedules = await self.repository.search_schedules(
+            keyword,
+            channel_ids=self.searchable_channel_ids(interaction),
+            limit=self.SEARCH_PAGE_SIZE,
+            offset=(page - 1) * self.SEARCH_PAGE_SIZE
+        )
+        if not schedules:
+            await interaction.response.send_message(
+                f"「{keyword}」に一致するスケジュールはありません。",
+                ephemeral=True
+            )
+            return
+
+        embed = discord.Embed(
+            title=f"検索結果: {keyword}（{page}ページ目）",
+            color=discord.Color.blue()
+        )
+        for schedule in schedules:
+            upcoming = schedule.window_dates(limit=1)
+            if schedule.confirmed_date:
+                date_str = schedule.confirmed_date.strftime('%Y-%m-%d %H:%M')
+            elif upcoming:
+                date_str = upcoming[0].strftime('%Y-%m-%d %H:%M') + " 〜"
+            else:
+                date_str = "日時未定"
+            embed.add_field(
+                name=f"📅 {schedule.title}",
+                value=f"**状態**: {schedule.status.value}\n"
+                      f"**日時**: {date_str}\n"
+                      f"**チャンネル**: <#{schedule.channel_id}>",
+                inline=False
+            )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    async def vote(self, interaction: discord.Interaction, target: Optional[str]):
+        """Open a ballot for answering all candidate dates at once."""
+        schedule = await self._resolve_target(interaction, target)
+        if schedule is None:
+            return
+
+        if not schedule.window_dates(limit=config.RECURRENCE_WINDOW):
+            await interaction.response.send_message(
+                "投票できる候補日時がありません。",
+                ephemeral=True
+            )
+            return
+
+        await interaction.response.send_message(
+            f"**{schedule.title}** の候補日時に回答してください（未選択の日程は ❌ になります）。",
+            view=VoteBallotView(self.repository, schedule, interaction.user.id),
+            ephemeral=True
+        )
+
+    async def cancel(self, interaction: discord.Interaction, target: Optional[str]):
+        """Cancel a schedule (creator only)."""
+        schedule = await self._resolve_target(interaction, target)
+        if schedule is None:
+            return
+
+        if schedule.creator_id != interaction.user.id:
+            await interaction.response.send_message(
+                "スケジュールをキャンセルできるのは作成者のみです。",
+                ephemeral=True
+            )
+            return
+
+        await self.repository.cancel_schedule(schedule.id)
+        await interaction.response.send_message(
+            embed=discord.Embed(
+                title="スケジュールキャンセル",
+                description=f"**{schedule.title}** をキャンセルしました。",
+                color=discord.Color.red()
+            )
+        )
+
 async def setup(bot: commands.Bot):
     """Set up the Schedule cog."""
     await bot.add_cog(ScheduleCog(bot))
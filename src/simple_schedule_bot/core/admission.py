@@ -0,0 +1,140 @@
+"""
+Admission control for application commands.
+
+Every command passes through token buckets keyed by user, channel and guild
+before it reaches a cog, so one noisy user, channel or guild cannot saturate
+the shared database connection for everyone else. Buckets live in a bounded
+LRU table; a bucket that has been idle long enough to refill completely is
+indistinguishable from a new one and is evicted.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Optional, Tuple
+
+SCOPES = ("user", "channel", "guild")
+
+class TokenBucket:
+    """Token bucket holding up to ``rate`` tokens, refilled over ``per`` seconds."""
+
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, rate: int, now: float):
+        self.tokens = float(rate)
+        self.updated_at = now
+
+    def refill(self, rate: int, per: float, now: float) -> None:
+        self.tokens = min(float(rate), self.tokens + (now - self.updated_at) * rate / per)
+        self.updated_at = now
+
+class BucketTable:
+    """Bounded LRU table of token buckets for one scope."""
+
+    def __init__(self, rate: int, per: float, max_size: int = 10000):
+        self.rate = rate
+        self.per = per
+        self.max_size = max_size
+        self._buckets: 'OrderedDict[Hashable, TokenBucket]' = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def get(self, key: Hashable, now: float) -> TokenBucket:
+        """Refilled bucket for ``key`` (a fresh one if unknown)."""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._evict_idle(now)
+            bucket = TokenBucket(self.rate, now)
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        else:
+            bucket.refill(self.rate, self.per, now)
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _evict_idle(self, now: float) -> None:
+        # 先頭ほど長く使われていないので、満タンに戻ったものを先頭から捨てる
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket.updated_at < self.per:
+                break
+            del self._buckets[key]
+            self.evictions += 1
+
+    def retry_after(self, bucket: TokenBucket) -> float:
+        """Seconds until ``bucket`` holds a whole token."""
+        return max(0.0, (1.0 - bucket.tokens) * self.per / self.rate)
+
+@dataclass
+class AdmissionStats:
+    admitted: int = 0
+    rejected: Dict[str, int] = field(default_factory=lambda: {scope: 0 for scope in SCOPES})
+    rejected_commands: Dict[str, int] = field(default_factory=dict)
+
+class AdmissionController:
+    """Per-user, per-channel and per-guild rate limits for incoming commands.
+
+    Each limit is ``(rate, per)``: at most ``rate`` commands per ``per``
+    seconds, with bursts up to ``rate``. A rate of 0 disables that scope.
+    """
+
+    def __init__(
+        self,
+        user: Tuple[int, float] = (5, 10.0),
+        channel: Tuple[int, float] = (15, 10.0),
+        guild: Tuple[int, float] = (30, 10.0),
+        max_buckets: int = 10000
+    ):
+        self.tables: Dict[str, BucketTable] = {
+            scope: BucketTable(rate, per, max_buckets)
+            for scope, (rate, per) in zip(SCOPES, (user, channel, guild))
+            if rate > 0
+        }
+        self.stats = AdmissionStats()
+
+    def check(
+        self,
+        user_id: int,
+        channel_id: Optional[int],
+        guild_id: Optional[int],
+        command: str = "",
+        now: Optional[float] = None
+    ) -> Optional[Tuple[str, float]]:
+        """Consume one token from every applicable bucket.
+
+        Returns None when admitted, otherwise ``(scope, retry_after)`` of the
+        first exhausted bucket; a rejected call consumes no tokens.
+        """
+        now = time.monotonic() if now is None else now
+        keys = {"user": user_id, "channel": channel_id, "guild": guild_id}
+        buckets = []
+        for scope, table in self.tables.items():
+            if keys[scope] is None:
+                continue
+            bucket = table.get(keys[scope], now)
+            if bucket.tokens < 1.0:
+                self.stats.rejected[scope] += 1
+                if command:
+                    self.stats.rejected_commands[command] = self.stats.rejected_commands.get(command, 0) + 1
+                return scope, table.retry_after(bucket)
+            buckets.append(bucket)
+
+        for bucket in buckets:
+            bucket.tokens -= 1.0
+        self.stats.admitted += 1
+        return None
+
+    def metrics(self) -> Dict[str, float]:
+        """Admission counters and bucket table sizes."""
+        metrics: Dict[str, float] = {"admission.admitted": self.stats.admitted}
+        for scope, count in self.stats.rejected.items():
+            metrics[f"admission.rejected.{scope}"] = count
+        for command, count in self.stats.rejected_commands.items():
+            metrics[f"admission.rejected_command.{command}"] = count
+        for scope, table in self.tables.items():
+            metrics[f"admission.buckets.{scope}"] = len(table)
+            metrics[f"admission.evictions.{scope}"] = table.evictions
+        return metrics
@@ -24,7 +24,44 @@ class Config:
         self.COMMAND_PREFIX: str = os.getenv("COMMAND_PREFIX", "/")
         self.DB_PATH: str = os.getenv("DB_PATH", "data/schedule.db")
         self.MAX_DATES: int = int(os.getenv("MAX_DATES", "10"))
+        # Upcoming occurrences of a recurring schedule shown and voted on at once (max 25)
+        self.RECURRENCE_WINDOW: int = min(int(os.getenv("RECURRENCE_WINDOW", "5")), 25)
         self.REMINDER_CHECK_INTERVAL: int = int(os.getenv("REMINDER_CHECK_INTERVAL", "60"))
+        # Schedule aggregate LRU cache size (0 disables the cache)
+        self.SCHEDULE_CACHE_SIZE: int = int(os.getenv("SCHEDULE_CACHE_SIZE", "256"))
+        # Storage backend ("sqlite" or "memory"; memory keeps nothing across restarts)
+        self.STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "sqlite")
+        # Vote storage mode ("upsert", "event_log" or "packed") and event log compaction interval
+        self.VOTE_STORAGE: str = os.getenv("VOTE_STORAGE", "upsert")
+        self.VOTE_COMPACTION_INTERVAL: int = int(os.getenv("VOTE_COMPACTION_INTERVAL", "30"))
+        # Event loop monitoring (lag threshold in seconds; debug mode logs slow callbacks)
+        self.LOOP_LAG_THRESHOLD: float = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))
+        self.ASYNCIO_DEBUG: bool = os.getenv("ASYNCIO_DEBUG", "false").lower() in ("1", "true", "yes")
+        # Outbound message dispatcher
+        self.DISPATCHER_WORKERS: int = int(os.getenv("DISPATCHER_WORKERS", "4"))
+        # Channel dashboards: changes within this many seconds are merged into one edit
+        self.DASHBOARD_UPDATE_WINDOW: float = float(os.getenv("DASHBOARD_UPDATE_WINDOW", "5"))
+        # Expired schedule sweeper (interval in seconds, batch size and batches per run)
+        self.EXPIRY_SWEEP_INTERVAL: int = int(os.getenv("EXPIRY_SWEEP_INTERVAL", "300"))
+        self.EXPIRY_SWEEP_BATCH: int = int(os.getenv("EXPIRY_SWEEP_BATCH", "100"))
+        self.EXPIRY_SWEEP_MAX_BATCHES: int = int(os.getenv("EXPIRY_SWEEP_MAX_BATCHES", "10"))
+        self.EXPIRY_NOTIFY_CREATOR: bool = os.getenv("EXPIRY_NOTIFY_CREATOR", "false").lower() in ("1", "true", "yes")
+        # Graceful shutdown: seconds to wait for in-flight interactions, and the
+        # warm-restart snapshot of in-memory state (empty string disables it)
+        self.SHUTDOWN_DRAIN_TIMEOUT: float = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "10"))
+        self.WARM_SNAPSHOT_PATH: str = os.getenv("WARM_SNAPSHOT_PATH", "data/warm_state.json.gz")
+        # Admission control: at most RATE commands per PER seconds for each
+        # user, channel and guild (a rate of 0 disables that limit)
+        self.ADMISSION_USER_RATE: int = int(os.getenv("ADMISSION_USER_RATE", "5"))
+        self.ADMISSION_USER_PER: float = float(os.getenv("ADMISSION_USER_PER", "10"))
+        self.ADMISSION_CHANNEL_RATE: int = int(os.getenv("ADMISSION_CHANNEL_RATE", "15"))
+        self.ADMISSION_CHANNEL_PER: float = float(os.getenv("ADMISSION_CHANNEL_PER", "10"))
+        self.ADMISSION_GUILD_RATE: int = int(os.getenv("ADMISSION_GUILD_RATE", "30"))
+        self.ADMISSION_GUILD_PER: float = float(os.getenv("ADMISSION_GUILD_PER", "10"))
+        self.ADMISSION_MAX_BUCKETS: int = int(os.getenv("ADMISSION_MAX_BUCKETS", "10000"))
+        # Prometheus metrics endpoint (GET /metrics); port 0 disables the server
+        self.METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+        self.METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
     
     def _get_required(self, key: str) -> str:
         """Get a required environment variable."""
@@ -0,0 +1,186 @@
+"""
+Runtime diagnostics for the Discord Schedule Bot.
+
+Provides an on-demand ``tracemalloc`` session (top allocation sites and growth
+between snapshots) and a summary of the bot's own cache sizes, and writes
+both into a plain-text report file.
+"""
+import gc
+import linecache
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# tracemalloc 自身や import 機構の割り当ては除外する
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GiB"
+
+def collect_cache_sizes(bot: Any) -> Dict[str, int]:
+    """Return the sizes of discord.py's caches and the bot's own caches."""
+    sizes: Dict[str, int] = {}
+
+    # discord.py のキャッシュ
+    if hasattr(bot, "cached_messages"):
+        sizes["discord.messages"] = len(bot.cached_messages)
+    if hasattr(bot, "guilds"):
+        sizes["discord.guilds"] = len(bot.guilds)
+        sizes["discord.members"] = sum(len(guild.members) for guild in bot.guilds)
+    if hasattr(bot, "users"):
+        sizes["discord.users"] = len(bot.users)
+
+    # リポジトリのデコレーター（キャッシュ）を内側までたどる
+    repository = getattr(bot, "repository", None)
+    seen = set()
+    while repository is not None and id(repository) not in seen:
+        seen.add(id(repository))
+        # __getattr__ による委譲を避けるためクラス属性で判定する
+        if callable(getattr(type(repository), "stats", None)):
+            stats = repository.stats()
+            name = type(repository).__name__
+            sizes[f"{name}.entries"] = stats.size
+            sizes[f"{name}.bytes"] = stats.approx_bytes
+        repository = vars(repository).get("repository")
+
+    for cog_name, cog in getattr(bot, "cogs", {}).items():
+        title_index = getattr(cog, "title_index", None)
+        if title_index is not None:
+            sizes[f"{cog_name}.title_index"] = len(title_index)
+
+    dispatcher = getattr(bot, "dispatcher", None)
+    if dispatcher is not None:
+        sizes["dispatcher.queued"] = dispatcher.queued
+
+    return sizes
+
+def collect_task_metrics(bot: Any) -> Dict[str, float]:
+    """Return the counters exposed by background task cogs (``metrics()``)
+    and by the bot's admission controller."""
+    metrics: Dict[str, float] = {}
+    for cog in getattr(bot, "cogs", {}).values():
+        if callable(getattr(cog, "metrics", None)):
+            metrics.update(cog.metrics())
+    admission = getattr(bot, "admission", None)
+    if admission is not None:
+        metrics.update(admission.metrics())
+    return metrics
+
+class MemoryProfiler:
+    """On-demand tracemalloc session."""
+
+    def __init__(self, frames: int = 10):
+        self.frames = frames
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._latest: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def running(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        """Start tracing allocations and take the baseline snapshot."""
+        if not self.running:
+            tracemalloc.start(self.frames)
+        self._baseline = self._previous = self._latest = self._take()
+
+    def stop(self) -> None:
+        """Stop tracing and drop the snapshots."""
+        if self.running:
+            tracemalloc.stop()
+        self._baseline = self._previous = self._latest = None
+
+    def _take(self) -> tracemalloc.Snapshot:
+        gc.collect()
+        return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+    def snapshot(self) -> tracemalloc.Snapshot:
+        """Take a new snapshot; growth is measured against the previous one."""
+        if not self.running:
+            raise RuntimeError("tracemalloc is not running")
+        self._previous = self._latest
+        self._latest = self._take()
+        return self._latest
+
+    def top_allocations(self, limit: int = 10) -> List[str]:
+        """Largest allocation sites in the latest snapshot."""
+        if self._latest is None:
+            return []
+        stats = self._latest.statistics("lineno")[:limit]
+        return [
+            f"{_format_size(stat.size):>10} {stat.count:>8} blocks  {stat.traceback[0]}"
+            for stat in stats
+        ]
+
+    def growth(self, limit: int = 10, since_baseline: bool = False) -> List[str]:
+        """Allocation sites that grew the most between snapshots."""
+        reference = self._baseline if since_baseline else self._previous
+        if self._latest is None or reference is None or reference is self._latest:
+            return []
+        diff = self._latest.compare_to(reference, "lineno")
+        diff = [stat for stat in diff if stat.size_diff > 0][:limit]
+        return [
+            f"{'+' + _format_size(stat.size_diff):>10} {stat.count_diff:>+8} blocks  {stat.traceback[0]}"
+            for stat in diff
+        ]
+
+    def traced_memory(self) -> Dict[str, int]:
+        """Current and peak traced memory in bytes."""
+        if not self.running:
+            return {}
+        current, peak = tracemalloc.get_traced_memory()
+        return {"current": current, "peak": peak}
+
+    def build_report(self, bot: Any = None, limit: int = 15) -> str:
+        """Render the full report as text."""
+        lines = [f"Memory report ({datetime.now(timezone.utc).isoformat()})", ""]
+
+        traced = self.traced_memory()
+        if traced:
+            lines.append(
+                f"traced: current {_format_size(traced['current'])}, "
+                f"peak {_format_size(traced['peak'])}"
+            )
+        else:
+            lines.append("tracemalloc: not running")
+
+        sections = [
+            ("Top allocation sites", self.top_allocations(limit)),
+            ("Growth since previous snapshot", self.growth(limit)),
+            ("Growth since baseline", self.growth(limit, since_baseline=True)),
+        ]
+        for title, entries in sections:
+            lines += ["", f"== {title} =="]
+            lines += entries or ["(no data)"]
+
+        if bot is not None:
+            lines += ["", "== Cache sizes =="]
+            lines += [f"{name}: {size}" for name, size in sorted(collect_cache_sizes(bot).items())]
+
+            lines += ["", "== Background tasks =="]
+            metrics = collect_task_metrics(bot)
+            lines += [f"{name}: {value:g}" for name, value in sorted(metrics.items())] or ["(no data)"]
+
+        lines += ["", "== GC =="]
+        lines += [f"generation {i}: {count}" for i, count in enumerate(gc.get_count())]
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, bot: Any = None, directory: str = "logs") -> Path:
+        """Write the report to ``directory`` and return its path."""
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        report_path = path / f"memory-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.txt"
+        report_path.write_text(self.build_report(bot), encoding="utf-8")
+        return report_path
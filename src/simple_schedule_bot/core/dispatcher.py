@@ -0,0 +1,301 @@
+"""
+Rate-limit-aware outbound message dispatcher.
+
+All outgoing ``channel.send`` / ``message.edit`` calls go through a single
+dispatcher that keeps one priority queue per channel, a local token bucket
+per channel, and a bounded pool of worker tasks. Pending edits of the same
+message are merged so that only the latest content is sent.
+"""
+import asyncio
+import heapq
+import itertools
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .logger import logger
+
+class Priority(IntEnum):
+    """送信優先度（小さいほど優先）"""
+    INTERACTION = 0
+    REMINDER = 1
+    REFRESH = 2
+
+@dataclass
+class DispatcherStats:
+    sent: int = 0
+    merged: int = 0
+    rate_limited: int = 0
+    failed: int = 0
+
+@dataclass
+class _Job:
+    priority: Priority
+    seq: int
+    factory: Callable[[], Awaitable[Any]]
+    merge_key: Optional[Hashable]
+    futures: List[asyncio.Future] = field(default_factory=list)
+    attempts: int = 0
+
+    def sort_key(self) -> Tuple[int, int]:
+        return (int(self.priority), self.seq)
+
+class _ChannelState:
+    """チャンネルごとのキューとレート制限バケット"""
+
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated_at: Optional[float] = None
+        self.blocked_until = 0.0
+        self.heap: List[Tuple[Tuple[int, int], _Job]] = []
+        self.pending: Dict[Hashable, _Job] = {}
+        self.busy = False
+        self.scheduled = False
+
+    def delay(self, now: float) -> float:
+        """次の送信が可能になるまでの秒数"""
+        if self.updated_at is not None:
+            self.tokens = min(
+                float(self.rate),
+                self.tokens + (now - self.updated_at) * self.rate / self.per
+            )
+        self.updated_at = now
+
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1.0:
+            wait = max(wait, (1.0 - self.tokens) * self.per / self.rate)
+        return wait
+
+    def head_key(self) -> Tuple[int, int]:
+        return self.heap[0][0]
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """レート制限エラーであれば待機秒数を返す"""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        return float(retry_after)
+    if getattr(error, "status", None) == 429:
+        return 1.0
+    return None
+
+class MessageDispatcher:
+    """Central queue for outgoing Discord messages."""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        channel_rate: int = 5,
+        channel_per: float = 5.0,
+        max_retries: int = 3
+    ):
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+        self.workers = workers
+        self.channel_rate = channel_rate
+        self.channel_per = channel_per
+        self.max_retries = max_retries
+        self.stats = DispatcherStats()
+
+        self._channels: Dict[Hashable, _ChannelState] = {}
+        self._ready: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._seq = itertools.count()
+        self._idle: Optional[asyncio.Event] = None
+        self._outstanding = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def queued(self) -> int:
+        """未送信のジョブ数"""
+        return sum(len(state.heap) for state in self._channels.values())
+
+    def start(self) -> None:
+        """Start the worker pool."""
+        if self.running:
+            return
+        self._ready = asyncio.PriorityQueue()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"dispatcher-worker-{i}")
+            for i in range(self.workers)
+        ]
+        # start() 前に積まれたジョブを再スケジュール
+        for channel_id, state in self._channels.items():
+            if state.heap:
+                state.scheduled = False
+                self._schedule(channel_id, state)
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued job has been processed."""
+        if self._idle is None:
+            return self._outstanding == 0
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self, timeout: Optional[float] = None) -> None:
+        """Flush outstanding jobs (up to ``timeout``) and stop the workers."""
+        if not self.running:
+            return
+        flushed = await self.flush(timeout)
+        if not flushed:
+            logger.logger.warning(f"Dispatcher closed with {self.queued} unsent messages")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        for state in self._channels.values():
+            for _, job in state.heap:
+                for future in job.futures:
+                    if not future.done():
+                        future.cancel()
+            state.heap.clear()
+            state.pending.clear()
+        self._outstanding = 0
+        self._idle.set()
+
+    def submit(
+        self,
+        channel_id: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        priority: Priority = Priority.REFRESH,
+        merge_key: Optional[Hashable] = None
+    ) -> asyncio.Future:
+        """Queue an outgoing request.
+
+        ``factory`` is called when the channel's bucket allows it and must return
+        the awaitable performing the HTTP request. Jobs sharing a ``merge_key``
+        that have not started yet are collapsed into the most recent one.
+        """
+        future = asyncio.get_running_loop().create_future()
+        state = self._channels.get(channel_id)
+        if state is None:
+            state = self._channels[channel_id] = _ChannelState(
+                self.channel_rate, self.channel_per
+            )
+
+        if merge_key is not None and merge_key in state.pending:
+            job = state.pending[merge_key]
+            job.factory = factory
+            job.futures.append(future)
+            if priority < job.priority:
+                job.priority = priority
+                state.heap = [(j.sort_key(), j) for _, j in state.heap]
+                heapq.heapify(state.heap)
+            self.stats.merged += 1
+            return future
+
+        job = _Job(priority, next(self._seq), factory, merge_key, [future])
+        if merge_key is not None:
+            state.pending[merge_key] = job
+        self._push(channel_id, state, job)
+        return future
+
+    def send(self, channel: Any, priority: Priority = Priority.REFRESH, **kwargs: Any) -> asyncio.Future:
+        """Queue ``channel.send(**kwargs)``."""
+        return self.submit(channel.id, lambda: channel.send(**kwargs), priority)
+
+    def edit(self, message: Any, priority: Priority = Priority.REFRESH, **kwargs: Any) -> asyncio.Future:
+        """Queue ``message.edit(**kwargs)``, replacing any pending edit of the same message."""
+        return self.submit(
+            message.channel.id,
+            lambda: message.edit(**kwargs),
+            priority,
+            merge_key=("edit", message.id)
+        )
+
+    def _push(self, channel_id: Hashable, state: _ChannelState, job: _Job) -> None:
+        heapq.heappush(state.heap, (job.sort_key(), job))
+        self._outstanding += 1
+        if self._idle is not None:
+            self._idle.clear()
+        self._schedule(channel_id, state)
+
+    def _schedule(self, channel_id: Hashable, state: _ChannelState, delay: float = 0.0) -> None:
+        """チャンネルを実行待ちキューへ登録（必要なら遅延させる）"""
+        if self._ready is None or state.busy or state.scheduled or not state.heap:
+            return
+        state.scheduled = True
+        entry = (*state.head_key(), channel_id)
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._ready.put_nowait, entry)
+        else:
+            self._ready.put_nowait(entry)
+
+    def _finish(self, job: _Job, result: Any = None, error: Optional[BaseException] = None) -> None:
+        for future in job.futures:
+            if future.done():
+                continue
+            if isinstance(error, asyncio.CancelledError):
+                future.cancel()
+            elif error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        self._outstanding -= 1
+        if self._outstanding == 0 and self._idle is not None:
+            self._idle.set()
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            *_, channel_id = await self._ready.get()
+            state = self._channels[channel_id]
+            state.scheduled = False
+            if state.busy or not state.heap:
+                continue
+
+            wait = state.delay(loop.time())
+            if wait > 0:
+                self._schedule(channel_id, state, wait)
+                continue
+
+            _, job = heapq.heappop(state.heap)
+            if job.merge_key is not None:
+                state.pending.pop(job.merge_key, None)
+            state.tokens -= 1.0
+            state.busy = True
+            try:
+                job.attempts += 1
+                result = await job.factory()
+            except asyncio.CancelledError:
+                self._finish(job, error=asyncio.CancelledError())
+                raise
+            except Exception as e:
+                retry_after = _retry_after(e)
+                if retry_after is not None and job.attempts <= self.max_retries:
+                    self.stats.rate_limited += 1
+                    state.blocked_until = loop.time() + retry_after
+                    newer = state.pending.get(job.merge_key) if job.merge_key is not None else None
+                    if newer is not None:
+                        # 送信中に新しい編集が積まれていれば、そちらに統合する
+                        # （呼び出し元の Future は統合先の送信結果で完了させる）
+                        newer.futures.extend(job.futures)
+                        job.futures = []
+                        self.stats.merged += 1
+                        self._finish(job)
+                    else:
+                        if job.merge_key is not None:
+                            state.pending[job.merge_key] = job
+                        heapq.heappush(state.heap, (job.sort_key(), job))
+                else:
+                    self.stats.failed += 1
+                    logger.log_error(e, f"Dispatcher (channel {channel_id})")
+                    self._finish(job, error=e)
+            else:
+                self.stats.sent += 1
+                self._finish(job, result)
+            finally:
+                state.busy = False
+                if state.heap:
+                    self._schedule(channel_id, state, state.delay(loop.time()))
@@ -0,0 +1,126 @@
+"""
+Graceful shutdown and warm restart support.
+
+``DrainController`` stops the bot from accepting new interactions and waits
+for the handlers already running to finish before the bot closes. The hot
+in-memory state (schedule cache, title index, user name cache) is written to
+a compact gzip JSON snapshot on shutdown and loaded on the next startup, so
+the bot does not have to rebuild it from the database one query at a time.
+A snapshot is only used when the database file is byte-for-byte where the
+snapshot left it (same size and modification time).
+"""
+import asyncio
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .logger import logger
+
+SNAPSHOT_VERSION = 1
+
+# discord.py がインタラクションのハンドラーを実行するタスクの名前
+HANDLER_TASK_PREFIXES = (
+    "CommandTree-invoker",
+    "discord-ui-view-dispatch-",
+    "discord-ui-modal-dispatch-",
+)
+
+DRAINING_MESSAGE = "Botは再起動処理中です。しばらくしてから再度お試しください。"
+
+async def reject_if_draining(interaction: Any) -> bool:
+    """Reply and return True when the bot has stopped accepting interactions.
+
+    Used by views and modals, whose button, select and submit interactions do
+    not pass through the command tree's check.
+    """
+    drain = getattr(interaction.client, "drain", None)
+    if drain is None or drain.accepting:
+        return False
+    await interaction.response.send_message(DRAINING_MESSAGE, ephemeral=True)
+    return True
+
+class DrainController:
+    """Tracks whether new interactions are accepted and waits for in-flight ones."""
+
+    def __init__(self, prefixes: tuple = HANDLER_TASK_PREFIXES):
+        self.prefixes = prefixes
+        self.accepting = True
+
+    def begin(self) -> None:
+        """Stop accepting new interactions."""
+        self.accepting = False
+
+    def in_flight(self) -> List[asyncio.Task]:
+        """Interaction handler tasks that are still running."""
+        current = asyncio.current_task()
+        return [
+            task for task in asyncio.all_tasks()
+            if task is not current and not task.done()
+            and task.get_name().startswith(self.prefixes)
+        ]
+
+    async def wait(self, timeout: float) -> int:
+        """Wait up to ``timeout`` seconds for in-flight handlers; return how many are left."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            # 待機中に開始されたモーダル送信なども拾えるよう毎回取り直す
+            tasks = self.in_flight()
+            remaining = deadline - loop.time()
+            if not tasks or remaining <= 0:
+                return len(tasks)
+            await asyncio.wait(tasks, timeout=remaining)
+
+def _db_fingerprint(db_path: str) -> Optional[List[int]]:
+    try:
+        stat = os.stat(db_path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+def save_snapshot(path: str, db_path: str, state: Dict[str, Any]) -> Path:
+    """Write ``state`` for the (closed) database at ``db_path``."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "db": _db_fingerprint(db_path),
+        "state": state,
+    }
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    # 書き込み途中で落ちても壊れたスナップショットが残らないよう置き換えで保存する
+    tmp = target.with_name(target.name + ".tmp")
+    with gzip.open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, target)
+    return target
+
+def load_snapshot(path: str, db_path: str) -> Optional[Dict[str, Any]]:
+    """Return the snapshot state, or None if it is missing, unreadable or stale.
+
+    The snapshot is removed once read so that it is never applied twice; call
+    this before anything opens the database, since any write would make the
+    snapshot stale anyway.
+    """
+    target = Path(path)
+    if not target.exists():
+        return None
+    try:
+        with gzip.open(target, "rb") as f:
+            payload = json.loads(f.read().decode("utf-8"))
+    except (OSError, ValueError) as e:
+        logger.log_error(e, "Warm snapshot load")
+        payload = None
+    finally:
+        target.unlink(missing_ok=True)
+
+    if not payload or payload.get("version") != SNAPSHOT_VERSION:
+        return None
+    if payload.get("db") is None or payload["db"] != _db_fingerprint(db_path):
+        logger.logger.info("Warm snapshot is stale, rebuilding state from the database")
+        return None
+    return payload["state"]
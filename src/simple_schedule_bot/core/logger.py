@@ -2,6 +2,7 @@
 Logging configuration and utilities for the Discord Schedule Bot.
 """
 import logging
+import os
 import sys
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
@@ -21,20 +22,24 @@ class Logger:
         """ログ設定の初期化"""
         self.logger.setLevel(logging.INFO)
         
-        # Create logs directory if it doesn't exist
-        log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
-        
-        # File handler with rotation
-        file_handler = RotatingFileHandler(
-            filename=log_dir / "bot.log",
-            maxBytes=1024 * 1024,  # 1MB
-            backupCount=5,
-            encoding="utf-8"
-        )
-        file_handler.setFormatter(logging.Formatter(
-            "[%(asctime)s] %(levelname)s: %(message)s"
-        ))
+        # Log file directory (LOG_DIR; an empty value disables the file handler, e.g. in tests)
+        log_dir = os.getenv("LOG_DIR", "logs")
+        if log_dir:
+            # Create logs directory if it doesn't exist
+            log_path = Path(log_dir)
+            log_path.mkdir(parents=True, exist_ok=True)
+            
+            # File handler with rotation
+            file_handler = RotatingFileHandler(
+                filename=log_path / "bot.log",
+                maxBytes=1024 * 1024,  # 1MB
+                backupCount=5,
+                encoding="utf-8"
+            )
+            file_handler.setFormatter(logging.Formatter(
+                "[%(asctime)s] %(levelname)s: %(message)s"
+            ))
+            self.logger.addHandler(file_handler)
         
         # Console handler
         console_handler = logging.StreamHandler(sys.stdout)
@@ -42,8 +47,6 @@ class Logger:
             "[%(asctime)s] %(levelname)s: %(message)s"
         ))
         
-        # Add handlers
-        self.logger.addHandler(file_handler)
         self.logger.addHandler(console_handler)
     
     def log_command(self, cmd: str, user: str):
@@ -0,0 +1,358 @@
+"""
+Prometheus metrics for the Discord Schedule Bot.
+
+Subsystems register counters, gauges and histograms on the module-level
+``registry`` and update them in place. Values that already live elsewhere
+(gateway latency, active schedule count, task counters) are copied into
+gauges by collectors that run when the registry is scraped, so they cost
+nothing between scrapes. ``MetricsServer`` serves the registry in the
+Prometheus text exposition format on a local port.
+"""
+import asyncio
+import inspect
+import math
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .diagnostics import collect_task_metrics
+from .logger import logger
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+class Metric:
+    """Base class: a named family of samples keyed by label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if len(labels) != len(self.labelnames) or set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(sorted(labels))}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, Sequence[Tuple[str, str]], float]]:
+        """Yield ``(name, label pairs, value)`` for every exported sample."""
+        return iter(())
+
+    def render(self) -> List[str]:
+        documentation = self.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+        lines = [f"# HELP {self.name} {documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, pairs, value in self.samples():
+            lines.append(f"{name}{_format_labels(pairs)} {_format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, list(zip(self.labelnames, key)), value
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def clear(self) -> None:
+        """Drop every label set (for gauges rebuilt by a collector)."""
+        self._values.clear()
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, list(zip(self.labelnames, key)), value
+
+class Histogram(Metric):
+    """Distribution of observations over fixed cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        if "le" in labelnames:
+            raise ValueError("'le' is reserved for histogram buckets")
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        # ラベルごとに [各バケットの件数（+Inf を含む、累積前）, 合計]
+        self._series: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the wall-clock duration of the ``with`` block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series is not None else 0
+
+    def sum(self, **labels: Any) -> float:
+        series = self._series.get(self._key(labels))
+        return series[1] if series is not None else 0.0
+
+    def samples(self):
+        for key, (counts, total) in self._series.items():
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", pairs + [("le", _format_value(bound))], cumulative
+            yield f"{self.name}_sum", pairs, total
+            yield f"{self.name}_count", pairs, cumulative
+
+Collector = Callable[[], Any]
+
+class MetricsRegistry:
+    """Named metrics plus the collectors that refresh them before a scrape."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Collector] = []
+
+    def _register(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs) -> Any:
+        existing = self._metrics.get(name)
+        if existing is not None:
+            # 同じ定義の再登録（モジュールの再読み込みなど）は既存のものを返す
+            if type(existing) is not cls or existing.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with a different definition")
+            return existing
+        metric = cls(name, documentation, labelnames, **kwargs)
+        self._metrics[name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def add_collector(self, collector: Collector) -> None:
+        """Register a (sync or async) callable run before every scrape."""
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector: Collector) -> None:
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    async def collect(self) -> None:
+        """Run the collectors; a failing collector leaves its gauges stale."""
+        for collector in list(self._collectors):
+            try:
+                result = collector()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.log_error(e, "Metrics collector")
+
+    def render(self) -> str:
+        """The current values in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    async def scrape(self) -> str:
+        await self.collect()
+        return self.render()
+
+registry = MetricsRegistry()
+
+GATEWAY_LATENCY = registry.gauge(
+    "schedule_bot_gateway_latency_seconds", "Discord gateway heartbeat latency"
+)
+ACTIVE_SCHEDULES = registry.gauge(
+    "schedule_bot_active_schedules", "Schedules currently accepting votes"
+)
+ASYNCIO_TASKS = registry.gauge(
+    "schedule_bot_asyncio_tasks", "Tasks alive on the event loop"
+)
+LOOP_LAG_MAX = registry.gauge(
+    "schedule_bot_loop_lag_max_seconds", "Largest event loop lag seen by the loop monitor"
+)
+LOOP_LAG_EVENTS = registry.gauge(
+    "schedule_bot_loop_lag_events", "Loop monitor ticks that exceeded the lag threshold"
+)
+COMPONENT_METRICS = registry.gauge(
+    "schedule_bot_component_metric",
+    "Counters exposed by background tasks and admission control",
+    ("name",)
+)
+
+def bot_collector(bot: Any) -> Callable[[], Any]:
+    """Collector that copies the bot's runtime state into gauges."""
+
+    async def collect() -> None:
+        latency = getattr(bot, "latency", math.nan)
+        # 接続前は latency が nan/inf になる
+        if math.isfinite(latency):
+            GATEWAY_LATENCY.set(latency)
+        ASYNCIO_TASKS.set(len(asyncio.all_tasks()))
+
+        monitor = getattr(bot, "loop_monitor", None)
+        if monitor is not None:
+            LOOP_LAG_MAX.set(monitor.max_lag)
+            LOOP_LAG_EVENTS.set(monitor.slow_count)
+
+        COMPONENT_METRICS.clear()
+        for name, value in collect_task_metrics(bot).items():
+            COMPONENT_METRICS.set(value, name=name)
+
+        repository = getattr(bot, "repository", None)
+        if repository is not None:
+            ACTIVE_SCHEDULES.set(len(await repository.get_active_schedule_ids()))
+
+    return collect
+
+class MetricsServer:
+    """Minimal HTTP server answering ``GET /metrics`` from a registry.
+
+    Meant to be bound to a loopback or private address for a local Prometheus
+    agent; it speaks just enough HTTP/1.0 for scrapers and closes every
+    connection after one response.
+    """
+
+    READ_TIMEOUT = 5.0
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9464):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # port=0 のときは OS が割り当てたポートを記録する
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), self.READ_TIMEOUT)
+            # ヘッダーは読み捨てる
+            while True:
+                line = await asyncio.wait_for(reader.readline(), self.READ_TIMEOUT)
+                if line in (b"", b"\r\n", b"\n"):
+                    break
+
+            parts = request_line.decode("latin-1").split()
+            method = parts[0] if parts else ""
+            path = parts[1].split("?", 1)[0] if len(parts) > 1 else ""
+            if method not in ("GET", "HEAD"):
+                status, body, content_type = "405 Method Not Allowed", b"Method Not Allowed\n", "text/plain"
+            elif path != "/metrics":
+                status, body, content_type = "404 Not Found", b"Not Found\n", "text/plain"
+            else:
+                status, content_type = "200 OK", CONTENT_TYPE
+                body = (await self.registry.scrape()).encode("utf-8")
+
+            headers = (
+                f"HTTP/1.0 {status}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("latin-1")
+            writer.write(headers if method == "HEAD" else headers + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError, ValueError):
+            pass
+        except Exception as e:
+            logger.log_error(e, "Metrics request")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
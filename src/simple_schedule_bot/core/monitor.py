@@ -0,0 +1,172 @@
+"""
+Event-loop health monitoring and profiling hooks.
+
+``LoopLagMonitor`` measures how late the event loop wakes up a periodic
+heartbeat, and a watchdog thread logs the loop thread's stack whenever the
+heartbeat stalls past a threshold, which points at the slow callback while
+it is still running. ``profile_cprofile`` and ``profile_sampling`` run
+time-bounded profiling sessions and write a ``.pstats`` file (sortable with
+``pstats``/snakeviz) or a folded-stack file (flamegraph.pl, speedscope).
+"""
+import asyncio
+import cProfile
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from pathlib import Path
+from typing import Deque, Dict, Optional
+
+from .logger import logger
+
+class LoopLagMonitor:
+    """Continuously measures event-loop lag and reports stalls with their stack."""
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, history: int = 1000):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples: Deque[float] = deque(maxlen=history)
+        self.max_lag = 0.0
+        self.slow_count = 0
+        self.stall_reports = 0
+
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._heartbeat = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._stall_reported = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, watchdog: bool = True) -> None:
+        """Start measuring on the running loop (and the stall watchdog)."""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+        if watchdog:
+            self._watchdog = threading.Thread(
+                target=self._watch, name="loop-lag-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the monitor."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._heartbeat = time.monotonic()
+            self._stall_reported = False
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                self.slow_count += 1
+                logger.logger.warning(f"Event loop lag {lag * 1000:.0f}ms")
+
+    def _watch(self) -> None:
+        """ループスレッドが閾値を超えて止まっている間にそのスタックを記録する"""
+        while not self._stopped.wait(self.threshold / 2):
+            stalled = time.monotonic() - self._heartbeat - self.interval
+            if stalled < self.threshold or self._stall_reported:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._stall_reported = True
+            self.stall_reports += 1
+            stack = "".join(traceback.format_stack(frame))
+            logger.logger.warning(
+                f"Event loop blocked for {stalled * 1000:.0f}ms, current stack:\n{stack}"
+            )
+
+    def percentile(self, pct: float) -> float:
+        """Lag percentile (seconds) over the recent history."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def stats(self) -> Dict[str, float]:
+        """Summary of the recent lag measurements in seconds."""
+        return {
+            "last": self.samples[-1] if self.samples else 0.0,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max_lag,
+            "slow_count": self.slow_count,
+            "stall_reports": self.stall_reports,
+        }
+
+def enable_slow_callback_logging(loop: asyncio.AbstractEventLoop, threshold: float) -> None:
+    """Turn on asyncio debug mode so callbacks slower than ``threshold`` are logged.
+
+    Debug mode records where each callback was scheduled and adds noticeable
+    overhead, so it is meant for troubleshooting sessions only.
+    """
+    loop.set_debug(True)
+    loop.slow_callback_duration = threshold
+
+async def profile_cprofile(duration: float, path: Path) -> Path:
+    """Profile everything the loop thread runs for ``duration`` seconds."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        profiler.disable()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(path))
+    return path
+
+def _fold(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+async def profile_sampling(duration: float, path: Path, interval: float = 0.005) -> Path:
+    """Sample the loop thread's stack and write folded stacks for flame graphs."""
+    thread_id = threading.get_ident()
+    counts: Counter = Counter()
+    done = threading.Event()
+
+    def sample() -> None:
+        while not done.wait(interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                counts[_fold(frame)] += 1
+
+    sampler = threading.Thread(target=sample, name="loop-sampler", daemon=True)
+    sampler.start()
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        done.set()
+        await asyncio.get_running_loop().run_in_executor(None, sampler.join)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        for stack, count in counts.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
@@ -0,0 +1,206 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models.schedule import Schedule, ScheduleStatus, Vote
+from .storage import ScheduleStorage
+
+@dataclass
+class CacheStats:
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    approx_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        """キャッシュヒット率（0.0〜1.0）"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+def _approx_size(obj: Any, seen: Optional[set] = None) -> int:
+    """オブジェクトグラフのおおよそのメモリ使用量（バイト）"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_approx_size(k, seen) + _approx_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_approx_size(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += _approx_size(vars(obj), seen)
+    return size
+
+class CachedScheduleRepository:
+    """ストレージバックエンドに読み込みスルー型の LRU キャッシュを被せるデコレーター
+
+    キャッシュされた Schedule は呼び出し側と共有される（アイデンティティマップ）。
+    書き込み系メソッドは下位リポジトリへの保存後にキャッシュ上のコピーを更新するため、
+    エントリを破棄せずに最新状態を保つ。
+    読み込み中のキーは世代番号で追跡し、読み込みの await 中に書き込みがあれば
+    読み込んだ（古いかもしれない）スケジュールをキャッシュしない。
+    """
+
+    def __init__(self, repository: ScheduleStorage, max_size: int = 256):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.repository = repository
+        self.max_size = max_size
+        self._cache: 'OrderedDict[str, Schedule]' = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        # 読み込み中のキーの (読み込み数, 世代番号)
+        self._loading: Dict[str, List[int]] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        # キャッシュ対象外の操作は下位リポジトリへ委譲
+        return getattr(self.repository, name)
+
+    def _put(self, schedule: Schedule) -> None:
+        self._cache[schedule.id] = schedule
+        self._cache.move_to_end(schedule.id)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+            self._evictions += 1
+
+    def _touch(self, schedule_id: str) -> None:
+        """書き込みがあったことを読み込み中の get_schedule に知らせる"""
+        loading = self._loading.get(schedule_id)
+        if loading is not None:
+            loading[1] += 1
+
+    async def create_schedule(self, schedule: Schedule) -> str:
+        """スケジュールを作成し、キャッシュに登録"""
+        schedule_id = await self.repository.create_schedule(schedule)
+        self._put(schedule)
+        return schedule_id
+
+    async def get_schedule(self, schedule_id: str) -> Optional[Schedule]:
+        """スケジュールを取得（キャッシュ優先）"""
+        schedule = self._cache.get(schedule_id)
+        if schedule is not None:
+            self._hits += 1
+            self._cache.move_to_end(schedule_id)
+            return schedule
+
+        self._misses += 1
+        loading = self._loading.setdefault(schedule_id, [0, 0])
+        loading[0] += 1
+        generation = loading[1]
+        try:
+            schedule = await self.repository.get_schedule(schedule_id)
+        finally:
+            loading[0] -= 1
+            if loading[0] == 0:
+                del self._loading[schedule_id]
+        if schedule is None:
+            return None
+
+        # 読み込み中に書き込みがあった、または並行する読み込みが先に登録した
+        cached = self._cache.get(schedule_id)
+        if cached is not None:
+            return cached
+        if loading[1] == generation:
+            self._put(schedule)
+        return schedule
+
+    async def get_active_schedules(self) -> List[Schedule]:
+        """アクティブなスケジュールを全て取得（集約はキャッシュ経由）"""
+        schedules = []
+        for schedule_id in await self.repository.get_active_schedule_ids():
+            schedule = await self.get_schedule(schedule_id)
+            if schedule:
+                schedules.append(schedule)
+        return schedules
+
+    async def update_vote(self, vote: Vote) -> None:
+        """投票を更新し、キャッシュ上の投票も反映"""
+        await self.repository.update_vote(vote)
+        self._touch(vote.schedule_id)
+        schedule = self._cache.get(vote.schedule_id)
+        if schedule is not None:
+            schedule.materialize(vote.date)
+            schedule.votes.setdefault(vote.user_id, {})[vote.date] = vote
+
+    async def update_votes(self, votes: List[Vote]) -> None:
+        """複数の投票を更新し、キャッシュ上の投票も反映"""
+        await self.repository.update_votes(votes)
+        for vote in votes:
+            self._touch(vote.schedule_id)
+            schedule = self._cache.get(vote.schedule_id)
+            if schedule is not None:
+                schedule.materialize(vote.date)
+                schedule.votes.setdefault(vote.user_id, {})[vote.date] = vote
+
+    async def confirm_schedule(self, schedule_id: str, confirmed_date: datetime) -> None:
+        """スケジュールを確定し、キャッシュ上の状態も反映"""
+        await self.repository.confirm_schedule(schedule_id, confirmed_date)
+        self._touch(schedule_id)
+        schedule = self._cache.get(schedule_id)
+        if schedule is not None:
+            schedule.confirm_date(confirmed_date)
+
+    async def cancel_schedule(self, schedule_id: str) -> None:
+        """スケジュールをキャンセルし、キャッシュ上の状態も反映"""
+        await self.repository.cancel_schedule(schedule_id)
+        self._touch(schedule_id)
+        schedule = self._cache.get(schedule_id)
+        if schedule is not None:
+            schedule.status = ScheduleStatus.CANCELLED
+
+    async def expire_schedules(self, now: datetime, limit: int = 100) -> List[Tuple[str, str, int, int]]:
+        """期限切れのスケジュールを EXPIRED にし、キャッシュ上の状態も反映"""
+        expired = await self.repository.expire_schedules(now, limit)
+        for schedule_id, *_ in expired:
+            self._touch(schedule_id)
+            schedule = self._cache.get(schedule_id)
+            if schedule is not None:
+                schedule.status = ScheduleStatus.EXPIRED
+        return expired
+
+    async def update_reminder_sent(self, schedule_id: str, sent: bool = True) -> None:
+        """リマインダー送信状態を更新し、キャッシュ上の状態も反映"""
+        await self.repository.update_reminder_sent(schedule_id, sent)
+        self._touch(schedule_id)
+        schedule = self._cache.get(schedule_id)
+        if schedule is not None:
+            schedule.reminder_sent = sent
+
+    def invalidate(self, schedule_id: Optional[str] = None) -> None:
+        """キャッシュを破棄（ID 指定時はそのエントリのみ）"""
+        if schedule_id is None:
+            self._cache.clear()
+            for loading in self._loading.values():
+                loading[1] += 1
+        else:
+            self._cache.pop(schedule_id, None)
+            self._touch(schedule_id)
+
+    def export_state(self) -> List[Dict[str, Any]]:
+        """キャッシュ内容を LRU 順（古い順）に書き出す"""
+        return [schedule.to_dict() for schedule in self._cache.values()]
+
+    def import_state(self, state: List[Dict[str, Any]]) -> None:
+        """export_state() の内容をキャッシュへ読み込む"""
+        for data in state:
+            self._put(Schedule.from_dict(data))
+
+    def stats(self) -> CacheStats:
+        """ヒット率とメモリ使用量の統計を取得"""
+        return CacheStats(
+            size=len(self._cache),
+            max_size=self.max_size,
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            approx_bytes=_approx_size(list(self._cache.values()))
+        )
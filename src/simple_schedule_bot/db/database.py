@@ -1,9 +1,23 @@
 import aiosqlite
 import asyncio
+import time
 from pathlib import Path
 from typing import Optional
 from contextlib import asynccontextmanager
 
+from ..core.metrics import registry
+from .migrations import run_migrations
+
+DB_OPERATION_SECONDS = registry.histogram(
+    "schedule_bot_db_operation_seconds",
+    "Time spent holding the database connection (reads) or inside a transaction",
+    ("operation", "outcome")
+)
+DB_LOCK_WAIT_SECONDS = registry.histogram(
+    "schedule_bot_db_lock_wait_seconds",
+    "Time spent waiting for the transaction lock"
+)
+
 class DatabaseManager:
     _instance: Optional['DatabaseManager'] = None
     _lock = asyncio.Lock()
@@ -11,6 +25,8 @@ class DatabaseManager:
     def __init__(self, db_path: str = "data/schedule.db"):
         self.db_path = db_path
         self._connection: Optional[aiosqlite.Connection] = None
+        # 単一接続上でトランザクションが入れ子にならないよう直列化する
+        self._transaction_lock = asyncio.Lock()
         
     @classmethod
     async def get_instance(cls, db_path: str = "data/schedule.db") -> 'DatabaseManager':
@@ -71,25 +87,41 @@ class DatabaseManager:
                 
                 CREATE INDEX IF NOT EXISTS idx_schedules_status 
                 ON schedules(status);
+
+                CREATE INDEX IF NOT EXISTS idx_schedules_channel_status
+                ON schedules(channel_id, status);
             ''')
 
-    @asynccontextmanager
-    async def connect(self):
-        """データベース接続のコンテキストマネージャー"""
+            # スキーマの差分マイグレーション
+            await run_migrations(conn)
+
+    async def _ensure_connection(self) -> aiosqlite.Connection:
         if self._connection is None:
             self._connection = await aiosqlite.connect(self.db_path)
             self._connection.row_factory = aiosqlite.Row
-        
+        return self._connection
+
+    @asynccontextmanager
+    async def connect(self):
+        """データベース接続のコンテキストマネージャー"""
+        conn = await self._ensure_connection()
+        started = time.perf_counter()
         try:
-            yield self._connection
+            yield conn
         except Exception as e:
-            await self._connection.rollback()
+            await conn.rollback()
+            DB_OPERATION_SECONDS.observe(time.perf_counter() - started, operation="read", outcome="error")
             raise e
+        DB_OPERATION_SECONDS.observe(time.perf_counter() - started, operation="read", outcome="ok")
 
     @asynccontextmanager
     async def transaction(self):
         """トランザクション管理のコンテキストマネージャー"""
-        async with self.connect() as conn:
+        waiting = time.perf_counter()
+        async with self._transaction_lock:
+            conn = await self._ensure_connection()
+            started = time.perf_counter()
+            DB_LOCK_WAIT_SECONDS.observe(started - waiting)
             async with conn.cursor() as cur:
                 await conn.execute("BEGIN")
                 try:
@@ -97,7 +129,13 @@ class DatabaseManager:
                     await conn.commit()
                 except Exception as e:
                     await conn.rollback()
+                    DB_OPERATION_SECONDS.observe(
+                        time.perf_counter() - started, operation="transaction", outcome="rollback"
+                    )
                     raise e
+            DB_OPERATION_SECONDS.observe(
+                time.perf_counter() - started, operation="transaction", outcome="commit"
+            )
 
     async def close(self):
         """データベース接続のクリーンアップとクローズ"""
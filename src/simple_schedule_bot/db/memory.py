@@ -0,0 +1,230 @@
+"""
+In-memory storage backend.
+
+Schedules live in dictionaries with secondary indexes for every query the
+repository answers: active schedules overall and per channel, a min-heap of
+last candidate dates for the expiry sweep, and per-date vote tallies kept
+up to date on every write. Occurrences of recurring schedules are added to
+``dates`` only when they receive a vote, as in SQLite. Nothing survives a
+restart.
+"""
+import heapq
+from dataclasses import replace
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..models.schedule import Schedule, ScheduleDate, ScheduleStatus, Vote, VoteStatus
+from .storage import ListenerRegistry
+
+class InMemoryScheduleRepository(ListenerRegistry):
+    """メモリ上に保存するストレージバックエンド"""
+
+    def __init__(self):
+        super().__init__()
+        self._schedules: Dict[str, Schedule] = {}
+        # 状態・チャンネル別のインデックス（dict を挿入順の集合として使う）
+        self._active: Dict[str, None] = {}
+        self._active_by_channel: Dict[int, Dict[str, None]] = {}
+        self._by_channel: Dict[int, Dict[str, None]] = {}
+        # (最終候補日時, ID) のヒープ。アクティブでなくなった要素は取り出し時に捨てる
+        self._last_dates: List[Tuple[datetime, str]] = []
+        self._tallies: Dict[str, Dict[datetime, Dict[VoteStatus, int]]] = {}
+        self._dashboards: Dict[int, int] = {}
+        self._next_date_id = 1
+        self._next_vote_id = 1
+
+    async def create_schedule(self, schedule: Schedule) -> str:
+        """スケジュールを作成"""
+        if schedule.id in self._schedules:
+            raise ValueError(f"Schedule already exists: {schedule.id}")
+
+        stored = schedule.copy()
+        stored.dates = []
+        for date in schedule.dates:
+            stored.dates.append(ScheduleDate(id=self._next_date_id, schedule_id=schedule.id, date=date.date))
+            self._next_date_id += 1
+        stored.dates.sort(key=lambda d: d.date)
+
+        self._schedules[schedule.id] = stored
+        self._tallies[schedule.id] = {}
+        for user_votes in stored.votes.values():
+            for vote in user_votes.values():
+                self._count(schedule.id, vote.date, vote.vote_status, 1)
+        self._by_channel.setdefault(stored.channel_id, {})[schedule.id] = None
+        if stored.status == ScheduleStatus.ACTIVE:
+            self._active[schedule.id] = None
+            self._active_by_channel.setdefault(stored.channel_id, {})[schedule.id] = None
+            last_date = stored.last_date()
+            if last_date is not None:
+                heapq.heappush(self._last_dates, (last_date, schedule.id))
+
+        await self._notify("on_schedule_created", schedule)
+        return schedule.id
+
+    async def get_schedule(self, schedule_id: str) -> Optional[Schedule]:
+        """スケジュールを取得"""
+        schedule = self._schedules.get(schedule_id)
+        return schedule.copy() if schedule is not None else None
+
+    def _count(self, schedule_id: str, date: datetime, status: VoteStatus, delta: int) -> None:
+        counts = self._tallies[schedule_id].setdefault(date, {s: 0 for s in VoteStatus})
+        counts[status] += delta
+
+    async def update_vote(self, vote: Vote) -> None:
+        """投票を更新"""
+        await self.update_votes([vote])
+
+    async def update_votes(self, votes: List[Vote]) -> None:
+        """複数の投票を更新（検証してからまとめて反映）"""
+        if not votes:
+            return
+
+        for vote in votes:
+            schedule = self._schedules.get(vote.schedule_id)
+            if schedule is None:
+                raise ValueError(f"Unknown schedule: {vote.schedule_id}")
+            if not schedule.is_candidate(vote.date):
+                raise ValueError(f"Not a candidate date: {vote.date.isoformat()}")
+
+        for vote in votes:
+            schedule = self._schedules[vote.schedule_id]
+            # 繰り返しスケジュールは投票のあった回だけを具体化する
+            if schedule.materialize(vote.date):
+                for date in schedule.dates:
+                    if date.id is None:
+                        date.id = self._next_date_id
+                        self._next_date_id += 1
+            user_votes = schedule.votes.setdefault(vote.user_id, {})
+            previous = user_votes.get(vote.date)
+            if previous is not None:
+                self._count(vote.schedule_id, vote.date, previous.vote_status, -1)
+                vote_id = previous.id
+            else:
+                vote_id = self._next_vote_id
+                self._next_vote_id += 1
+            user_votes[vote.date] = replace(vote, id=vote_id)
+            self._count(vote.schedule_id, vote.date, vote.vote_status, 1)
+
+        for schedule_id in dict.fromkeys(vote.schedule_id for vote in votes):
+            await self._notify("on_votes_updated", schedule_id)
+
+    async def compact_votes(self) -> int:
+        """圧縮する投票イベントは無い"""
+        return 0
+
+    async def get_vote_tallies(self, schedule_id: str) -> Dict[datetime, Dict[VoteStatus, int]]:
+        """投票のある日時ごとの集計を取得"""
+        return {
+            date: dict(counts)
+            for date, counts in self._tallies.get(schedule_id, {}).items()
+        }
+
+    def _deactivate(self, schedule: Schedule, status: ScheduleStatus) -> None:
+        schedule.status = status
+        self._active.pop(schedule.id, None)
+        channel = self._active_by_channel.get(schedule.channel_id)
+        if channel is not None:
+            channel.pop(schedule.id, None)
+
+    async def confirm_schedule(self, schedule_id: str, confirmed_date: datetime) -> None:
+        """スケジュールを確定"""
+        schedule = self._schedules.get(schedule_id)
+        if schedule is not None:
+            self._deactivate(schedule, ScheduleStatus.CONFIRMED)
+            schedule.confirmed_date = confirmed_date
+        await self._notify("on_schedule_status_changed", schedule_id, ScheduleStatus.CONFIRMED)
+
+    async def cancel_schedule(self, schedule_id: str) -> None:
+        """スケジュールをキャンセル"""
+        schedule = self._schedules.get(schedule_id)
+        if schedule is not None:
+            self._deactivate(schedule, ScheduleStatus.CANCELLED)
+        await self._notify("on_schedule_status_changed", schedule_id, ScheduleStatus.CANCELLED)
+
+    async def expire_schedules(
+        self,
+        now: datetime,
+        limit: int = 100
+    ) -> List[Tuple[str, str, int, int]]:
+        """最終候補日時を過ぎたアクティブなスケジュールを最大 limit 件 EXPIRED にする"""
+        rows = []
+        while self._last_dates and len(rows) < limit and self._last_dates[0][0] < now:
+            _, schedule_id = heapq.heappop(self._last_dates)
+            if schedule_id not in self._active:
+                continue
+            schedule = self._schedules[schedule_id]
+            self._deactivate(schedule, ScheduleStatus.EXPIRED)
+            rows.append((schedule.id, schedule.title, schedule.creator_id, schedule.channel_id))
+
+        for schedule_id, *_ in rows:
+            await self._notify("on_schedule_status_changed", schedule_id, ScheduleStatus.EXPIRED)
+        return rows
+
+    async def get_active_schedule_ids(self) -> List[str]:
+        """アクティブなスケジュールのIDを全て取得"""
+        return list(self._active)
+
+    async def get_active_schedule_titles(self, channel_id: int) -> List[Tuple[str, str]]:
+        """チャンネル内のアクティブなスケジュールの (ID, タイトル) を取得"""
+        return [
+            (schedule_id, self._schedules[schedule_id].title)
+            for schedule_id in self._active_by_channel.get(channel_id, {})
+        ]
+
+    async def get_active_schedules(self) -> List[Schedule]:
+        """アクティブなスケジュールを全て取得"""
+        return [self._schedules[schedule_id].copy() for schedule_id in self._active]
+
+    async def update_reminder_sent(self, schedule_id: str, sent: bool = True) -> None:
+        """リマインダー送信状態を更新"""
+        schedule = self._schedules.get(schedule_id)
+        if schedule is not None:
+            schedule.reminder_sent = sent
+
+    async def set_dashboard(self, channel_id: int, message_id: int) -> None:
+        """チャンネルのダッシュボードメッセージを登録（既存の登録は置き換え）"""
+        self._dashboards[channel_id] = message_id
+
+    async def remove_dashboard(self, channel_id: int) -> None:
+        """チャンネルのダッシュボード登録を削除"""
+        self._dashboards.pop(channel_id, None)
+
+    async def get_dashboards(self) -> List[Tuple[int, int]]:
+        """登録済みダッシュボードの (チャンネルID, メッセージID) を全て取得"""
+        return list(self._dashboards.items())
+
+    async def search_schedules(
+        self,
+        query: str,
+        channel_ids: Optional[Sequence[int]] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> List[Schedule]:
+        """タイトル・説明をキーワード検索（タイトルでの一致が多い順、次に新しい順）"""
+        terms = [term.casefold() for term in query.split()]
+        if not terms:
+            return []
+
+        if channel_ids is None:
+            candidates = list(self._schedules)
+        else:
+            candidates = [
+                schedule_id
+                for channel_id in dict.fromkeys(channel_ids)
+                for schedule_id in self._by_channel.get(channel_id, {})
+            ]
+
+        matches = []
+        for schedule_id in candidates:
+            schedule = self._schedules[schedule_id]
+            title = schedule.title.casefold()
+            description = (schedule.description or "").casefold()
+            if all(term in title or term in description for term in terms):
+                title_hits = sum(term in title for term in terms)
+                matches.append((-title_hits, -schedule.created_at.timestamp(), schedule_id))
+
+        matches.sort()
+        return [
+            self._schedules[schedule_id].copy()
+            for _, _, schedule_id in matches[offset:offset + limit]
+        ]
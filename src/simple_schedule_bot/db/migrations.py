@@ -0,0 +1,292 @@
+import sqlite3
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import aiosqlite
+
+from ..core.logger import logger
+from ..models.schedule import VoteStatus, encode_ballot
+
+Migration = Callable[[aiosqlite.Connection], Awaitable[None]]
+
+async def supports_trigram(conn: aiosqlite.Connection) -> bool:
+    """FTS5 の trigram トークナイザーが利用可能か（SQLite 3.34 以降）"""
+    try:
+        await conn.execute(
+            "CREATE VIRTUAL TABLE temp.fts_probe USING fts5(x, tokenize='trigram')"
+        )
+        await conn.execute("DROP TABLE temp.fts_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+async def create_search_index(conn: aiosqlite.Connection) -> None:
+    """schedules の全文検索インデックス（FTS5 trigram）を作成し既存データを投入
+
+    schedules の暗黙の rowid は VACUUM で振り直されうるため、
+    マイグレーション7で安定した search_id との対応付けに置き換える。
+    """
+    if not await supports_trigram(conn):
+        logger.logger.warning(
+            f"SQLite {sqlite3.sqlite_version} lacks FTS5 trigram support; "
+            "schedule search will fall back to LIKE scans"
+        )
+        return
+
+    await conn.executescript('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS schedules_fts USING fts5(
+            title,
+            description,
+            content='schedules',
+            content_rowid='rowid',
+            tokenize='trigram'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS schedules_fts_insert AFTER INSERT ON schedules BEGIN
+            INSERT INTO schedules_fts(rowid, title, description)
+            VALUES (new.rowid, new.title, new.description);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS schedules_fts_delete AFTER DELETE ON schedules BEGIN
+            INSERT INTO schedules_fts(schedules_fts, rowid, title, description)
+            VALUES ('delete', old.rowid, old.title, old.description);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS schedules_fts_update
+        AFTER UPDATE OF title, description ON schedules BEGIN
+            INSERT INTO schedules_fts(schedules_fts, rowid, title, description)
+            VALUES ('delete', old.rowid, old.title, old.description);
+            INSERT INTO schedules_fts(rowid, title, description)
+            VALUES (new.rowid, new.title, new.description);
+        END;
+    ''')
+    # 既存のスケジュールをバックフィル
+    await conn.execute("INSERT INTO schedules_fts(schedules_fts) VALUES ('rebuild')")
+
+async def create_vote_event_log(conn: aiosqlite.Connection) -> None:
+    """追記専用の投票イベントログとスナップショット用テーブルを作成
+
+    vote_events の id は圧縮の境界（ウォーターマーク）として使うため、
+    AUTOINCREMENT で単調増加を保証する。
+    """
+    await conn.executescript('''
+        CREATE TABLE IF NOT EXISTS vote_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            schedule_id TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            date TIMESTAMP NOT NULL,
+            vote_status TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_vote_events_schedule_id
+        ON vote_events(schedule_id, id);
+
+        CREATE TABLE IF NOT EXISTS vote_tallies (
+            schedule_id TEXT NOT NULL,
+            date TIMESTAMP NOT NULL,
+            vote_status TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (schedule_id, date, vote_status)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS vote_compaction (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_event_id INTEGER NOT NULL
+        );
+
+        INSERT OR IGNORE INTO vote_compaction (id, last_event_id) VALUES (1, 0);
+    ''')
+
+async def add_schedule_last_date(conn: aiosqlite.Connection) -> None:
+    """スケジュールの最終候補日時の列とインデックスを追加
+
+    期限切れスケジュールの掃除で (status, last_date) のインデックス範囲検索を使う。
+    """
+    cursor = await conn.execute("PRAGMA table_info(schedules)")
+    if "last_date" not in [row[1] for row in await cursor.fetchall()]:
+        await conn.execute("ALTER TABLE schedules ADD COLUMN last_date TIMESTAMP")
+
+    await conn.executescript('''
+        UPDATE schedules SET last_date = (
+            SELECT MAX(date) FROM schedule_dates WHERE schedule_id = schedules.id
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_schedules_status_last_date
+        ON schedules(status, last_date);
+    ''')
+
+async def create_packed_ballots(conn: aiosqlite.Connection) -> None:
+    """ユーザーごとの投票を1行に詰めて保存する ballots テーブルを作成
+
+    packed は schedule_dates の日時順に2ビット/日程で詰めたバイト列
+    （models.schedule.encode_ballot）。既存の votes から変換して埋める。
+    以後の保存方式の切り替えは ScheduleRepository.sync_vote_storage() が変換する。
+    """
+    await conn.executescript('''
+        CREATE TABLE IF NOT EXISTS ballots (
+            schedule_id TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            packed BLOB NOT NULL,
+            updated_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (schedule_id, user_id)
+        ) WITHOUT ROWID;
+    ''')
+
+    dates: Dict[str, List[datetime]] = {}
+    cursor = await conn.execute("SELECT schedule_id, date FROM schedule_dates ORDER BY schedule_id, date")
+    for schedule_id, date in await cursor.fetchall():
+        dates.setdefault(schedule_id, []).append(datetime.fromisoformat(date))
+
+    ballots: Dict[Tuple[str, int], Dict[datetime, VoteStatus]] = {}
+    updated_at: Dict[Tuple[str, int], str] = {}
+    cursor = await conn.execute("SELECT schedule_id, user_id, date, vote_status, created_at FROM votes")
+    for schedule_id, user_id, date, vote_status, created_at in await cursor.fetchall():
+        key = (schedule_id, user_id)
+        ballots.setdefault(key, {})[datetime.fromisoformat(date)] = VoteStatus(vote_status)
+        updated_at[key] = max(updated_at.get(key, created_at), created_at)
+
+    await conn.executemany(
+        "INSERT OR IGNORE INTO ballots (schedule_id, user_id, packed, updated_at) VALUES (?, ?, ?, ?)",
+        [
+            (schedule_id, user_id, encode_ballot(ballot, dates.get(schedule_id, [])),
+             updated_at[(schedule_id, user_id)])
+            for (schedule_id, user_id), ballot in ballots.items()
+        ]
+    )
+
+async def create_dashboards(conn: aiosqlite.Connection) -> None:
+    """チャンネルごとのダッシュボードメッセージを記録するテーブルを作成"""
+    await conn.executescript('''
+        CREATE TABLE IF NOT EXISTS dashboards (
+            channel_id INTEGER PRIMARY KEY,
+            message_id INTEGER NOT NULL,
+            created_at TIMESTAMP NOT NULL
+        );
+    ''')
+
+async def add_schedule_recurrence(conn: aiosqlite.Connection) -> None:
+    """繰り返しスケジュールの規則（RecurrenceRule.to_dict() の JSON）の列を追加
+
+    各回は保存せず、投票のあった回だけを schedule_dates に書き込む。
+    """
+    cursor = await conn.execute("PRAGMA table_info(schedules)")
+    if "recurrence" not in [row[1] for row in await cursor.fetchall()]:
+        await conn.execute("ALTER TABLE schedules ADD COLUMN recurrence TEXT")
+
+async def stabilize_search_rowids(conn: aiosqlite.Connection) -> None:
+    """全文検索インデックスの対応付けを暗黙の rowid から search_id 列に切り替える
+
+    schedules の主キーは TEXT なので暗黙の rowid は VACUUM で振り直されることがあり、
+    外部コンテンツ方式の FTS5 との対応が崩れる。search_id は既存行では現在の rowid、
+    新しい行では挿入時のトリガーが最大値+1を振る、以後変わらない整数列。
+    """
+    cursor = await conn.execute("PRAGMA table_info(schedules)")
+    if "search_id" not in [row[1] for row in await cursor.fetchall()]:
+        await conn.execute("ALTER TABLE schedules ADD COLUMN search_id INTEGER")
+
+    await conn.executescript('''
+        UPDATE schedules SET search_id = rowid WHERE search_id IS NULL;
+
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_schedules_search_id
+        ON schedules(search_id);
+
+        CREATE TRIGGER IF NOT EXISTS schedules_search_id
+        AFTER INSERT ON schedules WHEN new.search_id IS NULL BEGIN
+            UPDATE schedules
+            SET search_id = (SELECT COALESCE(MAX(search_id), 0) + 1 FROM schedules)
+            WHERE rowid = new.rowid;
+        END;
+
+        DROP TRIGGER IF EXISTS schedules_fts_insert;
+        DROP TRIGGER IF EXISTS schedules_fts_assign;
+        DROP TRIGGER IF EXISTS schedules_fts_delete;
+        DROP TRIGGER IF EXISTS schedules_fts_update;
+        DROP TABLE IF EXISTS schedules_fts;
+    ''')
+
+    if not await supports_trigram(conn):
+        return
+
+    await conn.executescript('''
+        CREATE VIRTUAL TABLE schedules_fts USING fts5(
+            title,
+            description,
+            content='schedules',
+            content_rowid='search_id',
+            tokenize='trigram'
+        );
+
+        -- search_id を指定して挿入された行
+        CREATE TRIGGER schedules_fts_insert
+        AFTER INSERT ON schedules WHEN new.search_id IS NOT NULL BEGIN
+            INSERT INTO schedules_fts(rowid, title, description)
+            VALUES (new.search_id, new.title, new.description);
+        END;
+
+        -- schedules_search_id トリガーが search_id を振った行
+        CREATE TRIGGER schedules_fts_assign
+        AFTER UPDATE OF search_id ON schedules WHEN old.search_id IS NULL BEGIN
+            INSERT INTO schedules_fts(rowid, title, description)
+            VALUES (new.search_id, new.title, new.description);
+        END;
+
+        CREATE TRIGGER schedules_fts_delete AFTER DELETE ON schedules BEGIN
+            INSERT INTO schedules_fts(schedules_fts, rowid, title, description)
+            VALUES ('delete', old.search_id, old.title, old.description);
+        END;
+
+        CREATE TRIGGER schedules_fts_update
+        AFTER UPDATE OF title, description ON schedules BEGIN
+            INSERT INTO schedules_fts(schedules_fts, rowid, title, description)
+            VALUES ('delete', old.search_id, old.title, old.description);
+            INSERT INTO schedules_fts(rowid, title, description)
+            VALUES (new.search_id, new.title, new.description);
+        END;
+    ''')
+    await conn.execute("INSERT INTO schedules_fts(schedules_fts) VALUES ('rebuild')")
+
+async def create_settings(conn: aiosqlite.Connection) -> None:
+    """DB に紐づく設定（投票の保存方式など）を記録するテーブルを作成
+
+    値は ScheduleRepository.sync_vote_storage() が起動時に記録する。
+    """
+    await conn.executescript('''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        ) WITHOUT ROWID;
+    ''')
+
+# (バージョン, 名前, 適用関数) — 追加のみ可。既存エントリは変更しないこと
+MIGRATIONS: List[Tuple[int, str, Migration]] = [
+    (1, "schedules full-text search index", create_search_index),
+    (2, "append-only vote event log", create_vote_event_log),
+    (3, "schedules last candidate date", add_schedule_last_date),
+    (4, "packed per-user ballots", create_packed_ballots),
+    (5, "channel dashboards", create_dashboards),
+    (6, "recurring schedule rules", add_schedule_recurrence),
+    (7, "stable full-text search row ids", stabilize_search_rowids),
+    (8, "database settings", create_settings),
+]
+
+async def run_migrations(conn: aiosqlite.Connection) -> int:
+    """未適用のマイグレーションを順に適用し、適用後のスキーマバージョンを返す"""
+    cursor = await conn.execute("PRAGMA user_version")
+    current = (await cursor.fetchone())[0]
+
+    for version, name, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.logger.info(f"Applying database migration {version}: {name}")
+        try:
+            await migrate(conn)
+            # PRAGMA はパラメータを受け付けないため整数を直接埋め込む
+            await conn.execute(f"PRAGMA user_version = {int(version)}")
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+        current = version
+
+    return current
@@ -1,12 +1,38 @@
-from datetime import datetime
-from typing import List, Optional, Dict, Tuple
+import json
+from datetime import datetime, timezone
+from typing import List, Optional, Dict, Sequence, Tuple
 
-from ..models.schedule import Schedule, ScheduleDate, Vote, ScheduleStatus, VoteStatus
+from ..core.exceptions import ConfigError
+from ..models.schedule import (
+    RecurrenceRule, Schedule, ScheduleDate, Vote, ScheduleStatus, VoteStatus,
+    decode_ballot, encode_ballot
+)
 from .database import DatabaseManager
+from .storage import ListenerRegistry, ScheduleListener
 
-class ScheduleRepository:
-    def __init__(self, db: DatabaseManager):
+# 投票の保存方式: upsert は votes を直接更新、event_log は vote_events に追記し圧縮で votes へ反映、
+# packed はユーザーごとの投票を ballots の1行（2ビット/日程）に保存
+VOTE_STORAGE_UPSERT = "upsert"
+VOTE_STORAGE_EVENT_LOG = "event_log"
+VOTE_STORAGE_PACKED = "packed"
+VOTE_STORAGE_MODES = (VOTE_STORAGE_UPSERT, VOTE_STORAGE_EVENT_LOG, VOTE_STORAGE_PACKED)
+
+# trigram トークナイザーが一致判定できる最短の語長
+MIN_FTS_TERM_LENGTH = 3
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+class ScheduleRepository(ListenerRegistry):
+    """SQLite に保存するストレージバックエンド"""
+
+    def __init__(self, db: DatabaseManager, vote_storage: str = VOTE_STORAGE_UPSERT):
+        if vote_storage not in VOTE_STORAGE_MODES:
+            raise ConfigError(f"Unknown vote storage mode: {vote_storage}")
+        super().__init__()
         self.db = db
+        self.vote_storage = vote_storage
+        self._search_index_available: Optional[bool] = None
 
     async def create_schedule(self, schedule: Schedule) -> str:
         """スケジュールを作成"""
@@ -16,14 +42,16 @@ class ScheduleRepository:
                 """
                 INSERT INTO schedules (
                     id, title, description, creator_id, channel_id,
-                    status, created_at, confirmed_date, reminder_sent
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    status, created_at, confirmed_date, reminder_sent, last_date,
+                    recurrence
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
                     schedule.id, schedule.title, schedule.description,
                     schedule.creator_id, schedule.channel_id, schedule.status.value,
                     schedule.created_at, schedule.confirmed_date,
-                    schedule.reminder_sent
+                    schedule.reminder_sent, schedule.last_date(),
+                    json.dumps(schedule.recurrence.to_dict()) if schedule.recurrence else None
                 )
             )
 
@@ -34,6 +62,7 @@ class ScheduleRepository:
                     (schedule.id, date.date)
                 )
 
+        await self._notify("on_schedule_created", schedule)
         return schedule.id
 
     async def get_schedule(self, schedule_id: str) -> Optional[Schedule]:
@@ -57,11 +86,35 @@ class ScheduleRepository:
             date_rows = await cursor.fetchall()
 
             # 投票の取得
-            cursor = await conn.execute(
-                "SELECT * FROM votes WHERE schedule_id = ?",
-                (schedule_id,)
-            )
+            if self.vote_storage == VOTE_STORAGE_EVENT_LOG:
+                # スナップショットと未圧縮の末尾イベントを1文で読み、圧縮との競合を避ける
+                cursor = await conn.execute(
+                    """
+                    SELECT 0 AS tail, id, schedule_id, user_id, date, vote_status, created_at
+                    FROM votes WHERE schedule_id = ?
+                    UNION ALL
+                    SELECT 1 AS tail, id, schedule_id, user_id, date, vote_status, created_at
+                    FROM vote_events
+                    WHERE schedule_id = ?
+                    AND id > (SELECT last_event_id FROM vote_compaction WHERE id = 1)
+                    ORDER BY tail, id
+                    """,
+                    (schedule_id, schedule_id)
+                )
+            elif self.vote_storage == VOTE_STORAGE_PACKED:
+                cursor = await conn.execute(
+                    "SELECT user_id, packed, updated_at FROM ballots WHERE schedule_id = ?",
+                    (schedule_id,)
+                )
+            else:
+                cursor = await conn.execute(
+                    "SELECT * FROM votes WHERE schedule_id = ?",
+                    (schedule_id,)
+                )
             vote_rows = await cursor.fetchall()
+            ballot_rows = []
+            if self.vote_storage == VOTE_STORAGE_PACKED:
+                ballot_rows, vote_rows = vote_rows, []
 
             # Schedule オブジェクトの構築
             dates = [
@@ -81,8 +134,10 @@ class ScheduleRepository:
                 if user_id not in votes:
                     votes[user_id] = {}
                 
+                # 未圧縮のイベントは votes の行を持たない
+                is_tail = self.vote_storage == VOTE_STORAGE_EVENT_LOG and row['tail']
                 votes[user_id][date] = Vote(
-                    id=row['id'],
+                    id=None if is_tail else row['id'],
                     schedule_id=row['schedule_id'],
                     user_id=user_id,
                     date=date,
@@ -90,7 +145,7 @@ class ScheduleRepository:
                     created_at=datetime.fromisoformat(row['created_at'])
                 )
 
-            return Schedule(
+            schedule = Schedule(
                 id=schedule_row['id'],
                 title=schedule_row['title'],
                 description=schedule_row['description'],
@@ -101,13 +156,97 @@ class ScheduleRepository:
                 confirmed_date=datetime.fromisoformat(schedule_row['confirmed_date']) if schedule_row['confirmed_date'] else None,
                 reminder_sent=bool(schedule_row['reminder_sent']),
                 dates=dates,
-                votes=votes
+                votes=votes,
+                recurrence=(
+                    RecurrenceRule.from_dict(json.loads(schedule_row['recurrence']))
+                    if schedule_row['recurrence'] else None
+                )
             )
+            for row in ballot_rows:
+                schedule.decode_ballot(
+                    row['user_id'], row['packed'], datetime.fromisoformat(row['updated_at'])
+                )
+            return schedule
 
     async def update_vote(self, vote: Vote) -> None:
         """投票を更新"""
-        async with self.db.transaction() as cur:
+        await self.update_votes([vote])
+
+    async def update_votes(self, votes: List[Vote]) -> None:
+        """複数の投票（1ユーザーの全候補日への回答など）を1トランザクションで更新"""
+        if not votes:
+            return
+
+        if self.vote_storage == VOTE_STORAGE_PACKED:
+            await self._update_ballots(votes)
+        elif self.vote_storage == VOTE_STORAGE_EVENT_LOG:
+            await self._append_vote_events(votes)
+        else:
+            await self._upsert_votes(votes)
+
+        for schedule_id in dict.fromkeys(vote.schedule_id for vote in votes):
+            await self._notify("on_votes_updated", schedule_id)
+
+    async def _materialize_occurrences(self, cur, votes: List[Vote]) -> Dict[str, List[datetime]]:
+        """投票先を検証し、繰り返しスケジュールの投票された回を schedule_dates へ書き込む
+
+        存在しないスケジュールや候補日時でない日時への投票は ValueError（どの保存方式でも
+        書き込む前に検出する）。スケジュールごとに新しく追加した日時を返す。
+        """
+        dates_by_schedule: Dict[str, set] = {}
+        for vote in votes:
+            dates_by_schedule.setdefault(vote.schedule_id, set()).add(vote.date)
+
+        added: Dict[str, List[datetime]] = {}
+        for schedule_id, dates in dates_by_schedule.items():
+            await cur.execute("SELECT recurrence FROM schedules WHERE id = ?", (schedule_id,))
+            row = await cur.fetchone()
+            if row is None:
+                raise ValueError(f"Unknown schedule: {schedule_id}")
+
             await cur.execute(
+                "SELECT date FROM schedule_dates WHERE schedule_id = ?",
+                (schedule_id,)
+            )
+            stored = {datetime.fromisoformat(date_row['date']) for date_row in await cur.fetchall()}
+            rule = RecurrenceRule.from_dict(json.loads(row['recurrence'])) if row['recurrence'] else None
+            unknown = [d for d in dates - stored if rule is None or not rule.is_occurrence(d)]
+            if unknown:
+                raise ValueError(f"Not a candidate date: {min(unknown).isoformat()}")
+
+            for date in sorted(dates - stored):
+                await cur.execute(
+                    "INSERT OR IGNORE INTO schedule_dates (schedule_id, date) VALUES (?, ?)",
+                    (schedule_id, date)
+                )
+                if cur.rowcount:
+                    added.setdefault(schedule_id, []).append(date)
+        return added
+
+    async def _append_vote_events(self, votes: List[Vote]) -> None:
+        """投票をイベントとして追記"""
+        async with self.db.transaction() as cur:
+            await self._materialize_occurrences(cur, votes)
+            await cur.executemany(
+                """
+                INSERT INTO vote_events (
+                    schedule_id, user_id, date, vote_status, created_at
+                ) VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        vote.schedule_id, vote.user_id, vote.date,
+                        vote.vote_status.value, vote.created_at
+                    )
+                    for vote in votes
+                ]
+            )
+
+    async def _upsert_votes(self, votes: List[Vote]) -> None:
+        """投票を votes へ直接反映"""
+        async with self.db.transaction() as cur:
+            await self._materialize_occurrences(cur, votes)
+            await cur.executemany(
                 """
                 INSERT INTO votes (
                     schedule_id, user_id, date, vote_status, created_at
@@ -115,12 +254,342 @@ class ScheduleRepository:
                 ON CONFLICT(schedule_id, user_id, date)
                 DO UPDATE SET vote_status = ?, created_at = ?
                 """,
-                (
-                    vote.schedule_id, vote.user_id, vote.date,
-                    vote.vote_status.value, vote.created_at,
-                    vote.vote_status.value, vote.created_at
+                [
+                    (
+                        vote.schedule_id, vote.user_id, vote.date,
+                        vote.vote_status.value, vote.created_at,
+                        vote.vote_status.value, vote.created_at
+                    )
+                    for vote in votes
+                ]
+            )
+
+    async def _update_ballots(self, votes: List[Vote]) -> None:
+        """投票をユーザーごとの詰めた投票行へ反映（既存の回答とマージ）"""
+        ballots: Dict[Tuple[str, int], Dict[datetime, VoteStatus]] = {}
+        updated_at: Dict[Tuple[str, int], datetime] = {}
+        for vote in votes:
+            key = (vote.schedule_id, vote.user_id)
+            ballots.setdefault(key, {})[vote.date] = vote.vote_status
+            updated_at[key] = max(updated_at.get(key, vote.created_at), vote.created_at)
+
+        async with self.db.transaction() as cur:
+            added = await self._materialize_occurrences(cur, votes)
+            rows = []
+            dates_by_schedule: Dict[str, List[datetime]] = {}
+            for (schedule_id, user_id), ballot in ballots.items():
+                dates = dates_by_schedule.get(schedule_id)
+                if dates is None:
+                    await cur.execute(
+                        "SELECT date FROM schedule_dates WHERE schedule_id = ? ORDER BY date",
+                        (schedule_id,)
+                    )
+                    dates = [datetime.fromisoformat(row['date']) for row in await cur.fetchall()]
+                    dates_by_schedule[schedule_id] = dates
+                    if schedule_id in added:
+                        await self._repack_ballots(cur, schedule_id, dates, added[schedule_id])
+
+                await cur.execute(
+                    "SELECT packed FROM ballots WHERE schedule_id = ? AND user_id = ?",
+                    (schedule_id, user_id)
+                )
+                row = await cur.fetchone()
+                merged = decode_ballot(row['packed'], dates) if row else {}
+                merged.update(ballot)
+                rows.append((
+                    schedule_id, user_id, encode_ballot(merged, dates),
+                    updated_at[(schedule_id, user_id)]
+                ))
+
+            await cur.executemany(
+                """
+                INSERT INTO ballots (schedule_id, user_id, packed, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(schedule_id, user_id)
+                DO UPDATE SET packed = excluded.packed, updated_at = excluded.updated_at
+                """,
+                rows
+            )
+
+    async def _repack_ballots(
+        self,
+        cur,
+        schedule_id: str,
+        dates: List[datetime],
+        added: List[datetime]
+    ) -> None:
+        """候補日時の追加でずれたビット位置に合わせて既存の投票行を詰め直す"""
+        new_dates = set(added)
+        old_dates = [date for date in dates if date not in new_dates]
+        # 末尾への追加だけなら既存のビット位置は変わらない
+        if not old_dates or min(new_dates) > old_dates[-1]:
+            return
+        await cur.execute(
+            "SELECT user_id, packed FROM ballots WHERE schedule_id = ?",
+            (schedule_id,)
+        )
+        repacked = [
+            (encode_ballot(decode_ballot(row['packed'], old_dates), dates), schedule_id, row['user_id'])
+            for row in await cur.fetchall()
+        ]
+        if repacked:
+            await cur.executemany(
+                "UPDATE ballots SET packed = ? WHERE schedule_id = ? AND user_id = ?",
+                repacked
+            )
+
+    async def compact_votes(self) -> int:
+        """未圧縮の投票イベントを votes（現在の状態）と vote_tallies（集計）へ反映
+
+        イベント自体は監査ログとして残す。反映したイベント数を返す。
+        """
+        if self.vote_storage != VOTE_STORAGE_EVENT_LOG:
+            return 0
+
+        async with self.db.transaction() as cur:
+            await cur.execute("SELECT last_event_id FROM vote_compaction WHERE id = 1")
+            last_event_id = (await cur.fetchone())[0]
+            await cur.execute("SELECT MAX(id) FROM vote_events")
+            max_event_id = (await cur.fetchone())[0]
+            if max_event_id is None or max_event_id <= last_event_id:
+                return 0
+
+            await cur.execute(
+                """
+                SELECT COUNT(*), GROUP_CONCAT(DISTINCT schedule_id) FROM vote_events
+                WHERE id > ? AND id <= ?
+                """,
+                (last_event_id, max_event_id)
+            )
+            count, schedule_ids = await cur.fetchone()
+
+            # 同じ (スケジュール, ユーザー, 日時) は最新のイベントだけを反映
+            await cur.execute(
+                """
+                INSERT INTO votes (
+                    schedule_id, user_id, date, vote_status, created_at
                 )
+                SELECT schedule_id, user_id, date, vote_status, created_at
+                FROM vote_events
+                WHERE id IN (
+                    SELECT MAX(id) FROM vote_events
+                    WHERE id > ? AND id <= ?
+                    GROUP BY schedule_id, user_id, date
+                )
+                ON CONFLICT(schedule_id, user_id, date)
+                DO UPDATE SET vote_status = excluded.vote_status, created_at = excluded.created_at
+                """,
+                (last_event_id, max_event_id)
+            )
+
+            affected = [(schedule_id,) for schedule_id in schedule_ids.split(",")]
+            await cur.executemany("DELETE FROM vote_tallies WHERE schedule_id = ?", affected)
+            await cur.executemany(
+                """
+                INSERT INTO vote_tallies (schedule_id, date, vote_status, count)
+                SELECT schedule_id, date, vote_status, COUNT(*) FROM votes
+                WHERE schedule_id = ?
+                GROUP BY date, vote_status
+                """,
+                affected
+            )
+            await cur.execute(
+                "UPDATE vote_compaction SET last_event_id = ? WHERE id = 1",
+                (max_event_id,)
+            )
+            return count
+
+    async def sync_vote_storage(self) -> bool:
+        """DB に記録された投票の保存方式を設定の方式に合わせる（起動時に呼ぶ）
+
+        記録と設定が異なる場合は、記録された方式での現在の投票を設定の方式へ
+        1トランザクションで書き換えて記録を更新し、True を返す。
+        記録の無い DB はどの方式で書かれたか分からないため、votes・未圧縮のイベント・
+        ballots を (スケジュール, ユーザー, 日時) ごとに新しい回答を優先して統合する。
+        """
+        async with self.db.transaction() as cur:
+            await cur.execute("SELECT value FROM settings WHERE key = 'vote_storage'")
+            row = await cur.fetchone()
+            stored = row['value'] if row else None
+            if stored == self.vote_storage:
+                return False
+            if stored is not None and stored not in VOTE_STORAGE_MODES:
+                raise ConfigError(f"Unknown vote storage mode recorded in the database: {stored}")
+
+            state: Dict[Tuple[str, int, datetime], Tuple[VoteStatus, datetime]] = {}
+            for mode in VOTE_STORAGE_MODES if stored is None else (stored,):
+                for key, (status, created_at) in (await self._read_vote_state(cur, mode)).items():
+                    if key not in state or created_at > state[key][1]:
+                        state[key] = (status, created_at)
+            await self._write_vote_state(cur, state)
+
+            await cur.execute(
+                """
+                INSERT INTO settings (key, value) VALUES ('vote_storage', ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+                """,
+                (self.vote_storage,)
+            )
+            return True
+
+    async def _read_vote_state(
+        self,
+        cur,
+        mode: str
+    ) -> Dict[Tuple[str, int, datetime], Tuple[VoteStatus, datetime]]:
+        """指定した保存方式で書かれた現在の投票を (スケジュール, ユーザー, 日時) ごとに読む"""
+        state: Dict[Tuple[str, int, datetime], Tuple[VoteStatus, datetime]] = {}
+        if mode == VOTE_STORAGE_PACKED:
+            dates: Dict[str, List[datetime]] = {}
+            await cur.execute("SELECT schedule_id, date FROM schedule_dates ORDER BY schedule_id, date")
+            for row in await cur.fetchall():
+                dates.setdefault(row['schedule_id'], []).append(datetime.fromisoformat(row['date']))
+
+            await cur.execute("SELECT schedule_id, user_id, packed, updated_at FROM ballots")
+            for row in await cur.fetchall():
+                updated_at = datetime.fromisoformat(row['updated_at'])
+                ballot = decode_ballot(row['packed'], dates.get(row['schedule_id'], []))
+                for date, status in ballot.items():
+                    state[(row['schedule_id'], row['user_id'], date)] = (status, updated_at)
+            return state
+
+        await cur.execute("SELECT schedule_id, user_id, date, vote_status, created_at FROM votes")
+        rows = list(await cur.fetchall())
+        if mode == VOTE_STORAGE_EVENT_LOG:
+            # 未圧縮の末尾イベントを古い順に重ねる
+            await cur.execute(
+                """
+                SELECT schedule_id, user_id, date, vote_status, created_at FROM vote_events
+                WHERE id > (SELECT last_event_id FROM vote_compaction WHERE id = 1)
+                ORDER BY id
+                """
+            )
+            rows.extend(await cur.fetchall())
+        for row in rows:
+            state[(row['schedule_id'], row['user_id'], datetime.fromisoformat(row['date']))] = (
+                VoteStatus(row['vote_status']), datetime.fromisoformat(row['created_at'])
+            )
+        return state
+
+    async def _write_vote_state(
+        self,
+        cur,
+        state: Dict[Tuple[str, int, datetime], Tuple[VoteStatus, datetime]]
+    ) -> None:
+        """現在の投票でこの保存方式のテーブルを置き換える"""
+        if self.vote_storage == VOTE_STORAGE_PACKED:
+            dates: Dict[str, List[datetime]] = {}
+            await cur.execute("SELECT schedule_id, date FROM schedule_dates ORDER BY schedule_id, date")
+            for row in await cur.fetchall():
+                dates.setdefault(row['schedule_id'], []).append(datetime.fromisoformat(row['date']))
+
+            ballots: Dict[Tuple[str, int], Dict[datetime, VoteStatus]] = {}
+            updated_at: Dict[Tuple[str, int], datetime] = {}
+            for (schedule_id, user_id, date), (status, created_at) in state.items():
+                key = (schedule_id, user_id)
+                ballots.setdefault(key, {})[date] = status
+                updated_at[key] = max(updated_at.get(key, created_at), created_at)
+
+            await cur.execute("DELETE FROM ballots")
+            await cur.executemany(
+                "INSERT INTO ballots (schedule_id, user_id, packed, updated_at) VALUES (?, ?, ?, ?)",
+                [
+                    (schedule_id, user_id, encode_ballot(ballot, dates.get(schedule_id, [])),
+                     updated_at[(schedule_id, user_id)])
+                    for (schedule_id, user_id), ballot in ballots.items()
+                ]
             )
+            return
+
+        await cur.execute("DELETE FROM votes")
+        await cur.executemany(
+            """
+            INSERT INTO votes (
+                schedule_id, user_id, date, vote_status, created_at
+            ) VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (schedule_id, user_id, date, status.value, created_at)
+                for (schedule_id, user_id, date), (status, created_at) in state.items()
+            ]
+        )
+        if self.vote_storage == VOTE_STORAGE_EVENT_LOG:
+            # 既存のイベントは反映済みとし、集計を作り直す
+            await cur.execute(
+                """
+                UPDATE vote_compaction
+                SET last_event_id = (SELECT COALESCE(MAX(id), 0) FROM vote_events)
+                WHERE id = 1
+                """
+            )
+            await cur.execute("DELETE FROM vote_tallies")
+            await cur.execute(
+                """
+                INSERT INTO vote_tallies (schedule_id, date, vote_status, count)
+                SELECT schedule_id, date, vote_status, COUNT(*) FROM votes
+                GROUP BY schedule_id, date, vote_status
+                """
+            )
+
+    async def get_vote_tallies(self, schedule_id: str) -> Dict[datetime, Dict[VoteStatus, int]]:
+        """投票のある日時ごとの集計を取得"""
+        if self.vote_storage == VOTE_STORAGE_PACKED:
+            # 日時ごとの行を持たないため、復号した現在の状態から集計する
+            return await self._tally_current_state(schedule_id)
+
+        async with self.db.connect() as conn:
+            if self.vote_storage == VOTE_STORAGE_EVENT_LOG:
+                # 圧縮済みの集計に未圧縮の末尾イベントの差分（新しい回答 +1、置き換えた回答 -1）を
+                # 1文で重ね、圧縮との競合を避ける
+                cursor = await conn.execute(
+                    """
+                    WITH tail AS (
+                        SELECT user_id, date, vote_status FROM vote_events
+                        WHERE id IN (
+                            SELECT MAX(id) FROM vote_events
+                            WHERE schedule_id = ?
+                            AND id > (SELECT last_event_id FROM vote_compaction WHERE id = 1)
+                            GROUP BY user_id, date
+                        )
+                    )
+                    SELECT date, vote_status, SUM(count) AS count FROM (
+                        SELECT date, vote_status, count FROM vote_tallies WHERE schedule_id = ?
+                        UNION ALL
+                        SELECT date, vote_status, 1 FROM tail
+                        UNION ALL
+                        SELECT votes.date, votes.vote_status, -1 FROM tail
+                        JOIN votes ON votes.schedule_id = ?
+                        AND votes.user_id = tail.user_id AND votes.date = tail.date
+                    )
+                    GROUP BY date, vote_status
+                    """,
+                    (schedule_id, schedule_id, schedule_id)
+                )
+            else:
+                cursor = await conn.execute(
+                    """
+                    SELECT date, vote_status, COUNT(*) AS count FROM votes
+                    WHERE schedule_id = ?
+                    GROUP BY date, vote_status
+                    """,
+                    (schedule_id,)
+                )
+
+            tallies: Dict[datetime, Dict[VoteStatus, int]] = {}
+            for row in await cursor.fetchall():
+                counts = tallies.setdefault(
+                    datetime.fromisoformat(row['date']),
+                    {status: 0 for status in VoteStatus}
+                )
+                counts[VoteStatus(row['vote_status'])] = row['count']
+            return tallies
+
+    async def _tally_current_state(self, schedule_id: str) -> Dict[datetime, Dict[VoteStatus, int]]:
+        schedule = await self.get_schedule(schedule_id)
+        if schedule is None:
+            return {}
+        voted_dates = {date for user_votes in schedule.votes.values() for date in user_votes}
+        return {date: schedule.get_vote_count(date) for date in voted_dates}
 
     async def confirm_schedule(self, schedule_id: str, confirmed_date: datetime) -> None:
         """スケジュールを確定"""
@@ -133,6 +602,7 @@ class ScheduleRepository:
                 """,
                 (ScheduleStatus.CONFIRMED.value, confirmed_date, schedule_id)
             )
+        await self._notify("on_schedule_status_changed", schedule_id, ScheduleStatus.CONFIRMED)
 
     async def cancel_schedule(self, schedule_id: str) -> None:
         """スケジュールをキャンセル"""
@@ -141,23 +611,71 @@ class ScheduleRepository:
                 "UPDATE schedules SET status = ? WHERE id = ?",
                 (ScheduleStatus.CANCELLED.value, schedule_id)
             )
+        await self._notify("on_schedule_status_changed", schedule_id, ScheduleStatus.CANCELLED)
 
-    async def get_active_schedules(self) -> List[Schedule]:
-        """アクティブなスケジュールを全て取得"""
+    async def expire_schedules(
+        self,
+        now: datetime,
+        limit: int = 100
+    ) -> List[Tuple[str, str, int, int]]:
+        """最終候補日時を過ぎたアクティブなスケジュールを最大 limit 件 EXPIRED にする
+
+        最終候補日時の古い順に処理し、更新したスケジュールの
+        (ID, タイトル, 作成者ID, チャンネルID) を返す。
+        """
+        async with self.db.transaction() as cur:
+            await cur.execute(
+                """
+                SELECT id, title, creator_id, channel_id FROM schedules
+                WHERE status = ? AND last_date < ?
+                ORDER BY last_date
+                LIMIT ?
+                """,
+                (ScheduleStatus.ACTIVE.value, now, limit)
+            )
+            rows = [
+                (row['id'], row['title'], row['creator_id'], row['channel_id'])
+                for row in await cur.fetchall()
+            ]
+            if rows:
+                await cur.executemany(
+                    "UPDATE schedules SET status = ? WHERE id = ?",
+                    [(ScheduleStatus.EXPIRED.value, row[0]) for row in rows]
+                )
+
+        for schedule_id, *_ in rows:
+            await self._notify("on_schedule_status_changed", schedule_id, ScheduleStatus.EXPIRED)
+        return rows
+
+    async def get_active_schedule_ids(self) -> List[str]:
+        """アクティブなスケジュールのIDを全て取得"""
         async with self.db.connect() as conn:
             cursor = await conn.execute(
                 "SELECT id FROM schedules WHERE status = ?",
                 (ScheduleStatus.ACTIVE.value,)
             )
             rows = await cursor.fetchall()
+            return [row['id'] for row in rows]
 
-            schedules = []
-            for row in rows:
-                schedule = await self.get_schedule(row['id'])
-                if schedule:
-                    schedules.append(schedule)
+    async def get_active_schedule_titles(self, channel_id: int) -> List[Tuple[str, str]]:
+        """チャンネル内のアクティブなスケジュールの (ID, タイトル) を取得"""
+        async with self.db.connect() as conn:
+            cursor = await conn.execute(
+                "SELECT id, title FROM schedules WHERE channel_id = ? AND status = ?",
+                (channel_id, ScheduleStatus.ACTIVE.value)
+            )
+            rows = await cursor.fetchall()
+            return [(row['id'], row['title']) for row in rows]
 
-            return schedules
+    async def get_active_schedules(self) -> List[Schedule]:
+        """アクティブなスケジュールを全て取得"""
+        schedules = []
+        for schedule_id in await self.get_active_schedule_ids():
+            schedule = await self.get_schedule(schedule_id)
+            if schedule:
+                schedules.append(schedule)
+
+        return schedules
 
     async def update_reminder_sent(self, schedule_id: str, sent: bool = True) -> None:
         """リマインダー送信状態を更新"""
@@ -166,3 +684,103 @@ class ScheduleRepository:
                 "UPDATE schedules SET reminder_sent = ? WHERE id = ?",
                 (sent, schedule_id)
             )
+
+    async def set_dashboard(self, channel_id: int, message_id: int) -> None:
+        """チャンネルのダッシュボードメッセージを登録（既存の登録は置き換え）"""
+        async with self.db.transaction() as cur:
+            await cur.execute(
+                """
+                INSERT INTO dashboards (channel_id, message_id, created_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(channel_id)
+                DO UPDATE SET message_id = excluded.message_id, created_at = excluded.created_at
+                """,
+                (channel_id, message_id, datetime.now(timezone.utc))
+            )
+
+    async def remove_dashboard(self, channel_id: int) -> None:
+        """チャンネルのダッシュボード登録を削除"""
+        async with self.db.transaction() as cur:
+            await cur.execute("DELETE FROM dashboards WHERE channel_id = ?", (channel_id,))
+
+    async def get_dashboards(self) -> List[Tuple[int, int]]:
+        """登録済みダッシュボードの (チャンネルID, メッセージID) を全て取得"""
+        async with self.db.connect() as conn:
+            cursor = await conn.execute("SELECT channel_id, message_id FROM dashboards")
+            return [(row['channel_id'], row['message_id']) for row in await cursor.fetchall()]
+
+    async def _has_search_index(self, conn) -> bool:
+        if self._search_index_available is None:
+            cursor = await conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schedules_fts'"
+            )
+            self._search_index_available = await cursor.fetchone() is not None
+        return self._search_index_available
+
+    async def search_schedules(
+        self,
+        query: str,
+        channel_ids: Optional[Sequence[int]] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> List[Schedule]:
+        """タイトル・説明をキーワード検索（関連度順、ページング対応）
+
+        空白区切りの語はすべて含むものに一致する。全文検索インデックスは3文字以上の語にのみ
+        使えるため、短い語を含む場合やインデックスが無い場合は LIKE 検索（新しい順）になる。
+        """
+        terms = query.split()
+        if not terms:
+            return []
+
+        channel_filter = ""
+        channel_params: List[int] = []
+        if channel_ids is not None:
+            if not channel_ids:
+                return []
+            channel_filter = f" AND s.channel_id IN ({', '.join('?' * len(channel_ids))})"
+            channel_params = list(channel_ids)
+
+        async with self.db.connect() as conn:
+            use_fts = (
+                all(len(term) >= MIN_FTS_TERM_LENGTH for term in terms)
+                and await self._has_search_index(conn)
+            )
+            if use_fts:
+                match = " AND ".join('"' + term.replace('"', '""') + '"' for term in terms)
+                cursor = await conn.execute(
+                    f"""
+                    SELECT s.id FROM schedules_fts
+                    JOIN schedules s ON s.search_id = schedules_fts.rowid
+                    WHERE schedules_fts MATCH ?{channel_filter}
+                    ORDER BY bm25(schedules_fts, 10.0, 1.0), s.created_at DESC
+                    LIMIT ? OFFSET ?
+                    """,
+                    (match, *channel_params, limit, offset)
+                )
+            else:
+                conditions = " AND ".join(
+                    "(s.title LIKE ? ESCAPE '\\' OR s.description LIKE ? ESCAPE '\\')"
+                    for _ in terms
+                )
+                like_params: List[str] = []
+                for term in terms:
+                    pattern = f"%{_escape_like(term)}%"
+                    like_params += [pattern, pattern]
+                cursor = await conn.execute(
+                    f"""
+                    SELECT s.id FROM schedules s
+                    WHERE {conditions}{channel_filter}
+                    ORDER BY s.created_at DESC
+                    LIMIT ? OFFSET ?
+                    """,
+                    (*like_params, *channel_params, limit, offset)
+                )
+            rows = await cursor.fetchall()
+
+        schedules = []
+        for row in rows:
+            schedule = await self.get_schedule(row['id'])
+            if schedule:
+                schedules.append(schedule)
+        return schedules
@@ -0,0 +1,100 @@
+"""
+Storage backend interface for schedules.
+
+``ScheduleStorage`` describes the operations the commands, tasks and caches
+rely on. ``ScheduleRepository`` implements it on SQLite and
+``InMemoryScheduleRepository`` keeps everything in indexed dictionaries for
+tests, benchmarks and ephemeral deployments.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple, runtime_checkable
+
+from ..core.logger import logger
+from ..models.schedule import Schedule, ScheduleStatus, Vote, VoteStatus
+
+STORAGE_SQLITE = "sqlite"
+STORAGE_MEMORY = "memory"
+STORAGE_BACKENDS = (STORAGE_SQLITE, STORAGE_MEMORY)
+
+class ScheduleListener:
+    """リポジトリの変更通知を受け取るリスナーの基底クラス"""
+
+    async def on_schedule_created(self, schedule: Schedule) -> None:
+        """スケジュール作成後に呼ばれる"""
+
+    async def on_schedule_status_changed(self, schedule_id: str, status: ScheduleStatus) -> None:
+        """スケジュールの状態（確定・キャンセル・期限切れ）変更後に呼ばれる"""
+
+    async def on_votes_updated(self, schedule_id: str) -> None:
+        """スケジュールへの投票の更新後に呼ばれる"""
+
+class ListenerRegistry:
+    """変更通知のリスナー管理（各バックエンド共通）"""
+
+    def __init__(self):
+        self.listeners: List[ScheduleListener] = []
+
+    def add_listener(self, listener: ScheduleListener) -> None:
+        """変更通知のリスナーを登録"""
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: ScheduleListener) -> None:
+        """変更通知のリスナーを解除"""
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    async def _notify(self, event: str, *args) -> None:
+        """コミット済みの変更をリスナーへ通知（リスナーの失敗は書き込みに影響させない）"""
+        for listener in list(self.listeners):
+            try:
+                await getattr(listener, event)(*args)
+            except Exception as e:
+                logger.log_error(e, f"ScheduleListener.{event}")
+
+@runtime_checkable
+class ScheduleStorage(Protocol):
+    """スケジュールの保存先が提供する操作"""
+
+    def add_listener(self, listener: ScheduleListener) -> None: ...
+
+    def remove_listener(self, listener: ScheduleListener) -> None: ...
+
+    async def create_schedule(self, schedule: Schedule) -> str: ...
+
+    async def get_schedule(self, schedule_id: str) -> Optional[Schedule]: ...
+
+    async def update_vote(self, vote: Vote) -> None: ...
+
+    async def update_votes(self, votes: List[Vote]) -> None: ...
+
+    async def compact_votes(self) -> int: ...
+
+    async def get_vote_tallies(self, schedule_id: str) -> Dict[datetime, Dict[VoteStatus, int]]: ...
+
+    async def confirm_schedule(self, schedule_id: str, confirmed_date: datetime) -> None: ...
+
+    async def cancel_schedule(self, schedule_id: str) -> None: ...
+
+    async def expire_schedules(self, now: datetime, limit: int = 100) -> List[Tuple[str, str, int, int]]: ...
+
+    async def get_active_schedule_ids(self) -> List[str]: ...
+
+    async def get_active_schedule_titles(self, channel_id: int) -> List[Tuple[str, str]]: ...
+
+    async def get_active_schedules(self) -> List[Schedule]: ...
+
+    async def update_reminder_sent(self, schedule_id: str, sent: bool = True) -> None: ...
+
+    async def set_dashboard(self, channel_id: int, message_id: int) -> None: ...
+
+    async def remove_dashboard(self, channel_id: int) -> None: ...
+
+    async def get_dashboards(self) -> List[Tuple[int, int]]: ...
+
+    async def search_schedules(
+        self,
+        query: str,
+        channel_ids: Optional[Sequence[int]] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> List[Schedule]: ...
@@ -0,0 +1,122 @@
+import asyncio
+from bisect import bisect_left, insort
+import unicodedata
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..models.schedule import Schedule, ScheduleStatus
+from .repository import ScheduleListener
+
+def normalize_title(title: str) -> str:
+    """検索用にタイトルを正規化（全角半角・大文字小文字を同一視）"""
+    return unicodedata.normalize("NFKC", title).casefold().strip()
+
+class TitleIndex(ScheduleListener):
+    """アクティブなスケジュールタイトルのチャンネル別前方一致インデックス
+
+    チャンネルごとに (正規化タイトル, スケジュールID) のソート済み配列を持ち、
+    二分探索で前方一致検索を行う。チャンネルの内容は初回参照時に DB から読み込み、
+    以降はリポジトリの変更通知で更新する。
+    """
+
+    def __init__(self, repository: Any):
+        self.repository = repository
+        self._entries: Dict[int, List[Tuple[str, str]]] = {}
+        self._titles: Dict[str, Tuple[int, str]] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._loaded: Set[int] = set()
+        self._loading = 0
+        self._closed_while_loading: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def _add(self, channel_id: int, schedule_id: str, title: str) -> None:
+        if schedule_id in self._titles:
+            return
+        self._titles[schedule_id] = (channel_id, title)
+        insort(self._entries.setdefault(channel_id, []), (normalize_title(title), schedule_id))
+
+    def _remove(self, schedule_id: str) -> None:
+        if self._loading:
+            self._closed_while_loading.add(schedule_id)
+        item = self._titles.pop(schedule_id, None)
+        if item is None:
+            return
+        channel_id, title = item
+        entries = self._entries.get(channel_id, [])
+        key = (normalize_title(title), schedule_id)
+        i = bisect_left(entries, key)
+        if i < len(entries) and entries[i] == key:
+            del entries[i]
+
+    async def ensure_loaded(self, channel_id: int) -> None:
+        """チャンネルのインデックスが未構築なら DB から構築"""
+        if channel_id in self._loaded:
+            return
+        lock = self._locks.setdefault(channel_id, asyncio.Lock())
+        async with lock:
+            if channel_id in self._loaded:
+                return
+            # 読み込み中の変更通知も反映できるよう先に領域を確保する
+            self._entries.setdefault(channel_id, [])
+            self._loading += 1
+            try:
+                rows = await self.repository.get_active_schedule_titles(channel_id)
+                for schedule_id, title in rows:
+                    if schedule_id not in self._closed_while_loading:
+                        self._add(channel_id, schedule_id, title)
+                self._loaded.add(channel_id)
+            finally:
+                self._loading -= 1
+                if not self._loading:
+                    self._closed_while_loading.clear()
+
+    async def search(self, channel_id: int, prefix: str, limit: int = 25) -> List[Tuple[str, str]]:
+        """前方一致する (ID, タイトル) を最大 limit 件取得"""
+        await self.ensure_loaded(channel_id)
+        entries = self._entries.get(channel_id, [])
+        key = normalize_title(prefix)
+
+        results = []
+        for normalized, schedule_id in entries[bisect_left(entries, (key, "")):]:
+            if not normalized.startswith(key) or len(results) >= limit:
+                break
+            results.append((schedule_id, self._titles[schedule_id][1]))
+        return results
+
+    def get_title(self, schedule_id: str) -> Optional[str]:
+        """インデックス済みのタイトルを取得"""
+        item = self._titles.get(schedule_id)
+        return item[1] if item else None
+
+    def export_state(self) -> Dict[str, List[List[str]]]:
+        """構築済みチャンネルの内容を書き出す"""
+        return {
+            str(channel_id): [[schedule_id, self._titles[schedule_id][1]]
+                              for _, schedule_id in self._entries[channel_id]]
+            for channel_id in self._loaded
+        }
+
+    def import_state(self, state: Dict[str, List[List[str]]]) -> None:
+        """export_state() の内容を構築済みチャンネルとして読み込む"""
+        for channel, entries in state.items():
+            channel_id = int(channel)
+            self._entries.setdefault(channel_id, [])
+            for schedule_id, title in entries:
+                self._add(channel_id, schedule_id, title)
+            self._loaded.add(channel_id)
+
+    def clear(self) -> None:
+        """インデックスを破棄（次回参照時に再構築）"""
+        self._entries.clear()
+        self._titles.clear()
+        self._loaded.clear()
+
+    async def on_schedule_created(self, schedule: Schedule) -> None:
+        # 未構築のチャンネルは次回参照時に DB から読み込む
+        if schedule.status == ScheduleStatus.ACTIVE and schedule.channel_id in self._entries:
+            self._add(schedule.channel_id, schedule.id, schedule.title)
+
+    async def on_schedule_status_changed(self, schedule_id: str, status: ScheduleStatus) -> None:
+        if status != ScheduleStatus.ACTIVE:
+            self._remove(schedule_id)
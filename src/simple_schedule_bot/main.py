@@ -6,11 +6,51 @@ import os
 import signal
 import sys
 import discord
+from discord import app_commands
 from discord.ext import commands
 
+from simple_schedule_bot.core.admission import AdmissionController
 from simple_schedule_bot.core.config import config
+from simple_schedule_bot.core.exceptions import ConfigError
+from simple_schedule_bot.core.dispatcher import MessageDispatcher
+from simple_schedule_bot.core.lifecycle import (
+    DRAINING_MESSAGE, DrainController, load_snapshot, save_snapshot
+)
 from simple_schedule_bot.core.logger import logger
+from simple_schedule_bot.core.metrics import MetricsServer, bot_collector, registry
+from simple_schedule_bot.core.monitor import LoopLagMonitor, enable_slow_callback_logging
+from simple_schedule_bot.db.cache import CachedScheduleRepository
 from simple_schedule_bot.db.database import DatabaseManager
+from simple_schedule_bot.db.memory import InMemoryScheduleRepository
+from simple_schedule_bot.db.repository import ScheduleRepository, VOTE_STORAGE_EVENT_LOG
+from simple_schedule_bot.db.storage import STORAGE_BACKENDS, STORAGE_MEMORY
+
+class ScheduleTree(app_commands.CommandTree):
+    """Command tree that turns new interactions away while the bot drains
+    or when the caller exceeds the admission limits."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if not self.client.drain.accepting:
+            if interaction.type is discord.InteractionType.application_command:
+                await interaction.response.send_message(DRAINING_MESSAGE, ephemeral=True)
+            return False
+
+        # オートコンプリートは応答できないので制限の対象外
+        if interaction.type is not discord.InteractionType.application_command:
+            return True
+        command = interaction.command.qualified_name if interaction.command else ""
+        rejected = self.client.admission.check(
+            interaction.user.id, interaction.channel_id, interaction.guild_id, command
+        )
+        if rejected is None:
+            return True
+        scope, retry_after = rejected
+        logger.logger.debug(f"Rejected /{command} from {interaction.user.id} ({scope} limit)")
+        await interaction.response.send_message(
+            f"リクエストが多すぎます。{max(1, round(retry_after))}秒後に再度お試しください。",
+            ephemeral=True
+        )
+        return False
 
 class ScheduleBot(commands.Bot):
     """Discord Schedule Bot main class"""
@@ -24,18 +64,76 @@ class ScheduleBot(commands.Bot):
         super().__init__(
             command_prefix=config.COMMAND_PREFIX,
             intents=intents,
-            help_command=None  # カスタムヘルプコマンドを使用予定
+            help_command=None,  # カスタムヘルプコマンドを使用予定
+            tree_cls=ScheduleTree
+        )
+        self.drain = DrainController()
+        self.admission = AdmissionController(
+            user=(config.ADMISSION_USER_RATE, config.ADMISSION_USER_PER),
+            channel=(config.ADMISSION_CHANNEL_RATE, config.ADMISSION_CHANNEL_PER),
+            guild=(config.ADMISSION_GUILD_RATE, config.ADMISSION_GUILD_PER),
+            max_buckets=config.ADMISSION_MAX_BUCKETS
         )
+        self._closing = False
     
     async def setup_hook(self):
         """Bot setup hook - called before the bot starts."""
-        # Initialize database
-        logger.logger.info("Initializing database...")
-        self.db = await DatabaseManager.get_instance(config.DB_PATH)
+        # Start event loop monitoring
+        self.loop_monitor = LoopLagMonitor(threshold=config.LOOP_LAG_THRESHOLD)
+        self.loop_monitor.start()
+        if config.ASYNCIO_DEBUG:
+            enable_slow_callback_logging(asyncio.get_running_loop(), config.LOOP_LAG_THRESHOLD)
+        
+        if config.STORAGE_BACKEND not in STORAGE_BACKENDS:
+            raise ConfigError(f"Unknown storage backend: {config.STORAGE_BACKEND}")
+        
+        # Read the warm snapshot before anything touches the database file
+        warm_state = None
+        if config.WARM_SNAPSHOT_PATH and config.STORAGE_BACKEND != STORAGE_MEMORY:
+            warm_state = load_snapshot(config.WARM_SNAPSHOT_PATH, config.DB_PATH)
+        
+        # Initialize storage
+        if config.STORAGE_BACKEND == STORAGE_MEMORY:
+            logger.logger.info("Using in-memory storage (nothing is persisted)")
+            self.db = None
+            self.repository = InMemoryScheduleRepository()
+        else:
+            logger.logger.info("Initializing database...")
+            self.db = await DatabaseManager.get_instance(config.DB_PATH)
+            self.repository = ScheduleRepository(self.db, vote_storage=config.VOTE_STORAGE)
+            if await self.repository.sync_vote_storage():
+                logger.logger.info(f"Converted stored votes to the {config.VOTE_STORAGE} vote storage")
+        if config.SCHEDULE_CACHE_SIZE > 0:
+            self.repository = CachedScheduleRepository(
+                self.repository,
+                max_size=config.SCHEDULE_CACHE_SIZE
+            )
+        
+        # Start outbound message dispatcher
+        self.dispatcher = MessageDispatcher(workers=config.DISPATCHER_WORKERS)
+        self.dispatcher.start()
         
         # Load command cogs
         await self.load_extension("simple_schedule_bot.commands.ping")
         await self.load_extension("simple_schedule_bot.commands.schedule")
+        await self.load_extension("simple_schedule_bot.commands.dashboard")
+        await self.load_extension("simple_schedule_bot.commands.diagnostics")
+        
+        # Load background tasks
+        await self.load_extension("simple_schedule_bot.tasks.expiry_sweeper")
+        if self.db is not None and config.VOTE_STORAGE == VOTE_STORAGE_EVENT_LOG:
+            await self.load_extension("simple_schedule_bot.tasks.vote_compaction")
+        
+        if warm_state is not None:
+            self.import_warm_state(warm_state)
+            logger.logger.info("Restored in-memory state from the warm snapshot")
+        
+        # Expose metrics (gauges are refreshed from the bot on every scrape)
+        self.metrics_collector = bot_collector(self)
+        registry.add_collector(self.metrics_collector)
+        if config.METRICS_PORT > 0:
+            self.metrics_server = MetricsServer(registry, config.METRICS_HOST, config.METRICS_PORT)
+            await self.metrics_server.start()
         
         # Sync commands with Discord
         logger.logger.info("Syncing commands...")
@@ -57,14 +155,82 @@ class ScheduleBot(commands.Bot):
         
         await ctx.send(f"エラーが発生しました: {error_message}")
 
+    def export_warm_state(self) -> dict:
+        """Collect the hot in-memory state of the repository cache and the cogs."""
+        state = {"cogs": {}}
+        if isinstance(getattr(self, 'repository', None), CachedScheduleRepository):
+            state["schedules"] = self.repository.export_state()
+        for name, cog in self.cogs.items():
+            if hasattr(cog, "export_warm_state"):
+                state["cogs"][name] = cog.export_warm_state()
+        return state
+    
+    def import_warm_state(self, state: dict) -> None:
+        """Restore the state collected by export_warm_state()."""
+        if isinstance(getattr(self, 'repository', None), CachedScheduleRepository):
+            self.repository.import_state(state.get("schedules", []))
+        for name, cog_state in state.get("cogs", {}).items():
+            cog = self.get_cog(name)
+            if cog is not None and hasattr(cog, "import_warm_state"):
+                cog.import_warm_state(cog_state)
+    
+    async def drain_interactions(self, timeout: float) -> None:
+        """Stop accepting interactions and wait for in-flight handlers."""
+        self.drain.begin()
+        logger.logger.info("Draining in-flight interactions...")
+        remaining = await self.drain.wait(timeout)
+        if remaining:
+            logger.logger.warning(f"{remaining} interaction handlers still running after {timeout}s")
+        
+        # Flush pending database writes
+        if hasattr(self, 'repository'):
+            try:
+                await self.repository.compact_votes()
+            except Exception as e:
+                logger.log_error(e, "Final vote compaction")
+
     async def close(self):
         """Cleanly shut down the bot and close all resources."""
-        logger.logger.info("Closing database connection...")
-        if hasattr(self, 'db'):
-            await self.db.close()
+        if self._closing:
+            return
+        self._closing = True
+        
+        # Stop serving metrics before the resources they read go away
+        if hasattr(self, 'metrics_server'):
+            await self.metrics_server.close()
+        if hasattr(self, 'metrics_collector'):
+            registry.remove_collector(self.metrics_collector)
         
+        warm_state = None
+        if hasattr(self, 'repository'):
+            await self.drain_interactions(config.SHUTDOWN_DRAIN_TIMEOUT)
+        
+        if hasattr(self, 'dispatcher'):
+            logger.logger.info("Flushing outbound messages...")
+            await self.dispatcher.close(timeout=5.0)
+        
+        # Capture the hot state while the cogs are still loaded
+        if getattr(self, 'db', None) is not None and config.WARM_SNAPSHOT_PATH:
+            warm_state = self.export_warm_state()
+        
+        # Unloading extensions (e.g. the final vote compaction) still needs the database
         logger.logger.info("Closing bot connection...")
         await super().close()
+        
+        if getattr(self, 'db', None) is not None:
+            logger.logger.info("Closing database connection...")
+            await self.db.close()
+        
+        # The snapshot records the database file as it is after the final writes
+        if warm_state is not None:
+            try:
+                path = save_snapshot(config.WARM_SNAPSHOT_PATH, config.DB_PATH, warm_state)
+                logger.logger.info(f"Warm snapshot written to {path}")
+            except OSError as e:
+                logger.log_error(e, "Warm snapshot save")
+        
+        if hasattr(self, 'loop_monitor'):
+            await self.loop_monitor.stop()
 
 async def main():
     """Main entry point."""
@@ -75,7 +241,8 @@ async def main():
         try:
             logger.logger.info("Starting shutdown process...")
             
-            # 1. まずWebSocket接続を終了してkeep-alive-handlerを停止
+            # 1. 新規インタラクションの受付を止め、処理中のハンドラーと書き込みを
+            #    待ってからWebSocket接続を終了（ウォームスナップショットも保存）
             logger.logger.info("Closing bot connection...")
             await bot.close()
             
@@ -98,7 +265,7 @@ async def main():
                     logger.log_error(e, "Task cancellation error")
             
             # 3. データベース接続を安全にクローズ
-            if hasattr(bot, 'db'):
+            if getattr(bot, 'db', None) is not None:
                 logger.logger.info("Closing database connection...")
                 try:
                     await bot.db.close()
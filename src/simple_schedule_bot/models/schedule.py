@@ -1,7 +1,7 @@
-from dataclasses import dataclass
-from datetime import datetime, timezone
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import List, Optional, Dict
+from typing import Any, Iterator, List, Optional, Dict
 import uuid
 
 class VoteStatus(str, Enum):
@@ -13,6 +13,144 @@ class ScheduleStatus(str, Enum):
     ACTIVE = "active"
     CONFIRMED = "confirmed"
     CANCELLED = "cancelled"
+    EXPIRED = "expired"
+
+# 1日程あたり2ビットの投票コード（0 は未回答）
+BALLOT_CODES = {VoteStatus.CIRCLE: 1, VoteStatus.TRIANGLE: 2, VoteStatus.CROSS: 3}
+_BALLOT_STATUSES = {code: status for status, code in BALLOT_CODES.items()}
+
+def encode_ballot(ballot: Dict[datetime, VoteStatus], dates: List[datetime]) -> bytes:
+    """投票（日時→投票状態）を dates の順に2ビットずつ詰めたバイト列へ変換
+
+    i 番目の日程は i // 4 バイト目の下位から 2 * (i % 4) ビット目に入る。
+    """
+    packed = bytearray((len(dates) + 3) // 4)
+    for i, date in enumerate(dates):
+        status = ballot.get(date)
+        if status is not None:
+            packed[i // 4] |= BALLOT_CODES[status] << (2 * (i % 4))
+    return bytes(packed)
+
+def decode_ballot(data: bytes, dates: List[datetime]) -> Dict[datetime, VoteStatus]:
+    """encode_ballot() のバイト列を投票（日時→投票状態）へ戻す（未回答の日程は含めない）"""
+    ballot = {}
+    for i, date in enumerate(dates):
+        if i // 4 >= len(data):
+            break
+        code = (data[i // 4] >> (2 * (i % 4))) & 0b11
+        if code:
+            ballot[date] = _BALLOT_STATUSES[code]
+    return ballot
+
+class Frequency(str, Enum):
+    WEEKLY = "weekly"
+    DAILY = "daily"
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    """繰り返しの規則（start から interval 週/日ごと、until まで・count 回まで・無期限）
+
+    各回は保存せず、occurrences() で必要な範囲だけ生成する。
+    """
+    start: datetime
+    frequency: Frequency = Frequency.WEEKLY
+    interval: int = 1
+    until: Optional[datetime] = None
+    count: Optional[int] = None
+
+    def __post_init__(self):
+        if self.interval < 1:
+            raise ValueError("interval must be positive")
+        if self.count is not None and self.count < 1:
+            raise ValueError("count must be positive")
+        if self.until is not None and self.count is not None:
+            raise ValueError("until and count are mutually exclusive")
+        if self.until is not None and self.until < self.start:
+            raise ValueError("until is before the first occurrence")
+        try:
+            # 2回目と count 回目の次の回が datetime で表せる範囲に収まること
+            self.start + self.step
+            if self.count is not None:
+                self.start + self.count * self.step
+        except OverflowError:
+            raise ValueError("interval or count is too large") from None
+
+    @property
+    def step(self) -> timedelta:
+        """隣り合う回の間隔"""
+        if self.frequency == Frequency.WEEKLY:
+            return timedelta(weeks=self.interval)
+        return timedelta(days=self.interval)
+
+    def _index(self, date: datetime) -> int:
+        """date 以降の最初の回の番号（0 始まり）"""
+        if date <= self.start:
+            return 0
+        return -((self.start - date) // self.step)
+
+    def _in_range(self, index: int) -> bool:
+        if self.count is not None and index >= self.count:
+            return False
+        return self.until is None or self.start + index * self.step <= self.until
+
+    def occurrences(self, after: Optional[datetime] = None) -> Iterator[datetime]:
+        """after 以降の回を日時順に生成（無期限の規則では終わらない）"""
+        index = self._index(after) if after is not None else 0
+        try:
+            while self._in_range(index):
+                yield self.start + index * self.step
+                index += 1
+        except OverflowError:
+            # datetime で表せる最後の日時より後の回は無い
+            return
+
+    def is_occurrence(self, date: datetime) -> bool:
+        """date が規則上の回か"""
+        if date < self.start:
+            return False
+        index = (date - self.start) // self.step
+        return self.start + index * self.step == date and self._in_range(index)
+
+    def last(self) -> Optional[datetime]:
+        """最後の回（無期限なら None）"""
+        if self.count is not None:
+            return self.start + (self.count - 1) * self.step
+        if self.until is not None:
+            return self.start + ((self.until - self.start) // self.step) * self.step
+        return None
+
+    def describe(self) -> str:
+        """表示用の説明（例: 毎週、3日ごと（10回））"""
+        if self.frequency == Frequency.WEEKLY:
+            text = "毎週" if self.interval == 1 else f"{self.interval}週ごと"
+        else:
+            text = "毎日" if self.interval == 1 else f"{self.interval}日ごと"
+        if self.until is not None:
+            text += f"（{self.until.strftime('%Y-%m-%d')}まで）"
+        elif self.count is not None:
+            text += f"（{self.count}回）"
+        return text
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON に変換可能な辞書へ変換"""
+        return {
+            "start": self.start.isoformat(),
+            "frequency": self.frequency.value,
+            "interval": self.interval,
+            "until": self.until.isoformat() if self.until else None,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RecurrenceRule':
+        """to_dict() の結果から復元"""
+        return cls(
+            start=datetime.fromisoformat(data["start"]),
+            frequency=Frequency(data["frequency"]),
+            interval=data["interval"],
+            until=datetime.fromisoformat(data["until"]) if data["until"] else None,
+            count=data["count"],
+        )
 
 @dataclass
 class Vote:
@@ -61,9 +199,19 @@ class Schedule:
     reminder_sent: bool
     dates: List[ScheduleDate]
     votes: Dict[int, Dict[datetime, Vote]]
+    # 繰り返しスケジュールの規則。dates には投票のあった回だけが入る
+    recurrence: Optional[RecurrenceRule] = None
 
     @classmethod
-    def create(cls, title: str, description: Optional[str], creator_id: int, channel_id: int, dates: List[datetime]) -> 'Schedule':
+    def create(
+        cls,
+        title: str,
+        description: Optional[str],
+        creator_id: int,
+        channel_id: int,
+        dates: List[datetime],
+        recurrence: Optional[RecurrenceRule] = None
+    ) -> 'Schedule':
         schedule_id = str(uuid.uuid4())
         return cls(
             id=schedule_id,
@@ -76,7 +224,8 @@ class Schedule:
             confirmed_date=None,
             reminder_sent=False,
             dates=[ScheduleDate.create(schedule_id, date) for date in dates],
-            votes={}
+            votes={},
+            recurrence=recurrence
         )
 
     def add_vote(self, user_id: int, date: datetime, status: VoteStatus) -> None:
@@ -91,6 +240,103 @@ class Schedule:
             vote_status=status
         )
 
+    def is_candidate(self, date: datetime) -> bool:
+        """date が候補日時（保存済みの日時または繰り返しの回）か"""
+        if any(d.date == date for d in self.dates):
+            return True
+        return self.recurrence is not None and self.recurrence.is_occurrence(date)
+
+    def materialize(self, date: datetime) -> bool:
+        """繰り返しの回を dates へ追加（追加した場合 True）"""
+        if self.recurrence is None or not self.recurrence.is_occurrence(date):
+            return False
+        if any(d.date == date for d in self.dates):
+            return False
+        self.dates.append(ScheduleDate.create(self.id, date))
+        self.dates.sort(key=lambda d: d.date)
+        return True
+
+    def window_dates(self, now: Optional[datetime] = None, limit: int = 5) -> List[datetime]:
+        """表示・投票の対象にする候補日時
+
+        繰り返しでないスケジュールは保存済みの全日時、繰り返しスケジュールは
+        now 以降の最大 limit 回。
+        """
+        if self.recurrence is None:
+            return [date.date for date in self.dates]
+        now = now or datetime.now(timezone.utc)
+        window = []
+        for date in self.recurrence.occurrences(after=now):
+            if len(window) >= limit:
+                break
+            window.append(date)
+        return window
+
+    def last_date(self) -> Optional[datetime]:
+        """最後の候補日時（無期限の繰り返しや候補日時が無い場合は None）"""
+        last = max((date.date for date in self.dates), default=None)
+        if self.recurrence is not None:
+            rule_last = self.recurrence.last()
+            if rule_last is None:
+                return None
+            last = max(last, rule_last) if last is not None else rule_last
+        return last
+
+    def copy(self) -> 'Schedule':
+        """候補日時と投票の入れ物を複製したコピー（コピーへの投票は元に影響しない）"""
+        return replace(
+            self,
+            dates=list(self.dates),
+            votes={user_id: dict(user_votes) for user_id, user_votes in self.votes.items()}
+        )
+
+    def add_votes(self, user_id: int, ballot: Dict[datetime, VoteStatus]) -> List[Vote]:
+        """ユーザーの複数日程への投票（日時→投票状態）をまとめて追加または更新"""
+        unknown = [date for date in ballot if not self.is_candidate(date)]
+        if unknown:
+            raise ValueError(f"Not a candidate date: {unknown[0].isoformat()}")
+
+        for date in ballot:
+            self.materialize(date)
+        user_votes = self.votes.setdefault(user_id, {})
+        votes = []
+        for date, status in ballot.items():
+            vote = Vote.create(
+                schedule_id=self.id,
+                user_id=user_id,
+                date=date,
+                vote_status=status
+            )
+            user_votes[date] = vote
+            votes.append(vote)
+        return votes
+
+    def ballot_dates(self) -> List[datetime]:
+        """詰めた投票のビット位置に対応する候補日時（日時順）"""
+        return sorted(date.date for date in self.dates)
+
+    def encode_ballot(self, user_id: int) -> bytes:
+        """ユーザーの投票を2ビット/日程のバイト列へ変換"""
+        user_votes = self.votes.get(user_id, {})
+        return encode_ballot(
+            {date: vote.vote_status for date, vote in user_votes.items()},
+            self.ballot_dates()
+        )
+
+    def decode_ballot(self, user_id: int, data: bytes, created_at: datetime) -> None:
+        """2ビット/日程のバイト列からユーザーの投票を復元して設定"""
+        self.votes[user_id] = {
+            date: Vote(
+                id=None,
+                schedule_id=self.id,
+                user_id=user_id,
+                date=date,
+                vote_status=status,
+                created_at=created_at
+            )
+            for date, status in decode_ballot(data, self.ballot_dates()).items()
+        }
+
     def get_vote_count(self, date: datetime) -> Dict[VoteStatus, int]:
         """指定された日付の投票集計"""
         counts = {status: 0 for status in VoteStatus}
@@ -103,3 +349,57 @@ class Schedule:
         """日程を確定する"""
         self.status = ScheduleStatus.CONFIRMED
         self.confirmed_date = date
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON に変換可能な辞書へ変換"""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "creator_id": self.creator_id,
+            "channel_id": self.channel_id,
+            "status": self.status.value,
+            "created_at": self.created_at.isoformat(),
+            "confirmed_date": self.confirmed_date.isoformat() if self.confirmed_date else None,
+            "reminder_sent": self.reminder_sent,
+            "dates": [[date.id, date.date.isoformat()] for date in self.dates],
+            "votes": [
+                [vote.id, vote.user_id, vote.date.isoformat(), vote.vote_status.value, vote.created_at.isoformat()]
+                for user_votes in self.votes.values()
+                for vote in user_votes.values()
+            ],
+            "recurrence": self.recurrence.to_dict() if self.recurrence else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Schedule':
+        """to_dict() の結果から復元"""
+        schedule_id = data["id"]
+        votes: Dict[int, Dict[datetime, Vote]] = {}
+        for vote_id, user_id, date, status, created_at in data["votes"]:
+            vote_date = datetime.fromisoformat(date)
+            votes.setdefault(user_id, {})[vote_date] = Vote(
+                id=vote_id,
+                schedule_id=schedule_id,
+                user_id=user_id,
+                date=vote_date,
+                vote_status=VoteStatus(status),
+                created_at=datetime.fromisoformat(created_at)
+            )
+        return cls(
+            id=schedule_id,
+            title=data["title"],
+            description=data["description"],
+            creator_id=data["creator_id"],
+            channel_id=data["channel_id"],
+            status=ScheduleStatus(data["status"]),
+            created_at=datetime.fromisoformat(data["created_at"]),
+            confirmed_date=datetime.fromisoformat(data["confirmed_date"]) if data["confirmed_date"] else None,
+            reminder_sent=data["reminder_sent"],
+            dates=[
+                ScheduleDate(id=date_id, schedule_id=schedule_id, date=datetime.fromisoformat(date))
+                for date_id, date in data["dates"]
+            ],
+            votes=votes,
+            recurrence=RecurrenceRule.from_dict(data["recurrence"]) if data.get("recurrence") else None
+        )
@@ -0,0 +1,3 @@
+"""
+Background task modules for the Discord Schedule Bot.
+"""
@@ -0,0 +1,114 @@
+"""
+Periodic sweep of active schedules whose candidate dates have all passed.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from discord.ext import commands, tasks
+
+from ..core.config import config
+from ..core.dispatcher import Priority
+from ..core.logger import logger
+
+@dataclass
+class SweepStats:
+    runs: int = 0
+    swept: int = 0
+    last_swept: int = 0
+    last_duration: float = 0.0
+    notified: int = 0
+    notify_failures: int = 0
+
+class ExpirySweeperCog(commands.Cog):
+    """Moves expired active schedules to EXPIRED in bounded batches."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.batch_size = config.EXPIRY_SWEEP_BATCH
+        self.max_batches = config.EXPIRY_SWEEP_MAX_BATCHES
+        self.notify_creator = config.EXPIRY_NOTIFY_CREATOR
+        self.stats = SweepStats()
+        self.sweep.change_interval(seconds=config.EXPIRY_SWEEP_INTERVAL)
+
+    async def cog_load(self):
+        """Start the sweep loop."""
+        self.sweep.start()
+
+    async def cog_unload(self):
+        """Stop the sweep loop."""
+        self.sweep.cancel()
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """Sweep up to ``max_batches`` batches and return the number of expired schedules."""
+        now = now or datetime.now(timezone.utc)
+        started = time.perf_counter()
+        swept = 0
+        for _ in range(self.max_batches):
+            expired = await self.bot.repository.expire_schedules(now, limit=self.batch_size)
+            swept += len(expired)
+            if self.notify_creator:
+                for _, title, creator_id, channel_id in expired:
+                    self._notify(title, creator_id, channel_id)
+            if len(expired) < self.batch_size:
+                break
+            # バッチの合間に他の処理へループを譲る
+            await asyncio.sleep(0)
+
+        self.stats.runs += 1
+        self.stats.swept += swept
+        self.stats.last_swept = swept
+        self.stats.last_duration = time.perf_counter() - started
+        if swept:
+            logger.logger.info(
+                f"Expired {swept} schedules in {self.stats.last_duration * 1000:.1f}ms"
+            )
+        return swept
+
+    def _notify(self, title: str, creator_id: int, channel_id: int) -> None:
+        channel = self.bot.get_channel(channel_id)
+        dispatcher = getattr(self.bot, "dispatcher", None)
+        if channel is None or dispatcher is None:
+            self.stats.notify_failures += 1
+            return
+        future = dispatcher.send(
+            channel,
+            Priority.REMINDER,
+            content=f"<@{creator_id}> 「{title}」の候補日時がすべて過ぎたため、スケジュールを終了しました。"
+        )
+        future.add_done_callback(self._on_notified)
+
+    def _on_notified(self, future: asyncio.Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            self.stats.notify_failures += 1
+        else:
+            self.stats.notified += 1
+
+    def metrics(self) -> Dict[str, float]:
+        """Counters of the sweeper for diagnostics."""
+        return {
+            "expiry.runs": self.stats.runs,
+            "expiry.swept": self.stats.swept,
+            "expiry.last_swept": self.stats.last_swept,
+            "expiry.last_duration_ms": self.stats.last_duration * 1000,
+            "expiry.notified": self.stats.notified,
+            "expiry.notify_failures": self.stats.notify_failures,
+        }
+
+    @tasks.loop(seconds=300)
+    async def sweep(self):
+        try:
+            await self.run_once()
+        except Exception as e:
+            logger.log_error(e, "Expiry sweep")
+
+    @sweep.before_loop
+    async def before_sweep(self):
+        """Wait for the gateway so expiry notifications can resolve their channels."""
+        await self.bot.wait_until_ready()
+
+async def setup(bot: commands.Bot):
+    """Set up the expiry sweeper task."""
+    await bot.add_cog(ExpirySweeperCog(bot))
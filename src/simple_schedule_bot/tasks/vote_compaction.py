@@ -0,0 +1,58 @@
+"""
+Periodic compaction of the append-only vote event log.
+"""
+import time
+from typing import Dict
+
+from discord.ext import commands, tasks
+
+from ..core.config import config
+from ..core.logger import logger
+
+class VoteCompactionCog(commands.Cog):
+    """Folds pending vote events into the vote snapshot and tallies."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.compacted_events = 0
+        self.last_duration = 0.0
+        self.compact.change_interval(seconds=config.VOTE_COMPACTION_INTERVAL)
+
+    async def cog_load(self):
+        """Start the compaction loop."""
+        self.compact.start()
+
+    async def cog_unload(self):
+        """Stop the loop and fold whatever is still pending."""
+        self.compact.cancel()
+        await self.run_once()
+
+    async def run_once(self) -> int:
+        """Run a single compaction pass and return the number of folded events."""
+        started = time.perf_counter()
+        count = await self.bot.repository.compact_votes()
+        self.last_duration = time.perf_counter() - started
+        self.compacted_events += count
+        if count:
+            logger.logger.info(
+                f"Compacted {count} vote events in {self.last_duration * 1000:.1f}ms"
+            )
+        return count
+
+    def metrics(self) -> Dict[str, float]:
+        """Counters of the compaction loop for diagnostics."""
+        return {
+            "vote_compaction.events": self.compacted_events,
+            "vote_compaction.last_duration_ms": self.last_duration * 1000,
+        }
+
+    @tasks.loop(seconds=60)
+    async def compact(self):
+        try:
+            await self.run_once()
+        except Exception as e:
+            logger.log_error(e, "Vote compaction")
+
+async def setup(bot: commands.Bot):
+    """Set up the vote compaction task."""
+    await bot.add_cog(VoteCompactionCog(bot))
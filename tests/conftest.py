@@ -0,0 +1,36 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+# テスト実行でリポジトリ内の logs/ へ書き込まないよう、インポート前にファイル出力を無効にする
+os.environ["LOG_DIR"] = ""
+
+import pytest
+
+from simple_schedule_bot.db.database import DatabaseManager
+from simple_schedule_bot.db.repository import ScheduleRepository
+from simple_schedule_bot.models.schedule import Schedule
+
+# core.config はインポート時にトークンを要求するため、テスト用の値を設定する
+os.environ.setdefault("DISCORD_BOT_TOKEN", "test-token")
+
+@pytest.fixture
+async def db(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "schedule.db"))
+    await manager.init()
+    yield manager
+    await manager.close()
+
+@pytest.fixture
+def repository(db):
+    return ScheduleRepository(db)
+
+def make_schedule(title="テスト予定", description=None, channel_id=1, dates=2):
+    """明日から1日おきに dates 件の候補日時を持つテスト用のスケジュール"""
+    start = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1)
+    return Schedule.create(
+        title=title,
+        description=description,
+        creator_id=123456789,
+        channel_id=channel_id,
+        dates=[start + timedelta(days=d) for d in range(dates)]
+    )
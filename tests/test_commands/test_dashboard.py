@@ -0,0 +1,136 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+from conftest import make_schedule
+
+from simple_schedule_bot.commands.dashboard import DashboardManager
+from simple_schedule_bot.db.cache import CachedScheduleRepository
+from simple_schedule_bot.models.schedule import RecurrenceRule, Schedule, Vote, VoteStatus
+
+CHANNEL_ID = 10
+WINDOW = 0.05
+
+class FakeMessage:
+    def __init__(self, message_id, edits):
+        self.id = message_id
+        self.edits = edits
+
+    async def edit(self, **kwargs):
+        self.edits.append(kwargs["embed"])
+
+    async def pin(self):
+        pass
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.edits = []
+
+    async def send(self, **kwargs):
+        return FakeMessage(1234, self.edits)
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(message_id, self.edits)
+
+class FakeBot:
+    def __init__(self):
+        self.channel = FakeChannel(CHANNEL_ID)
+
+    def get_partial_messageable(self, channel_id):
+        return self.channel
+
+class CountingRepository(CachedScheduleRepository):
+    def __init__(self, repository):
+        super().__init__(repository)
+        self.loaded = []
+
+    async def get_schedule(self, schedule_id):
+        self.loaded.append(schedule_id)
+        return await super().get_schedule(schedule_id)
+
+@pytest.fixture
+async def dashboard(repository):
+    cached = CountingRepository(repository)
+    bot = FakeBot()
+    manager = DashboardManager(bot, cached, window=WINDOW)
+    cached.add_listener(manager)
+    schedules = [make_schedule(title, channel_id=CHANNEL_ID) for title in ("予定A", "予定B")]
+    for schedule in schedules:
+        await cached.create_schedule(schedule)
+    await manager.enable(bot.channel)
+    cached.loaded.clear()
+    yield manager, cached, bot.channel, schedules
+    await manager.close()
+
+class TestDashboard:
+    async def test_burst_is_coalesced_into_one_edit(self, dashboard):
+        """窓の間の変更は1回の編集にまとめ、変更されたスケジュールだけ再描画する"""
+        manager, repository, channel, (first, _) = dashboard
+        for user_id in range(5):
+            await repository.update_vote(
+                Vote.create(first.id, user_id, first.dates[0].date, VoteStatus.CIRCLE)
+            )
+        await asyncio.sleep(WINDOW * 3)
+
+        assert len(channel.edits) == 1
+        assert repository.loaded == [first.id]
+        field = next(f for f in channel.edits[0].fields if f.name == "📅 予定A")
+        assert "⭕:5" in field.value
+
+    async def test_unchanged_output_is_not_edited(self, dashboard):
+        """描画結果が同じなら編集しない"""
+        manager, repository, channel, (first, _) = dashboard
+        vote = Vote.create(first.id, 1, first.dates[0].date, VoteStatus.CIRCLE)
+        await repository.update_vote(vote)
+        await asyncio.sleep(WINDOW * 3)
+        await repository.update_vote(vote)
+        await asyncio.sleep(WINDOW * 3)
+
+        assert len(channel.edits) == 1
+        assert manager.unchanged == 1
+
+    async def test_closed_schedule_is_removed(self, dashboard):
+        """キャンセルされたスケジュールはダッシュボードから消える"""
+        manager, repository, channel, (first, second) = dashboard
+        await repository.cancel_schedule(first.id)
+        await asyncio.sleep(WINDOW * 3)
+
+        assert [f.name for f in channel.edits[-1].fields] == ["📅 予定B"]
+
+    async def test_failed_edit_is_retried(self, dashboard):
+        """編集に失敗した変更は次の窓で再試行する"""
+        manager, repository, channel, (first, _) = dashboard
+        failing = FakeMessage(1234, channel.edits)
+
+        async def fail_once(**kwargs):
+            failing.edit = FakeMessage.edit.__get__(failing)
+            raise discord.HTTPException(SimpleNamespace(status=500, reason="Server Error"), "boom")
+
+        failing.edit = fail_once
+        channel.get_partial_message = lambda message_id: failing
+        await repository.update_vote(Vote.create(first.id, 1, first.dates[0].date, VoteStatus.CIRCLE))
+        await asyncio.sleep(WINDOW * 4)
+
+        assert manager.failures == 1
+        assert len(channel.edits) == 1
+        field = next(f for f in channel.edits[0].fields if f.name == "📅 予定A")
+        assert "⭕:1" in field.value
+
+    async def test_recurring_window_rolls_over(self, dashboard):
+        """繰り返しスケジュールの欄は、変更が無くても表示中の最初の回が過ぎると更新される"""
+        manager, repository, channel, _ = dashboard
+        start = datetime.now(timezone.utc) + timedelta(seconds=WINDOW * 4)
+        weekly = Schedule.create("週次", None, 1, CHANNEL_ID, [], recurrence=RecurrenceRule(start=start))
+        await repository.create_schedule(weekly)
+        await asyncio.sleep(WINDOW * 2)
+        first_line = f"・{start.strftime('%Y-%m-%d %H:%M')} "
+        assert first_line in next(f for f in channel.edits[-1].fields if f.name == "📅 週次").value
+
+        await asyncio.sleep(WINDOW * 5)
+        field = next(f for f in channel.edits[-1].fields if f.name == "📅 週次")
+        assert first_line not in field.value
+        assert manager._rollover_at > datetime.now(timezone.utc)
@@ -0,0 +1,46 @@
+from discord import app_commands
+
+from simple_schedule_bot.commands.diagnostics import DiagnosticsCog
+
+class FakeResponse:
+    def __init__(self, done):
+        self.done = done
+        self.sent = []
+
+    def is_done(self):
+        return self.done
+
+    async def send_message(self, content, **kwargs):
+        self.sent.append((content, kwargs))
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content, **kwargs):
+        self.sent.append((content, kwargs))
+
+class FakeInteraction:
+    def __init__(self, done=False):
+        self.response = FakeResponse(done)
+        self.followup = FakeFollowup()
+
+class TestDiagnosticsErrors:
+    async def test_error_is_reported_to_the_user(self):
+        """チェック以外のエラーもエフェメラルで返信する"""
+        cog = DiagnosticsCog(bot=None)
+        interaction = FakeInteraction()
+        await cog.cog_app_command_error(interaction, app_commands.AppCommandError("boom"))
+
+        assert len(interaction.response.sent) == 1
+        assert interaction.response.sent[0][1] == {"ephemeral": True}
+
+    async def test_error_after_defer_uses_followup(self):
+        """応答済み（defer 後）のエラーはフォローアップで返信する"""
+        cog = DiagnosticsCog(bot=None)
+        interaction = FakeInteraction(done=True)
+        await cog.cog_app_command_error(interaction, app_commands.AppCommandError("boom"))
+
+        assert interaction.response.sent == []
+        assert len(interaction.followup.sent) == 1
+        assert interaction.followup.sent[0][1] == {"ephemeral": True}
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+from simple_schedule_bot.commands.schedule import ScheduleCreateModal, VoteBallotView
+from simple_schedule_bot.models.schedule import Frequency, Schedule
+
+START = datetime(2030, 1, 7, 19, 0, tzinfo=timezone.utc)
+
+class TestScheduleCreateModal:
+    async def test_validate_recurrence(self, repository):
+        """繰り返しの指定を規則に変換する"""
+        modal = ScheduleCreateModal(repository)
+
+        assert modal.validate_recurrence("", [START]) == (True, "", None)
+
+        _, _, rule = modal.validate_recurrence("毎週", [START])
+        assert (rule.start, rule.frequency, rule.interval) == (START, Frequency.WEEKLY, 1)
+
+        _, _, rule = modal.validate_recurrence("3日ごと 10回", [START])
+        assert (rule.frequency, rule.interval, rule.count) == (Frequency.DAILY, 3, 10)
+
+        _, _, rule = modal.validate_recurrence("every 2 weeks until 2030-03-01", [START])
+        assert rule.interval == 2
+        assert rule.last() == START + timedelta(weeks=6)
+
+    async def test_invalid_recurrence(self, repository):
+        """不正な指定・複数の候補日時・初回より前の終了日・大きすぎる間隔や回数はエラー"""
+        modal = ScheduleCreateModal(repository)
+
+        assert not modal.validate_recurrence("毎月", [START])[0]
+        assert not modal.validate_recurrence("毎週", [START, START + timedelta(days=1)])[0]
+        assert not modal.validate_recurrence("0日ごと", [START])[0]
+        assert not modal.validate_recurrence("毎週 2029-12-31まで", [START])[0]
+        # datetime の範囲を超える間隔・回数
+        assert not modal.validate_recurrence("3000000日ごと", [START])[0]
+        assert not modal.validate_recurrence("毎日 99999999回", [START])[0]
+
+class DrainingClient:
+    class drain:
+        accepting = False
+
+class FakeResponse:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, content, **kwargs):
+        self.sent.append((content, kwargs))
+
+class FakeInteraction:
+    def __init__(self, client):
+        self.client = client
+        self.response = FakeResponse()
+
+async def test_views_refuse_interactions_while_draining(repository):
+    """終了処理中はモーダル送信・投票ボタンを受け付けない"""
+    schedule = Schedule.create("定例", None, 1, 1, [START])
+    for ui in (ScheduleCreateModal(repository), VoteBallotView(repository, schedule, 1)):
+        interaction = FakeInteraction(DrainingClient())
+        assert not await ui.interaction_check(interaction)
+        assert interaction.response.sent[0][1] == {"ephemeral": True}
+
+        interaction = FakeInteraction(object())
+        assert await ui.interaction_check(interaction)
+        assert interaction.response.sent == []
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import discord
+
+from simple_schedule_bot.commands.schedule import ScheduleCog
+from simple_schedule_bot.models.schedule import Schedule
+
+START = datetime.now(timezone.utc) + timedelta(days=1)
+
+class FakeChannel:
+    def __init__(self, channel_id, visible=True, private=False, members=()):
+        self.id = channel_id
+        self.visible = visible
+        self.private = private
+        self.owner_id = None
+        self.members = [SimpleNamespace(id=member_id) for member_id in members]
+
+    def permissions_for(self, user):
+        return discord.Permissions(view_channel=self.visible)
+
+    def is_private(self):
+        return self.private
+
+class FakeResponse:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+
+class FakeInteraction:
+    def __init__(self, channels, threads):
+        self.guild = SimpleNamespace(channels=channels, threads=threads)
+        self.user = SimpleNamespace(id=42)
+        self.channel_id = channels[0].id
+        self.response = FakeResponse()
+
+async def test_search_skips_channels_the_user_cannot_view(repository):
+    """閲覧権限の無いチャンネルや参加していない非公開スレッドのスケジュールは検索結果に出さない"""
+    cog = ScheduleCog(SimpleNamespace(db=None, repository=repository))
+    for title, channel_id in [
+        ("公開の打ち合わせ", 1), ("秘密の打ち合わせ", 2),
+        ("参加中スレッドの打ち合わせ", 3), ("非公開スレッドの打ち合わせ", 4),
+    ]:
+        await repository.create_schedule(Schedule.create(title, None, 1, channel_id, [START]))
+
+    interaction = FakeInteraction(
+        channels=[FakeChannel(1), FakeChannel(2, visible=False)],
+        threads=[FakeChannel(3, private=True, members=[42]), FakeChannel(4, private=True)]
+    )
+    assert ScheduleCog.searchable_channel_ids(interaction) == [1, 3]
+
+    await cog.search(interaction, "打ち合わせ")
+    embed = interaction.response.sent[0][1]["embed"]
+    assert sorted(field.name for field in embed.fields) == [
+        "📅 公開の打ち合わせ", "📅 参加中スレッドの打ち合わせ"
+    ]
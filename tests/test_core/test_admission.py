@@ -0,0 +1,60 @@
+from simple_schedule_bot.core.admission import AdmissionController, BucketTable
+
+class TestAdmissionController:
+    def test_user_burst_is_limited_and_refilled(self):
+        """ユーザーごとのバーストを制限し、時間経過で回復する"""
+        admission = AdmissionController(user=(2, 10.0), channel=(0, 1.0), guild=(0, 1.0))
+
+        assert admission.check(1, 10, 100, "schedule", now=0.0) is None
+        assert admission.check(1, 10, 100, "schedule", now=0.0) is None
+        scope, retry_after = admission.check(1, 10, 100, "schedule", now=0.0)
+        assert scope == "user"
+        assert retry_after == 5.0
+        # 他のユーザーには影響しない
+        assert admission.check(2, 10, 100, "schedule", now=0.0) is None
+        assert admission.check(1, 10, 100, "schedule", now=5.0) is None
+
+        metrics = admission.metrics()
+        assert metrics["admission.admitted"] == 4
+        assert metrics["admission.rejected.user"] == 1
+        assert metrics["admission.rejected_command.schedule"] == 1
+
+    def test_rejection_does_not_consume_other_buckets(self):
+        """チャンネルの上限で拒否されたときはユーザーのトークンを消費しない"""
+        admission = AdmissionController(user=(5, 10.0), channel=(1, 10.0), guild=(10, 10.0))
+
+        assert admission.check(1, 10, 100, now=0.0) is None
+        assert admission.check(2, 10, 100, now=0.0)[0] == "channel"
+        assert admission.check(2, 11, 100, now=0.0) is None
+        assert admission.tables["user"].get(2, 0.0).tokens == 4.0
+        assert admission.tables["guild"].get(100, 0.0).tokens == 8.0
+
+    def test_direct_messages_skip_guild_limit(self):
+        """DM（guild_id なし）はギルドの上限を適用しない"""
+        admission = AdmissionController(user=(10, 10.0), channel=(10, 10.0), guild=(1, 10.0))
+
+        assert admission.check(1, 10, None, now=0.0) is None
+        assert admission.check(1, 10, None, now=0.0) is None
+        assert "guild" in admission.tables and len(admission.tables["guild"]) == 0
+
+class TestBucketTable:
+    def test_idle_buckets_are_evicted(self):
+        """満タンに戻るまで放置されたバケットは新しいキーの追加時に捨てる"""
+        table = BucketTable(rate=1, per=10.0, max_size=100)
+        table.get("a", 0.0)
+        table.get("b", 5.0)
+        table.get("c", 12.0)
+
+        assert len(table) == 2
+        assert table.evictions == 1
+
+    def test_size_is_bounded(self):
+        """上限を超えたら最も古いバケットから捨てる"""
+        table = BucketTable(rate=1, per=10.0, max_size=3)
+        for key in range(5):
+            table.get(key, 0.0)
+        table.get(2, 0.0)
+        table.get(5, 0.0)
+
+        assert len(table) == 3
+        assert list(table._buckets) == [4, 2, 5]
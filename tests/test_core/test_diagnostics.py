@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from simple_schedule_bot.core.diagnostics import MemoryProfiler, collect_cache_sizes
+from simple_schedule_bot.db.cache import CachedScheduleRepository
+from simple_schedule_bot.db.title_index import TitleIndex
+
+class TestMemoryProfiler:
+    def test_growth_between_snapshots(self, tmp_path):
+        """スナップショット間で増えた割り当て箇所が報告される"""
+        profiler = MemoryProfiler()
+        profiler.start()
+        try:
+            retained = [bytearray(1024) for _ in range(512)]
+            profiler.snapshot()
+
+            growth = profiler.growth()
+            assert growth and "test_diagnostics.py" in growth[0]
+
+            path = profiler.write_report(directory=str(tmp_path))
+            report = path.read_text(encoding="utf-8")
+            assert "Top allocation sites" in report
+            assert "test_diagnostics.py" in report
+            assert len(retained) == 512
+        finally:
+            profiler.stop()
+        assert not profiler.running
+
+    def test_collect_cache_sizes(self, repository):
+        """discord.py とリポジトリのキャッシュサイズを集計する"""
+        bot = SimpleNamespace(
+            cached_messages=[object()] * 3,
+            guilds=[SimpleNamespace(members=[1, 2]), SimpleNamespace(members=[3])],
+            users=[1, 2, 3],
+            repository=CachedScheduleRepository(repository, max_size=8),
+            cogs={"ScheduleCog": SimpleNamespace(title_index=TitleIndex(repository))},
+        )
+
+        sizes = collect_cache_sizes(bot)
+        assert sizes["discord.messages"] == 3
+        assert sizes["discord.members"] == 3
+        assert sizes["CachedScheduleRepository.entries"] == 0
+        assert sizes["ScheduleCog.title_index"] == 0
@@ -0,0 +1,154 @@
+import asyncio
+import pytest
+
+from simple_schedule_bot.core.dispatcher import MessageDispatcher, Priority
+
+class FakeRateLimited(Exception):
+    """429 応答を模したエラー"""
+    def __init__(self, retry_after: float):
+        super().__init__("429 Too Many Requests")
+        self.status = 429
+        self.retry_after = retry_after
+
+class FakeHTTP:
+    """送信内容を記録するローカルのHTTP層"""
+    def __init__(self, fail_with=None):
+        self.calls = []
+        self.fail_with = list(fail_with or [])
+
+    async def request(self, route, payload):
+        await asyncio.sleep(0)
+        if self.fail_with:
+            raise self.fail_with.pop(0)
+        self.calls.append((route, payload))
+        return payload
+
+class FakeChannel:
+    def __init__(self, http, channel_id):
+        self.http = http
+        self.id = channel_id
+
+    async def send(self, content):
+        return await self.http.request(("send", self.id), content)
+
+class FakeMessage:
+    def __init__(self, channel, message_id):
+        self.channel = channel
+        self.id = message_id
+
+    async def edit(self, content):
+        return await self.channel.http.request(("edit", self.id), content)
+
+@pytest.fixture
+async def dispatcher():
+    dispatcher = MessageDispatcher(workers=2, channel_rate=100, channel_per=1.0)
+    yield dispatcher
+    await dispatcher.close(timeout=1.0)
+
+class TestMessageDispatcher:
+    async def test_priority_order(self, dispatcher):
+        """同一チャンネル内では優先度の高いジョブから送信される"""
+        http = FakeHTTP()
+        channel = FakeChannel(http, 1)
+        futures = [
+            dispatcher.send(channel, Priority.REFRESH, content="refresh"),
+            dispatcher.send(channel, Priority.REMINDER, content="reminder"),
+            dispatcher.send(channel, Priority.INTERACTION, content="reply"),
+        ]
+        dispatcher.start()
+        assert await asyncio.gather(*futures) == ["refresh", "reminder", "reply"]
+        assert [payload for _, payload in http.calls] == ["reply", "reminder", "refresh"]
+
+    async def test_redundant_edits_are_merged(self, dispatcher):
+        """未送信の同一メッセージ編集は最新の内容1回にまとめられる"""
+        http = FakeHTTP()
+        message = FakeMessage(FakeChannel(http, 1), 10)
+        futures = [dispatcher.edit(message, content=f"v{i}") for i in range(5)]
+        dispatcher.start()
+
+        assert await asyncio.gather(*futures) == ["v4"] * 5
+        assert http.calls == [(("edit", 10), "v4")]
+        assert dispatcher.stats.merged == 4
+
+    async def test_rate_limit_retry(self, dispatcher):
+        """429 を受けたら retry_after だけ待って再送する"""
+        http = FakeHTTP(fail_with=[FakeRateLimited(0.05)])
+        channel = FakeChannel(http, 1)
+        dispatcher.start()
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        assert await dispatcher.send(channel, content="hello") == "hello"
+        assert loop.time() - started >= 0.05
+        assert dispatcher.stats.rate_limited == 1
+        assert dispatcher.stats.sent == 1
+
+    async def test_channel_bucket_throttles(self):
+        """チャンネルごとのバケットを超える送信は待たされる"""
+        dispatcher = MessageDispatcher(workers=4, channel_rate=2, channel_per=0.1)
+        http = FakeHTTP()
+        channel = FakeChannel(http, 1)
+        dispatcher.start()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.gather(*[dispatcher.send(channel, content=i) for i in range(4)])
+        assert loop.time() - started >= 0.09
+        assert [payload for _, payload in http.calls] == [0, 1, 2, 3]
+        await dispatcher.close()
+
+    async def test_non_rate_limit_error_propagates(self, dispatcher):
+        """レート制限以外のエラーは呼び出し側に伝わる"""
+        http = FakeHTTP(fail_with=[RuntimeError("boom")])
+        dispatcher.start()
+        with pytest.raises(RuntimeError):
+            await dispatcher.send(FakeChannel(http, 1), content="x")
+        assert dispatcher.stats.failed == 1
+        assert await dispatcher.flush(timeout=1.0)
+
+    async def test_rate_limited_edit_waits_for_merged_edit(self, dispatcher):
+        """429 を受けた編集を新しい編集に統合したら、先の呼び出し元も統合先の送信結果を待つ"""
+        gate = asyncio.Event()
+        http = FakeHTTP(fail_with=[FakeRateLimited(0.05), RuntimeError("boom")])
+        message = FakeMessage(FakeChannel(http, 1), 10)
+
+        async def held_edit(content):
+            await gate.wait()
+            return await http.request(("edit", 10), content)
+
+        message.edit = held_edit
+        dispatcher.start()
+        first = dispatcher.edit(message, content="v1")
+        await asyncio.sleep(0.01)
+        second = dispatcher.edit(message, content="v2")
+        gate.set()
+
+        # v1 は 429 で v2 に統合され、v2 の送信（ここでは失敗）まで完了しない
+        await asyncio.sleep(0.01)
+        assert not first.done()
+        with pytest.raises(RuntimeError):
+            await second
+        with pytest.raises(RuntimeError):
+            await first
+        assert dispatcher.stats.merged == 1
+        assert await dispatcher.flush(timeout=1.0)
+
+    async def test_merged_edit_success_resolves_earlier_callers(self, dispatcher):
+        """統合先の編集が成功したら、先の呼び出し元にもその結果を返す"""
+        gate = asyncio.Event()
+        http = FakeHTTP(fail_with=[FakeRateLimited(0.05)])
+        message = FakeMessage(FakeChannel(http, 1), 10)
+
+        async def held_edit(content):
+            await gate.wait()
+            return await http.request(("edit", 10), content)
+
+        message.edit = held_edit
+        dispatcher.start()
+        first = dispatcher.edit(message, content="v1")
+        await asyncio.sleep(0.01)
+        second = dispatcher.edit(message, content="v2")
+        gate.set()
+
+        assert await first == "v2"
+        assert await second == "v2"
+        assert http.calls == [(("edit", 10), "v2")]
@@ -0,0 +1,85 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+from simple_schedule_bot.core.lifecycle import DrainController, load_snapshot, save_snapshot
+from simple_schedule_bot.db.cache import CachedScheduleRepository
+from simple_schedule_bot.db.title_index import TitleIndex
+from simple_schedule_bot.models.schedule import Schedule, Vote, VoteStatus
+
+class TestDrainController:
+    async def test_waits_for_in_flight_handlers(self):
+        """処理中のハンドラーの完了を待ち、それ以外のタスクは待たない"""
+        finished = []
+
+        async def handler():
+            await asyncio.sleep(0.05)
+            finished.append(True)
+
+        drain = DrainController()
+        handler_task = asyncio.create_task(handler(), name="CommandTree-invoker")
+        other = asyncio.create_task(asyncio.sleep(10), name="keep-alive")
+        try:
+            drain.begin()
+            assert not drain.accepting
+            assert await drain.wait(timeout=1.0) == 0
+            assert finished
+            assert not other.done()
+        finally:
+            other.cancel()
+            await asyncio.gather(handler_task, other, return_exceptions=True)
+
+    async def test_gives_up_at_deadline(self):
+        """期限を過ぎたら残っているハンドラー数を返す"""
+        drain = DrainController()
+        task = asyncio.create_task(asyncio.sleep(10), name="discord-ui-modal-dispatch-1")
+        try:
+            assert await drain.wait(timeout=0.05) == 1
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+class TestWarmSnapshot:
+    async def test_round_trip_restores_cache_and_index(self, db, repository, tmp_path):
+        """キャッシュとタイトルインデックスをスナップショットから復元できる"""
+        cached = CachedScheduleRepository(repository)
+        schedule = Schedule.create(
+            "定例会議", "説明", 1, 10,
+            [datetime.now(timezone.utc) + timedelta(days=1)]
+        )
+        await cached.create_schedule(schedule)
+        await cached.update_vote(
+            Vote.create(schedule.id, 2, schedule.dates[0].date, VoteStatus.CIRCLE)
+        )
+        index = TitleIndex(cached)
+        await index.ensure_loaded(10)
+
+        state = {"schedules": cached.export_state(), "title_index": index.export_state()}
+        await db.close()
+        path = save_snapshot(str(tmp_path / "warm.json.gz"), db.db_path, state)
+
+        restored_state = load_snapshot(str(path), db.db_path)
+        assert restored_state is not None
+        assert not path.exists()
+
+        restored = CachedScheduleRepository(repository)
+        restored.import_state(restored_state["schedules"])
+        restored_index = TitleIndex(restored)
+        restored_index.import_state(restored_state["title_index"])
+
+        copy = restored._cache[schedule.id]
+        assert copy.title == schedule.title
+        assert copy.dates[0].date == schedule.dates[0].date
+        assert copy.votes[2][schedule.dates[0].date].vote_status == VoteStatus.CIRCLE
+        assert await restored_index.search(10, "定例") == [(schedule.id, "定例会議")]
+
+    def test_stale_snapshot_is_ignored(self, tmp_path):
+        """スナップショット後に DB ファイルが変わっていれば使わない"""
+        db_path = tmp_path / "schedule.db"
+        db_path.write_bytes(b"before")
+        path = save_snapshot(str(tmp_path / "warm.json.gz"), str(db_path), {"cogs": {}})
+
+        db_path.write_bytes(b"after the bot wrote more")
+        os.utime(db_path, ns=(0, 0))
+        assert load_snapshot(str(path), str(db_path)) is None
+        assert load_snapshot(str(path), str(db_path)) is None
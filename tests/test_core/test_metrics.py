@@ -0,0 +1,135 @@
+import asyncio
+import math
+
+import pytest
+
+from conftest import make_schedule
+
+from simple_schedule_bot.core.metrics import MetricsRegistry, MetricsServer, bot_collector, registry
+from simple_schedule_bot.db.memory import InMemoryScheduleRepository
+from simple_schedule_bot.db.repository import ScheduleRepository
+
+class TestMetricsRegistry:
+    def test_render_exposition_format(self):
+        """カウンター・ゲージ・ヒストグラムを Prometheus のテキスト形式で出力する"""
+        metrics = MetricsRegistry()
+        commands = metrics.counter("commands_total", "Commands", ("action", "outcome"))
+        latency = metrics.gauge("latency_seconds", "Latency")
+        duration = metrics.histogram("duration_seconds", "Duration", ("action",), buckets=(0.1, 1.0))
+
+        commands.inc(action="list", outcome="ok")
+        commands.inc(2, action="list", outcome="ok")
+        commands.inc(action='say "hi"', outcome="error")
+        latency.set(0.125)
+        duration.observe(0.05, action="list")
+        duration.observe(0.1, action="list")
+        duration.observe(3.0, action="list")
+
+        assert metrics.render().splitlines() == [
+            "# HELP commands_total Commands",
+            "# TYPE commands_total counter",
+            'commands_total{action="list",outcome="ok"} 3',
+            'commands_total{action="say \\"hi\\"",outcome="error"} 1',
+            "# HELP latency_seconds Latency",
+            "# TYPE latency_seconds gauge",
+            "latency_seconds 0.125",
+            "# HELP duration_seconds Duration",
+            "# TYPE duration_seconds histogram",
+            'duration_seconds_bucket{action="list",le="0.1"} 2',
+            'duration_seconds_bucket{action="list",le="1"} 2',
+            'duration_seconds_bucket{action="list",le="+Inf"} 3',
+            'duration_seconds_sum{action="list"} 3.15',
+            'duration_seconds_count{action="list"} 3',
+        ]
+
+    def test_registration_and_labels_are_checked(self):
+        """同じ定義の再登録は同じメトリクスを返し、定義やラベルの食い違いはエラーにする"""
+        metrics = MetricsRegistry()
+        counter = metrics.counter("events_total", "Events", ("kind",))
+
+        assert metrics.counter("events_total", "Events", ("kind",)) is counter
+        with pytest.raises(ValueError):
+            metrics.gauge("events_total", "Events", ("kind",))
+        with pytest.raises(ValueError):
+            counter.inc(other="x")
+        with pytest.raises(ValueError):
+            counter.inc(-1, kind="x")
+
+    async def test_collectors_run_on_scrape(self):
+        """スクレイプのたびにコレクターを実行し、失敗したコレクターは無視する"""
+        metrics = MetricsRegistry()
+        gauge = metrics.gauge("queue_depth", "Depth")
+        depth = iter([3, 5])
+
+        async def collect():
+            gauge.set(next(depth))
+
+        def broken():
+            raise RuntimeError("boom")
+
+        metrics.add_collector(broken)
+        metrics.add_collector(collect)
+        assert "queue_depth 3" in await metrics.scrape()
+        assert "queue_depth 5" in await metrics.scrape()
+
+class FakeBot:
+    latency = math.inf
+
+    def __init__(self, repository):
+        self.repository = repository
+        self.cogs = {}
+
+async def test_bot_collector_reads_bot_state():
+    """ボットの状態（アクティブ数・タスク数）をゲージへ写す"""
+    repository = InMemoryScheduleRepository()
+    await repository.create_schedule(make_schedule())
+    bot = FakeBot(repository)
+
+    await bot_collector(bot)()
+    assert registry.get("schedule_bot_active_schedules").value() == 1
+    assert registry.get("schedule_bot_asyncio_tasks").value() >= 1
+
+    bot.latency = 0.042
+    await bot_collector(bot)()
+    assert registry.get("schedule_bot_gateway_latency_seconds").value() == 0.042
+
+async def test_database_timings(db):
+    """トランザクションと読み取りの所要時間を記録する"""
+    histogram = registry.get("schedule_bot_db_operation_seconds")
+    commits = histogram.count(operation="transaction", outcome="commit")
+    reads = histogram.count(operation="read", outcome="ok")
+
+    schedule = make_schedule()
+    repository = ScheduleRepository(db)
+    await repository.create_schedule(schedule)
+    await repository.get_schedule(schedule.id)
+
+    assert histogram.count(operation="transaction", outcome="commit") == commits + 1
+    assert histogram.count(operation="read", outcome="ok") > reads
+
+async def fetch(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return head.decode(), body.decode()
+
+async def test_metrics_server():
+    """/metrics をテキスト形式で返し、それ以外のパスは 404 にする"""
+    metrics = MetricsRegistry()
+    metrics.counter("hits_total", "Hits").inc()
+    server = MetricsServer(metrics, "127.0.0.1", 0)
+    await server.start()
+    try:
+        head, body = await fetch(server.port, "/metrics")
+        assert head.startswith("HTTP/1.0 200")
+        assert "text/plain; version=0.0.4" in head
+        assert "hits_total 1" in body
+
+        head, _ = await fetch(server.port, "/")
+        assert head.startswith("HTTP/1.0 404")
+    finally:
+        await server.close()
@@ -0,0 +1,57 @@
+import asyncio
+import pstats
+import time
+
+from simple_schedule_bot.core.monitor import LoopLagMonitor, profile_cprofile, profile_sampling
+
+def blocking_work(seconds):
+    time.sleep(seconds)
+
+class TestLoopLagMonitor:
+    async def test_detects_blocked_loop(self):
+        """ループを塞ぐ処理の遅延とスタックを検出する"""
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.1)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            blocking_work(0.3)
+            await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+
+        stats = monitor.stats()
+        assert stats["max"] >= 0.2
+        assert stats["slow_count"] >= 1
+        assert stats["stall_reports"] >= 1
+        assert not monitor.running
+
+class TestProfiling:
+    async def test_cprofile_writes_sortable_stats(self, tmp_path):
+        """cProfile の結果を pstats で読み込める"""
+        async def busy():
+            for _ in range(5):
+                blocking_work(0.01)
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(busy())
+        path = await profile_cprofile(0.1, tmp_path / "out.pstats")
+        await task
+
+        stats = pstats.Stats(str(path))
+        assert any(func[2] == "blocking_work" for func in stats.stats)
+
+    async def test_sampling_writes_folded_stacks(self, tmp_path):
+        """サンプリング結果をフレームグラフ用の folded 形式で出力する"""
+        async def busy():
+            for _ in range(10):
+                blocking_work(0.01)
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(busy())
+        path = await profile_sampling(0.15, tmp_path / "out.folded", interval=0.002)
+        await task
+
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert lines
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        assert any("blocking_work" in line for line in lines)
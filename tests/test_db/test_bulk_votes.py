@@ -0,0 +1,117 @@
+import pytest
+from datetime import timedelta
+
+from conftest import make_schedule
+
+from simple_schedule_bot.commands.schedule import VoteBallotView
+from simple_schedule_bot.db.cache import CachedScheduleRepository
+from simple_schedule_bot.db.repository import ScheduleRepository, VOTE_STORAGE_MODES
+from simple_schedule_bot.models.schedule import Vote, VoteStatus
+
+class TestUpdateVotes:
+    @pytest.mark.parametrize("mode", VOTE_STORAGE_MODES)
+    async def test_ballot_is_written_in_one_transaction(self, db, mode):
+        """投票の一括更新が1回のトランザクションで全候補日に反映される"""
+        repository = ScheduleRepository(db, vote_storage=mode)
+        schedule = make_schedule(dates=3)
+        await repository.create_schedule(schedule)
+
+        commits = 0
+        original = db.transaction
+
+        def counting_transaction():
+            nonlocal commits
+            commits += 1
+            return original()
+
+        db.transaction = counting_transaction
+        statuses = [VoteStatus.CIRCLE, VoteStatus.TRIANGLE, VoteStatus.CROSS]
+        await repository.update_votes([
+            Vote.create(schedule.id, 1, date.date, status)
+            for date, status in zip(schedule.dates, statuses)
+        ])
+        # 再投票は上書きされる
+        await repository.update_votes([
+            Vote.create(schedule.id, 1, schedule.dates[2].date, VoteStatus.CIRCLE)
+        ])
+        db.transaction = original
+        assert commits == 2
+
+        loaded = await repository.get_schedule(schedule.id)
+        assert [loaded.votes[1][date.date].vote_status for date in schedule.dates] == [
+            VoteStatus.CIRCLE, VoteStatus.TRIANGLE, VoteStatus.CIRCLE
+        ]
+
+    async def test_cache_reflects_ballot(self, repository):
+        """キャッシュ上のスケジュールにも一括投票が反映される"""
+        cached = CachedScheduleRepository(repository)
+        schedule = make_schedule(dates=2)
+        await cached.create_schedule(schedule)
+
+        await cached.update_votes([
+            Vote.create(schedule.id, 7, date.date, VoteStatus.TRIANGLE)
+            for date in schedule.dates
+        ])
+        cached_copy = await cached.get_schedule(schedule.id)
+        assert all(
+            cached_copy.votes[7][date.date].vote_status == VoteStatus.TRIANGLE
+            for date in schedule.dates
+        )
+
+class TestVoteBallotView:
+    async def test_build_ballot(self, repository):
+        """未選択の日程は ❌、既存の投票は初期選択になる"""
+        schedule = make_schedule(dates=3)
+        schedule.add_vote(1, schedule.dates[1].date, VoteStatus.TRIANGLE)
+        view = VoteBallotView(repository, schedule, user_id=1)
+        assert view.selected[VoteStatus.TRIANGLE] == {1}
+
+        view.selected[VoteStatus.CIRCLE] = {0}
+        ballot = view.build_ballot()
+        assert [ballot[date.date] for date in schedule.dates] == [
+            VoteStatus.CIRCLE, VoteStatus.TRIANGLE, VoteStatus.CROSS
+        ]
+
+        view.selected[VoteStatus.CIRCLE] = {0, 1}
+        with pytest.raises(ValueError):
+            view.build_ballot()
+
+    async def test_submit_goes_through_the_model(self, repository):
+        """送信はモデルの add_votes で検証し、キャッシュ上の集約は保存に成功してから更新される"""
+        cached = CachedScheduleRepository(repository)
+        schedule = make_schedule(dates=3)
+        await cached.create_schedule(schedule)
+        view = VoteBallotView(cached, await cached.get_schedule(schedule.id), user_id=1)
+        view.selected[VoteStatus.CIRCLE] = {0}
+        interaction = FakeInteraction()
+
+        await view.submit.callback(interaction)
+        loaded = await repository.get_schedule(schedule.id)
+        assert [loaded.votes[1][d.date].vote_status for d in schedule.dates] == [
+            VoteStatus.CIRCLE, VoteStatus.CROSS, VoteStatus.CROSS
+        ]
+        assert "に投票しました" in interaction.response.edited[0]["content"]
+
+        # 開いた後に候補日時でなくなった日程を含む投票は、何も書き込まずにやり直しを促す
+        view = VoteBallotView(cached, await cached.get_schedule(schedule.id), user_id=2)
+        view.dates = view.dates + [view.dates[-1] + timedelta(hours=1)]
+        interaction = FakeInteraction()
+        await view.submit.callback(interaction)
+        assert 2 not in (await cached.get_schedule(schedule.id)).votes
+        assert 2 not in (await repository.get_schedule(schedule.id)).votes
+        assert "もう一度" in interaction.response.edited[0]["content"]
+
+class FakeResponse:
+    def __init__(self):
+        self.edited = []
+        self.sent = []
+
+    async def edit_message(self, **kwargs):
+        self.edited.append(kwargs)
+
+    async def send_message(self, content, **kwargs):
+        self.sent.append((content, kwargs))
+
+class FakeInteraction:
+    def __init__(self):
+        self.response = FakeResponse()
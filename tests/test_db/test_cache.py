@@ -0,0 +1,117 @@
+import asyncio
+
+from conftest import make_schedule
+
+from simple_schedule_bot.db.cache import CachedScheduleRepository
+from simple_schedule_bot.models.schedule import ScheduleStatus, Vote, VoteStatus
+
+class PausedReads:
+    """読み込み結果を返す前に止まる下位リポジトリ"""
+
+    def __init__(self, repository):
+        self.repository = repository
+        self.read_done = asyncio.Event()
+        self.release = asyncio.Event()
+
+    def __getattr__(self, name):
+        return getattr(self.repository, name)
+
+    async def get_schedule(self, schedule_id):
+        schedule = await self.repository.get_schedule(schedule_id)
+        self.read_done.set()
+        await self.release.wait()
+        return schedule
+
+class TestCachedScheduleRepository:
+    async def test_read_through(self, repository):
+        """未キャッシュのスケジュールはDBから読み込まれキャッシュされる"""
+        schedule = make_schedule()
+        await repository.create_schedule(schedule)
+
+        cached = CachedScheduleRepository(repository, max_size=4)
+        first = await cached.get_schedule(schedule.id)
+        second = await cached.get_schedule(schedule.id)
+
+        assert first is second
+        assert first.title == "テスト予定"
+        stats = cached.stats()
+        assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+        assert stats.hit_rate == 0.5
+        assert stats.approx_bytes > 0
+
+    async def test_missing_schedule_is_not_cached(self, repository):
+        """存在しないスケジュールはキャッシュされない"""
+        cached = CachedScheduleRepository(repository)
+        assert await cached.get_schedule("missing") is None
+        assert cached.stats().size == 0
+
+    async def test_lru_eviction(self, repository):
+        """最大件数を超えると最も古く使われたエントリが破棄される"""
+        cached = CachedScheduleRepository(repository, max_size=2)
+        schedules = [make_schedule(f"予定{i}") for i in range(3)]
+        for schedule in schedules[:2]:
+            await cached.create_schedule(schedule)
+
+        await cached.get_schedule(schedules[0].id)
+        await cached.create_schedule(schedules[2])
+
+        stats = cached.stats()
+        assert stats.size == 2
+        assert stats.evictions == 1
+        assert await cached.get_schedule(schedules[1].id) is not None
+        assert cached.stats().misses == 1
+
+    async def test_writes_keep_cache_current(self, repository):
+        """書き込み後もキャッシュ上のスケジュールが最新状態に保たれる"""
+        cached = CachedScheduleRepository(repository)
+        schedule = make_schedule()
+        await cached.create_schedule(schedule)
+        date = schedule.dates[0].date
+
+        await cached.update_vote(Vote.create(schedule.id, 111, date, VoteStatus.CIRCLE))
+        await cached.update_reminder_sent(schedule.id)
+        await cached.confirm_schedule(schedule.id, date)
+
+        hit = await cached.get_schedule(schedule.id)
+        assert hit.votes[111][date].vote_status == VoteStatus.CIRCLE
+        assert hit.reminder_sent
+        assert hit.status == ScheduleStatus.CONFIRMED
+        assert cached.stats().misses == 0
+
+        # DB側の状態とも一致する
+        stored = await repository.get_schedule(schedule.id)
+        assert stored.votes[111][date].vote_status == VoteStatus.CIRCLE
+        assert stored.status == ScheduleStatus.CONFIRMED
+
+    async def test_cancel_and_active_schedules(self, repository):
+        """キャンセルしたスケジュールはアクティブ一覧から除外される"""
+        cached = CachedScheduleRepository(repository)
+        keep, drop = make_schedule("残す"), make_schedule("消す")
+        await cached.create_schedule(keep)
+        await cached.create_schedule(drop)
+
+        await cached.cancel_schedule(drop.id)
+
+        assert (await cached.get_schedule(drop.id)).status == ScheduleStatus.CANCELLED
+        active = await cached.get_active_schedules()
+        assert [s.id for s in active] == [keep.id]
+
+    async def test_write_during_miss_is_not_lost(self, repository):
+        """読み込み中に投票があったときは、読み込んだ古いスケジュールをキャッシュしない"""
+        schedule = make_schedule()
+        await repository.create_schedule(schedule)
+        date = schedule.dates[0].date
+        backend = PausedReads(repository)
+        cached = CachedScheduleRepository(backend)
+
+        miss = asyncio.create_task(cached.get_schedule(schedule.id))
+        await backend.read_done.wait()
+        await cached.update_vote(Vote.create(schedule.id, 111, date, VoteStatus.CIRCLE))
+        backend.release.set()
+
+        assert (await miss).votes == {}
+        assert cached.stats().size == 0
+        fresh = await cached.get_schedule(schedule.id)
+        assert fresh.votes[111][date].vote_status == VoteStatus.CIRCLE
+        assert await cached.get_schedule(schedule.id) is fresh
+        assert cached._loading == {}
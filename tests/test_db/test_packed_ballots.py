@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+import pytest
+
+from conftest import make_schedule
+
+from simple_schedule_bot.db.database import DatabaseManager
+from simple_schedule_bot.db.repository import ScheduleRepository, VOTE_STORAGE_PACKED
+from simple_schedule_bot.models.schedule import Vote, VoteStatus
+
+async def count(db, table):
+    async with db.connect() as conn:
+        cursor = await conn.execute(f"SELECT COUNT(*) FROM {table}")
+        return (await cursor.fetchone())[0]
+
+class TestPackedBallots:
+    async def test_one_row_per_voter(self, db):
+        """1ユーザーの投票は1行にまとまり、部分的な更新は既存の回答とマージされる"""
+        repository = ScheduleRepository(db, vote_storage=VOTE_STORAGE_PACKED)
+        schedule = make_schedule(dates=5)
+        await repository.create_schedule(schedule)
+        dates = [date.date for date in schedule.dates]
+
+        await repository.update_votes([
+            Vote.create(schedule.id, 1, date, VoteStatus.CIRCLE) for date in dates
+        ])
+        await repository.update_vote(Vote.create(schedule.id, 1, dates[3], VoteStatus.CROSS))
+        await repository.update_vote(Vote.create(schedule.id, 2, dates[0], VoteStatus.TRIANGLE))
+        assert await count(db, "ballots") == 2
+        assert await count(db, "votes") == 0
+
+        loaded = await repository.get_schedule(schedule.id)
+        assert [loaded.votes[1][date].vote_status for date in dates] == [
+            VoteStatus.CIRCLE, VoteStatus.CIRCLE, VoteStatus.CIRCLE, VoteStatus.CROSS, VoteStatus.CIRCLE
+        ]
+        assert list(loaded.votes[2]) == [dates[0]]
+
+        tallies = await repository.get_vote_tallies(schedule.id)
+        assert tallies[dates[0]][VoteStatus.CIRCLE] == 1
+        assert tallies[dates[0]][VoteStatus.TRIANGLE] == 1
+
+        with pytest.raises(ValueError):
+            await repository.update_vote(
+                Vote.create(schedule.id, 1, dates[0] + timedelta(minutes=1), VoteStatus.CIRCLE)
+            )
+
+    async def test_migration_backfills_existing_votes(self, tmp_path):
+        """既存DBへのマイグレーションで votes の内容が ballots へ変換される"""
+        db_path = str(tmp_path / "legacy.db")
+        db = DatabaseManager(db_path)
+        await db.init()
+        try:
+            repository = ScheduleRepository(db)
+            schedule = make_schedule(dates=5)
+            await repository.create_schedule(schedule)
+            await repository.update_votes([
+                Vote.create(schedule.id, 1, date.date, VoteStatus.TRIANGLE)
+                for date in schedule.dates[:2]
+            ])
+            async with db.connect() as conn:
+                # packed 方式導入前のDBを再現
+                await conn.executescript('''
+                    DROP TABLE ballots;
+                    PRAGMA user_version = 3;
+                ''')
+        finally:
+            await db.close()
+
+        db = DatabaseManager(db_path)
+        await db.init()
+        try:
+            loaded = await ScheduleRepository(db, vote_storage=VOTE_STORAGE_PACKED).get_schedule(schedule.id)
+            assert {date: vote.vote_status for date, vote in loaded.votes[1].items()} == {
+                date.date: VoteStatus.TRIANGLE for date in schedule.dates[:2]
+            }
+        finally:
+            await db.close()
@@ -0,0 +1,282 @@
+"""
+Query-plan regression tests for ScheduleRepository.
+
+Every repository method is executed against a seeded database while the
+statements it issues are traced. Each statement is then run through
+``EXPLAIN QUERY PLAN``; the plans must use the expected indexes, and no
+statement may fall back to a full scan of a large table. Only index names
+are checked because the plan wording differs between SQLite versions; a
+failure shows a unified diff of the expected and the observed (normalized)
+index usage, followed by the traced statements and their plans.
+"""
+import difflib
+import inspect
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from simple_schedule_bot.db.repository import (
+    ScheduleRepository, VOTE_STORAGE_EVENT_LOG, VOTE_STORAGE_PACKED
+)
+from simple_schedule_bot.models.schedule import Schedule, ScheduleStatus, Vote, VoteStatus
+
+# search_schedules は schedules を s という別名で参照する
+LARGE_TABLES = ("schedules", "s", "schedule_dates", "votes", "vote_events", "ballots")
+SEED_SCHEDULES = 200
+SEED_VOTERS = 5
+SEED_DATES = 3
+
+# 全件走査が仕様上避けられないケース（インデックスを使えない短い語の LIKE 検索と、
+# 起動時に1回だけ行う保存方式の切り替えに伴う全投票の変換）
+ALLOWED_SCANS = {"search_schedules_like", "sync_vote_storage"}
+
+BASE_DATE = datetime(2030, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+def _new_schedule():
+    return Schedule.create("新しい予定", "説明", 1, 1, [BASE_DATE, BASE_DATE + timedelta(days=1)])
+
+def _event_log(repo):
+    return ScheduleRepository(repo.db, vote_storage=VOTE_STORAGE_EVENT_LOG)
+
+async def _compact_votes(repo, sid):
+    event_repo = _event_log(repo)
+    await event_repo.update_vote(Vote.create(sid, 999, BASE_DATE, VoteStatus.CIRCLE))
+    await event_repo.compact_votes()
+
+def _packed(repo):
+    return ScheduleRepository(repo.db, vote_storage=VOTE_STORAGE_PACKED)
+
+CASES = {
+    "create_schedule": lambda repo, sid: repo.create_schedule(_new_schedule()),
+    "get_schedule": lambda repo, sid: repo.get_schedule(sid),
+    "update_vote": lambda repo, sid: repo.update_vote(
+        Vote.create(sid, 999, BASE_DATE, VoteStatus.CIRCLE)
+    ),
+    "update_votes": lambda repo, sid: repo.update_votes([
+        Vote.create(sid, 999, BASE_DATE + timedelta(days=d), VoteStatus.CIRCLE)
+        for d in range(SEED_DATES)
+    ]),
+    "confirm_schedule": lambda repo, sid: repo.confirm_schedule(sid, BASE_DATE),
+    "cancel_schedule": lambda repo, sid: repo.cancel_schedule(sid),
+    "update_reminder_sent": lambda repo, sid: repo.update_reminder_sent(sid),
+    "expire_schedules": lambda repo, sid: repo.expire_schedules(BASE_DATE + timedelta(days=1), limit=10),
+    "get_active_schedule_ids": lambda repo, sid: repo.get_active_schedule_ids(),
+    "set_dashboard": lambda repo, sid: repo.set_dashboard(1, 100),
+    "remove_dashboard": lambda repo, sid: repo.remove_dashboard(1),
+    "get_dashboards": lambda repo, sid: repo.get_dashboards(),
+    "get_active_schedule_titles": lambda repo, sid: repo.get_active_schedule_titles(3),
+    "search_schedules": lambda repo, sid: repo.search_schedules("予定番号", channel_ids=[1, 2], limit=2),
+    "search_schedules_like": lambda repo, sid: repo.search_schedules("予定", limit=1),
+    "get_vote_tallies": lambda repo, sid: repo.get_vote_tallies(sid),
+    "compact_votes": _compact_votes,
+    "event_log_update_vote": lambda repo, sid: _event_log(repo).update_vote(
+        Vote.create(sid, 999, BASE_DATE, VoteStatus.CIRCLE)
+    ),
+    "event_log_update_votes": lambda repo, sid: _event_log(repo).update_votes([
+        Vote.create(sid, 999, BASE_DATE + timedelta(days=d), VoteStatus.CIRCLE)
+        for d in range(SEED_DATES)
+    ]),
+    "event_log_get_schedule": lambda repo, sid: _event_log(repo).get_schedule(sid),
+    "event_log_get_vote_tallies": lambda repo, sid: _event_log(repo).get_vote_tallies(sid),
+    "packed_update_votes": lambda repo, sid: _packed(repo).update_votes([
+        Vote.create(sid, 999, BASE_DATE + timedelta(days=d), VoteStatus.CIRCLE)
+        for d in range(SEED_DATES)
+    ]),
+    "packed_get_schedule": lambda repo, sid: _packed(repo).get_schedule(sid),
+    "sync_vote_storage": lambda repo, sid: _packed(repo).sync_vote_storage(),
+}
+
+# 複数のメソッドから共通に呼ばれるため、個別のケースを持たないメソッド
+COVERED_ELSEWHERE = {
+    "get_active_schedules": "get_active_schedule_ids + get_schedule",
+}
+
+# 主キーでの検索（INTEGER PRIMARY KEY の rowid と WITHOUT ROWID の主キーの両方）
+PRIMARY_KEY = "PRIMARY KEY"
+
+_GET_SCHEDULE = [
+    ("schedules", "sqlite_autoindex_schedules_1"),
+    ("schedule_dates", "sqlite_autoindex_schedule_dates_1"),
+    ("votes", "idx_votes_schedule_id"),
+]
+
+# 投票の書き込みは投票先の検証と繰り返しの回の具体化のため、先に規則と候補日時を読む
+_VOTE_TARGET_LOOKUP = [
+    ("schedules", "sqlite_autoindex_schedules_1"),
+    ("schedule_dates", "sqlite_autoindex_schedule_dates_1"),
+]
+
+# ケースごとに使われるべき (テーブル, インデックス)。プランの文言は SQLite の
+# バージョンで変わる（COVERING の有無など）ため、インデックス名だけを確かめる
+EXPECTED_INDEXES = {
+    "create_schedule": [],
+    "get_schedule": _GET_SCHEDULE,
+    "update_vote": _VOTE_TARGET_LOOKUP,
+    "update_votes": _VOTE_TARGET_LOOKUP,
+    "confirm_schedule": [("schedules", "sqlite_autoindex_schedules_1")],
+    "cancel_schedule": [("schedules", "sqlite_autoindex_schedules_1")],
+    "update_reminder_sent": [("schedules", "sqlite_autoindex_schedules_1")],
+    "expire_schedules": [("schedules", "idx_schedules_status_last_date")],
+    "set_dashboard": [],
+    "remove_dashboard": [("dashboards", PRIMARY_KEY)],
+    # 起動時に1回、オプトインしたチャンネル数だけの小さな表を読む
+    "get_dashboards": [],
+    "get_active_schedule_ids": [("schedules", "idx_schedules_status")],
+    "get_active_schedule_titles": [("schedules", "idx_schedules_channel_status")],
+    "search_schedules": [("s", "idx_schedules_search_id")] + _GET_SCHEDULE,
+    "search_schedules_like": _GET_SCHEDULE,
+    "get_vote_tallies": [("votes", "idx_votes_schedule_id")],
+    "compact_votes": _VOTE_TARGET_LOOKUP + [
+        ("vote_compaction", PRIMARY_KEY),
+        ("vote_events", PRIMARY_KEY),
+        ("vote_tallies", PRIMARY_KEY),
+        ("votes", "idx_votes_schedule_id"),
+    ],
+    "event_log_update_vote": _VOTE_TARGET_LOOKUP,
+    "event_log_update_votes": _VOTE_TARGET_LOOKUP,
+    "event_log_get_schedule": _GET_SCHEDULE + [
+        ("vote_events", "idx_vote_events_schedule_id"),
+        ("vote_compaction", PRIMARY_KEY),
+    ],
+    "event_log_get_vote_tallies": [
+        ("vote_events", "idx_vote_events_schedule_id"),
+        ("vote_events", PRIMARY_KEY),
+        ("vote_compaction", PRIMARY_KEY),
+        ("vote_tallies", PRIMARY_KEY),
+        ("votes", "sqlite_autoindex_votes_1"),
+    ],
+    "packed_update_votes": _VOTE_TARGET_LOOKUP + [("ballots", PRIMARY_KEY)],
+    "packed_get_schedule": _GET_SCHEDULE[:2] + [("ballots", PRIMARY_KEY)],
+    "sync_vote_storage": [("settings", PRIMARY_KEY)],
+}
+
+def _uses_index(plans, table, index):
+    if index == PRIMARY_KEY:
+        access = r"(INTEGER )?PRIMARY KEY"
+    else:
+        access = rf"(COVERING )?INDEX {re.escape(index)}"
+    pattern = re.compile(rf"^\s*SEARCH {re.escape(table)} USING {access}\b")
+    return any(pattern.match(line) for _, plan in plans for line in plan)
+
+_ACCESS = re.compile(
+    r"^\s*(?P<op>SEARCH|SCAN) (?P<table>\S+)"
+    r"(?: USING (?:COVERING )?(?:INDEX (?P<index>\S+)|(?P<pk>(?:INTEGER )?PRIMARY KEY)))?"
+)
+
+def _usage(table, index, scan=False):
+    """(テーブル, インデックス) の利用を比較用の1行にする（SQLite のバージョン差を吸収）"""
+    access = PRIMARY_KEY if index == PRIMARY_KEY else f"INDEX {index}" if index else "full scan"
+    return f"{table}: {'SCAN ' if scan and index else ''}{access}"
+
+def _observed_usage(plans):
+    """プランから実際に使われた (テーブル, インデックス) を正規化して列挙"""
+    usage = set()
+    for _, plan in plans:
+        for line in plan:
+            match = _ACCESS.match(line)
+            if match is None:
+                continue
+            index = PRIMARY_KEY if match["pk"] else match["index"]
+            usage.add(_usage(match["table"], index, scan=match["op"] == "SCAN"))
+    return sorted(usage)
+
+def _usage_diff(case, plans):
+    """期待した利用と実際の利用の unified diff"""
+    expected = sorted({_usage(table, index) for table, index in EXPECTED_INDEXES[case]})
+    return "\n".join(difflib.unified_diff(
+        expected, _observed_usage(plans), f"{case} (expected)", f"{case} (actual)", lineterm=""
+    ))
+
+_DML = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH|REPLACE)\b", re.IGNORECASE)
+
+@pytest.fixture
+async def seeded(db, repository):
+    """大きめのデータを投入し、テスト対象のスケジュールIDを返す"""
+    schedules, dates, votes = [], [], []
+    for i in range(SEED_SCHEDULES):
+        schedule = Schedule.create(
+            f"予定番号{i}", f"説明{i}", 100 + i % 7, 1 + i % 5,
+            [BASE_DATE + timedelta(days=d) for d in range(SEED_DATES)]
+        )
+        schedules.append((
+            schedule.id, schedule.title, schedule.description, schedule.creator_id,
+            schedule.channel_id, ScheduleStatus.ACTIVE.value, schedule.created_at,
+            None, False, schedule.dates[-1].date, None, None
+        ))
+        for date in schedule.dates:
+            dates.append((schedule.id, date.date))
+            for user_id in range(SEED_VOTERS):
+                votes.append((schedule.id, user_id, date.date, VoteStatus.CIRCLE.value, schedule.created_at))
+
+    async with db.transaction() as cur:
+        await cur.executemany("INSERT INTO schedules VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", schedules)
+        await cur.executemany("INSERT INTO schedule_dates (schedule_id, date) VALUES (?, ?)", dates)
+        await cur.executemany(
+            "INSERT INTO votes (schedule_id, user_id, date, vote_status, created_at) VALUES (?, ?, ?, ?, ?)",
+            votes
+        )
+    return schedules[0][0]
+
+async def _explain(conn, sql):
+    cursor = await conn.execute("EXPLAIN QUERY PLAN " + sql)
+    rows = await cursor.fetchall()
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        # 古い SQLite の "SCAN TABLE x" 表記を揃える
+        detail = re.sub(r"^(SCAN|SEARCH) TABLE ", r"\1 ", detail)
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+async def _collect_plans(db, repository, case, schedule_id):
+    statements = []
+    async with db.connect() as conn:
+        await conn.set_trace_callback(statements.append)
+        try:
+            await CASES[case](repository, schedule_id)
+        finally:
+            await conn.set_trace_callback(None)
+
+        plans = []
+        for sql in statements:
+            sql = " ".join(sql.split())
+            # トリガー実行中は同じ文が繰り返しトレースされるため重複は除く
+            if not _DML.match(sql) or (plans and plans[-1][0] == sql):
+                continue
+            plans.append((sql, await _explain(conn, sql)))
+        return plans
+
+def test_every_repository_method_is_covered():
+    """リポジトリの全メソッドにクエリプランのケースがある"""
+    methods = {
+        name for name, member in inspect.getmembers(ScheduleRepository, inspect.iscoroutinefunction)
+        if not name.startswith("_")
+    }
+    missing = methods - set(CASES) - set(COVERED_ELSEWHERE)
+    assert not missing, f"Add query-plan cases for: {', '.join(sorted(missing))}"
+
+@pytest.mark.parametrize("case", sorted(CASES))
+async def test_query_plan(db, repository, seeded, case):
+    """想定したインデックスを使い、大きなテーブルを全件走査しない"""
+    plans = await _collect_plans(db, repository, case, seeded)
+    statements = "\n".join(
+        f"  {i + 1}: {sql}\n" + "\n".join("      " + line for line in plan)
+        for i, (sql, plan) in enumerate(plans)
+    )
+
+    missing = [
+        f"{table} via {index}" for table, index in EXPECTED_INDEXES[case]
+        if not _uses_index(plans, table, index)
+    ]
+    assert not missing, (
+        f"{case} no longer uses {', '.join(missing)}:\n{_usage_diff(case, plans)}\n\n{statements}"
+    )
+
+    if case not in ALLOWED_SCANS:
+        full_scan = re.compile(rf"^\s*SCAN ({'|'.join(LARGE_TABLES)})\b")
+        scans = [line.strip() for _, plan in plans for line in plan if full_scan.match(line)]
+        assert not scans, (
+            f"Full table scan in {case}: {scans}\n{_usage_diff(case, plans)}\n\n{statements}"
+        )
@@ -0,0 +1,85 @@
+from conftest import make_schedule
+
+from simple_schedule_bot.db.database import DatabaseManager
+from simple_schedule_bot.db.repository import ScheduleRepository
+
+class TestSearchSchedules:
+    async def test_japanese_keyword_search(self, repository):
+        """日本語のキーワードでタイトル・説明を検索できる"""
+        await repository.create_schedule(make_schedule("忘年会の日程調整", "駅前の居酒屋で開催"))
+        await repository.create_schedule(make_schedule("定例ミーティング", "週次の進捗共有"))
+
+        results = await repository.search_schedules("忘年会")
+        assert [s.title for s in results] == ["忘年会の日程調整"]
+
+        results = await repository.search_schedules("居酒屋")
+        assert [s.title for s in results] == ["忘年会の日程調整"]
+
+    async def test_title_ranked_above_description(self, repository):
+        """タイトルでの一致が説明での一致より上位になる"""
+        await repository.create_schedule(make_schedule("打ち合わせ", "ボードゲーム会の準備"))
+        await repository.create_schedule(make_schedule("ボードゲーム会", "いつもの場所で"))
+
+        results = await repository.search_schedules("ボードゲーム")
+        assert [s.title for s in results] == ["ボードゲーム会", "打ち合わせ"]
+
+    async def test_pagination_and_channel_filter(self, repository):
+        """ページングとチャンネル絞り込み"""
+        for i in range(5):
+            await repository.create_schedule(make_schedule(f"勉強会 {i}"))
+        await repository.create_schedule(make_schedule("勉強会 別チャンネル", channel_id=2))
+
+        first = await repository.search_schedules("勉強会", channel_ids=[1], limit=3)
+        second = await repository.search_schedules("勉強会", channel_ids=[1], limit=3, offset=3)
+        assert len(first) == 3 and len(second) == 2
+        assert not {s.id for s in first} & {s.id for s in second}
+        assert all(s.channel_id == 1 for s in first + second)
+
+    async def test_short_keyword_falls_back_to_like(self, repository):
+        """3文字未満の語でも LIKE 検索で一致する"""
+        await repository.create_schedule(make_schedule("花見"))
+        await repository.create_schedule(make_schedule("100%_達成会"))
+
+        assert [s.title for s in await repository.search_schedules("花見")] == ["花見"]
+        assert [s.title for s in await repository.search_schedules("%_")] == ["100%_達成会"]
+
+    async def test_backfill_migration(self, tmp_path):
+        """既存DBへのマイグレーションで過去のスケジュールが検索対象になる"""
+        db_path = str(tmp_path / "legacy.db")
+        db = DatabaseManager(db_path)
+        await db.init()
+        async with db.connect() as conn:
+            # 全文検索導入前のDBを再現
+            await conn.executescript('''
+                DROP TRIGGER schedules_search_id;
+                DROP TRIGGER schedules_fts_insert;
+                DROP TRIGGER schedules_fts_assign;
+                DROP TRIGGER schedules_fts_delete;
+                DROP TRIGGER schedules_fts_update;
+                DROP TABLE schedules_fts;
+                PRAGMA user_version = 0;
+            ''')
+        await ScheduleRepository(db).create_schedule(make_schedule("過去のイベント"))
+        await db.close()
+
+        db = DatabaseManager(db_path)
+        await db.init()
+        try:
+            results = await ScheduleRepository(db).search_schedules("イベント")
+            assert [s.title for s in results] == ["過去のイベント"]
+        finally:
+            await db.close()
+
+    async def test_search_survives_rowid_changes(self, db, repository):
+        """暗黙の rowid が振り直されても（VACUUM など）検索結果が正しい"""
+        for title in ("削除する予定", "残る予定その一", "残る予定その二"):
+            await repository.create_schedule(make_schedule(title))
+        async with db.connect() as conn:
+            await conn.execute("DELETE FROM schedules WHERE title = '削除する予定'")
+            # VACUUM で詰め直されたのと同じ状態にする
+            await conn.execute("UPDATE schedules SET rowid = rowid - 1")
+            await conn.commit()
+            await conn.execute("VACUUM")
+
+        results = await repository.search_schedules("その二")
+        assert [s.title for s in results] == ["残る予定その二"]
@@ -0,0 +1,218 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from simple_schedule_bot.db.memory import InMemoryScheduleRepository
+from simple_schedule_bot.db.repository import ScheduleListener, ScheduleRepository, VOTE_STORAGE_MODES
+from simple_schedule_bot.db.storage import ScheduleStorage
+from simple_schedule_bot.models.schedule import (
+    RecurrenceRule, Schedule, ScheduleStatus, Vote, VoteStatus
+)
+
+NOW = datetime(2030, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+BACKENDS = [f"sqlite-{mode}" for mode in VOTE_STORAGE_MODES] + ["memory"]
+
+@pytest.fixture(params=BACKENDS)
+def storage(request):
+    if request.param == "memory":
+        return InMemoryScheduleRepository()
+    db = request.getfixturevalue("db")
+    return ScheduleRepository(db, vote_storage=request.param.split("-", 1)[1])
+
+def make_schedule(title, channel_id=1, description=None, day_offset=1):
+    start = NOW + timedelta(days=day_offset)
+    return Schedule.create(title, description, 1, channel_id, [start, start + timedelta(days=1)])
+
+class RecordingListener(ScheduleListener):
+    def __init__(self):
+        self.events = []
+
+    async def on_schedule_created(self, schedule):
+        self.events.append(("created", schedule.id))
+
+    async def on_schedule_status_changed(self, schedule_id, status):
+        self.events.append((status.value, schedule_id))
+
+    async def on_votes_updated(self, schedule_id):
+        self.events.append(("votes", schedule_id))
+
+class TestStorageConformance:
+    def test_implements_protocol(self, storage):
+        """どのバックエンドも ScheduleStorage を満たす"""
+        assert isinstance(storage, ScheduleStorage)
+
+    async def test_create_and_get(self, storage):
+        """作成したスケジュールを取得でき、呼び出し側の変更とは切り離される"""
+        schedule = make_schedule("定例会議", description="説明")
+        await storage.create_schedule(schedule)
+        schedule.title = "変更"
+
+        loaded = await storage.get_schedule(schedule.id)
+        assert loaded.title == "定例会議"
+        assert loaded.description == "説明"
+        assert loaded.status == ScheduleStatus.ACTIVE
+        assert [d.date for d in loaded.dates] == [NOW + timedelta(days=1), NOW + timedelta(days=2)]
+        assert loaded.votes == {}
+        assert await storage.get_schedule("missing") is None
+
+    async def test_votes_and_tallies(self, storage):
+        """投票の更新は最新の状態だけが残り、集計に反映される"""
+        schedule = make_schedule("投票テスト")
+        await storage.create_schedule(schedule)
+        first, second = (d.date for d in schedule.dates)
+
+        await storage.update_votes([
+            Vote.create(schedule.id, 1, first, VoteStatus.CIRCLE),
+            Vote.create(schedule.id, 1, second, VoteStatus.CROSS),
+        ])
+        await storage.update_vote(Vote.create(schedule.id, 2, first, VoteStatus.TRIANGLE))
+        await storage.update_vote(Vote.create(schedule.id, 1, second, VoteStatus.CIRCLE))
+        await storage.compact_votes()
+
+        loaded = await storage.get_schedule(schedule.id)
+        assert {
+            user_id: {date: vote.vote_status for date, vote in user_votes.items()}
+            for user_id, user_votes in loaded.votes.items()
+        } == {
+            1: {first: VoteStatus.CIRCLE, second: VoteStatus.CIRCLE},
+            2: {first: VoteStatus.TRIANGLE},
+        }
+        tallies = await storage.get_vote_tallies(schedule.id)
+        assert tallies[first][VoteStatus.CIRCLE] == 1
+        assert tallies[first][VoteStatus.TRIANGLE] == 1
+        assert tallies[second] == {VoteStatus.CIRCLE: 1, VoteStatus.TRIANGLE: 0, VoteStatus.CROSS: 0}
+
+    async def test_invalid_votes_are_rejected(self, storage):
+        """存在しないスケジュールや候補日時以外への投票は ValueError で、何も書き込まない"""
+        schedule = make_schedule("投票先の検証")
+        recurring = Schedule.create(
+            "週次", None, 1, 1, [], recurrence=RecurrenceRule(start=NOW + timedelta(days=1))
+        )
+        await storage.create_schedule(schedule)
+        await storage.create_schedule(recurring)
+        first = schedule.dates[0].date
+
+        with pytest.raises(ValueError):
+            await storage.update_vote(Vote.create("missing", 1, first, VoteStatus.CIRCLE))
+        with pytest.raises(ValueError):
+            await storage.update_votes([
+                Vote.create(schedule.id, 1, first, VoteStatus.CIRCLE),
+                Vote.create(schedule.id, 1, first + timedelta(hours=1), VoteStatus.CIRCLE),
+            ])
+        with pytest.raises(ValueError):
+            await storage.update_vote(
+                Vote.create(recurring.id, 1, NOW + timedelta(days=2), VoteStatus.CIRCLE)
+            )
+        await storage.compact_votes()
+
+        assert (await storage.get_schedule(schedule.id)).votes == {}
+        assert await storage.get_vote_tallies(schedule.id) == {}
+        assert (await storage.get_schedule(recurring.id)).dates == []
+
+    async def test_status_changes_and_active_queries(self, storage):
+        """確定・キャンセルしたスケジュールはアクティブな一覧から外れる"""
+        schedules = [make_schedule(f"予定{i}", channel_id=1 + i % 2) for i in range(4)]
+        for schedule in schedules:
+            await storage.create_schedule(schedule)
+        await storage.confirm_schedule(schedules[0].id, schedules[0].dates[0].date)
+        await storage.cancel_schedule(schedules[1].id)
+        await storage.update_reminder_sent(schedules[2].id)
+
+        confirmed = await storage.get_schedule(schedules[0].id)
+        assert confirmed.status == ScheduleStatus.CONFIRMED
+        assert confirmed.confirmed_date == schedules[0].dates[0].date
+        assert (await storage.get_schedule(schedules[1].id)).status == ScheduleStatus.CANCELLED
+        assert set(await storage.get_active_schedule_ids()) == {schedules[2].id, schedules[3].id}
+        assert await storage.get_active_schedule_titles(1) == [(schedules[2].id, "予定2")]
+        active = {s.id: s for s in await storage.get_active_schedules()}
+        assert active[schedules[2].id].reminder_sent
+        assert not active[schedules[3].id].reminder_sent
+
+    async def test_expire_schedules(self, storage):
+        """最終候補日時の古い順に limit 件ずつ期限切れにする"""
+        old = make_schedule("古い予定", day_offset=-5)
+        older = make_schedule("もっと古い予定", day_offset=-10)
+        future = make_schedule("未来の予定", day_offset=1)
+        for schedule in (old, older, future):
+            await storage.create_schedule(schedule)
+
+        assert [row[0] for row in await storage.expire_schedules(NOW, limit=1)] == [older.id]
+        assert await storage.expire_schedules(NOW) == [(old.id, "古い予定", 1, 1)]
+        assert await storage.expire_schedules(NOW) == []
+        assert (await storage.get_schedule(old.id)).status == ScheduleStatus.EXPIRED
+        assert await storage.get_active_schedule_ids() == [future.id]
+
+    async def test_recurring_schedule(self, storage):
+        """繰り返しスケジュールは規則だけを保存し、投票のあった回だけを具体化する"""
+        start = NOW + timedelta(days=1)
+        weekly = Schedule.create("週次定例", None, 1, 1, [], recurrence=RecurrenceRule(start=start))
+        finite = Schedule.create(
+            "2回だけ", None, 1, 1, [], recurrence=RecurrenceRule(start=start, count=2)
+        )
+        await storage.create_schedule(weekly)
+        await storage.create_schedule(finite)
+        assert (await storage.get_schedule(weekly.id)).dates == []
+
+        # 後の回に投票してから前の回に投票する（詰めた投票のビット位置がずれる）
+        later, earlier = start + timedelta(weeks=2), start
+        await storage.update_vote(Vote.create(weekly.id, 1, later, VoteStatus.CIRCLE))
+        await storage.update_vote(Vote.create(weekly.id, 2, earlier, VoteStatus.TRIANGLE))
+        await storage.compact_votes()
+
+        loaded = await storage.get_schedule(weekly.id)
+        assert loaded.recurrence == weekly.recurrence
+        assert [d.date for d in loaded.dates] == [earlier, later]
+        assert {
+            user_id: {date: vote.vote_status for date, vote in user_votes.items()}
+            for user_id, user_votes in loaded.votes.items()
+        } == {1: {later: VoteStatus.CIRCLE}, 2: {earlier: VoteStatus.TRIANGLE}}
+        assert set(await storage.get_vote_tallies(weekly.id)) == {earlier, later}
+
+        # 無期限の規則は期限切れにならない
+        expired = await storage.expire_schedules(NOW + timedelta(weeks=1000))
+        assert [row[0] for row in expired] == [finite.id]
+
+    async def test_dashboards(self, storage):
+        """ダッシュボードの登録は置き換え・削除できる"""
+        await storage.set_dashboard(10, 100)
+        await storage.set_dashboard(10, 101)
+        await storage.set_dashboard(20, 200)
+        await storage.remove_dashboard(20)
+        await storage.remove_dashboard(30)
+
+        assert await storage.get_dashboards() == [(10, 101)]
+
+    async def test_search(self, storage):
+        """すべての語を含むスケジュールをチャンネルで絞り込んでページングできる"""
+        await storage.create_schedule(make_schedule("忘年会の日程調整", description="駅前の居酒屋"))
+        await storage.create_schedule(make_schedule("定例ミーティング", description="週次の進捗"))
+        for i in range(3):
+            await storage.create_schedule(make_schedule(f"勉強会 {i}", channel_id=2))
+
+        assert [s.title for s in await storage.search_schedules("居酒屋")] == ["忘年会の日程調整"]
+        assert [s.title for s in await storage.search_schedules("忘年会 駅前")] == ["忘年会の日程調整"]
+        assert await storage.search_schedules("忘年会", channel_ids=[2]) == []
+        assert await storage.search_schedules("   ") == []
+
+        first = await storage.search_schedules("勉強会", channel_ids=[2], limit=2)
+        second = await storage.search_schedules("勉強会", channel_ids=[2], limit=2, offset=2)
+        assert len(first) == 2 and len(second) == 1
+        assert not {s.id for s in first} & {s.id for s in second}
+
+    async def test_listeners(self, storage):
+        """書き込み後にリスナーへ通知し、解除後は通知しない"""
+        listener = RecordingListener()
+        storage.add_listener(listener)
+        schedule = make_schedule("通知テスト")
+        await storage.create_schedule(schedule)
+        await storage.update_vote(Vote.create(schedule.id, 1, schedule.dates[0].date, VoteStatus.CIRCLE))
+        await storage.cancel_schedule(schedule.id)
+        storage.remove_listener(listener)
+        await storage.create_schedule(make_schedule("解除後"))
+
+        assert listener.events == [
+            ("created", schedule.id),
+            ("votes", schedule.id),
+            ("cancelled", schedule.id),
+        ]
@@ -0,0 +1,43 @@
+from conftest import make_schedule
+
+from simple_schedule_bot.db.title_index import TitleIndex
+
+class TestTitleIndex:
+    async def test_lazy_load_from_database(self, repository):
+        """再起動後は初回検索時にDBからインデックスを構築する"""
+        for title in ["定例会議", "定例ランチ", "飲み会"]:
+            await repository.create_schedule(make_schedule(title))
+        await repository.create_schedule(make_schedule("定例（別チャンネル）", channel_id=2))
+
+        index = TitleIndex(repository)
+        results = await index.search(1, "定例")
+        assert sorted(title for _, title in results) == ["定例ランチ", "定例会議"]
+
+    async def test_prefix_normalization_and_limit(self, repository):
+        """全角半角・大文字小文字を区別せず、件数上限を守る"""
+        index = TitleIndex(repository)
+        repository.add_listener(index)
+        await index.ensure_loaded(1)
+        for i in range(5):
+            await repository.create_schedule(make_schedule(f"Meeting {i}"))
+
+        assert len(await index.search(1, "ｍｅｅｔ")) == 5
+        assert len(await index.search(1, "MEET", limit=2)) == 2
+        assert await index.search(1, "lunch") == []
+
+    async def test_repository_changes_keep_index_current(self, repository):
+        """作成・確定・キャンセルがインデックスに反映される"""
+        index = TitleIndex(repository)
+        repository.add_listener(index)
+        await index.ensure_loaded(1)
+
+        confirmed, cancelled, active = (make_schedule(t) for t in ["会議A", "会議B", "会議C"])
+        for schedule in (confirmed, cancelled, active):
+            await repository.create_schedule(schedule)
+        assert len(await index.search(1, "会議")) == 3
+
+        await repository.confirm_schedule(confirmed.id, confirmed.dates[0].date)
+        await repository.cancel_schedule(cancelled.id)
+
+        assert await index.search(1, "会議") == [(active.id, "会議C")]
+        assert index.get_title(cancelled.id) is None
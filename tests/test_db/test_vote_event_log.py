@@ -0,0 +1,100 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from simple_schedule_bot.core.exceptions import ConfigError
+from simple_schedule_bot.db.repository import ScheduleRepository, VOTE_STORAGE_EVENT_LOG
+from simple_schedule_bot.models.schedule import Schedule, Vote, VoteStatus
+
+@pytest.fixture
+def event_repository(db):
+    return ScheduleRepository(db, vote_storage=VOTE_STORAGE_EVENT_LOG)
+
+@pytest.fixture
+async def schedule(event_repository):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    schedule = Schedule.create(
+        title="テスト予定",
+        description=None,
+        creator_id=123456789,
+        channel_id=987654321,
+        dates=[now + timedelta(days=1), now + timedelta(days=2)]
+    )
+    await event_repository.create_schedule(schedule)
+    return schedule
+
+async def count(db, table):
+    async with db.connect() as conn:
+        cursor = await conn.execute(f"SELECT COUNT(*) FROM {table}")
+        return (await cursor.fetchone())[0]
+
+class TestVoteEventLog:
+    def test_unknown_storage_mode(self, db):
+        """未知の保存方式は設定エラー"""
+        with pytest.raises(ConfigError):
+            ScheduleRepository(db, vote_storage="unknown")
+
+    async def test_votes_are_appended(self, db, event_repository, schedule):
+        """投票はイベントとして追記され、未圧縮でも読み出しに反映される"""
+        date = schedule.dates[0].date
+        await event_repository.update_vote(Vote.create(schedule.id, 1, date, VoteStatus.CIRCLE))
+        await event_repository.update_vote(Vote.create(schedule.id, 1, date, VoteStatus.CROSS))
+
+        assert await count(db, "vote_events") == 2
+        assert await count(db, "votes") == 0
+        loaded = await event_repository.get_schedule(schedule.id)
+        assert loaded.votes[1][date].vote_status == VoteStatus.CROSS
+
+    async def test_compaction_materializes_snapshot(self, db, event_repository, schedule):
+        """圧縮で最新の状態と集計がスナップショットに反映され、イベントは残る"""
+        first, second = (d.date for d in schedule.dates)
+        for user_id, status in [(1, VoteStatus.CIRCLE), (2, VoteStatus.TRIANGLE), (1, VoteStatus.CROSS)]:
+            await event_repository.update_vote(Vote.create(schedule.id, user_id, first, status))
+        await event_repository.update_vote(Vote.create(schedule.id, 2, second, VoteStatus.CIRCLE))
+
+        assert await event_repository.compact_votes() == 4
+        assert await event_repository.compact_votes() == 0
+        assert await count(db, "votes") == 3
+        assert await count(db, "vote_events") == 4
+
+        tallies = await event_repository.get_vote_tallies(schedule.id)
+        assert tallies[first] == {VoteStatus.CIRCLE: 0, VoteStatus.TRIANGLE: 1, VoteStatus.CROSS: 1}
+        assert tallies[second][VoteStatus.CIRCLE] == 1
+
+        # スナップショット + 末尾イベント
+        await event_repository.update_vote(Vote.create(schedule.id, 3, first, VoteStatus.CIRCLE))
+        loaded = await event_repository.get_schedule(schedule.id)
+        assert loaded.get_vote_count(first) == {
+            VoteStatus.CIRCLE: 1, VoteStatus.TRIANGLE: 1, VoteStatus.CROSS: 1
+        }
+        assert loaded.votes[3][first].id is None
+        assert (await event_repository.get_vote_tallies(schedule.id))[first][VoteStatus.CIRCLE] == 1
+
+    async def test_tallies_overlay_tail_on_snapshot(self, event_repository, schedule):
+        """集計は圧縮済みの集計に末尾イベントの差分を重ねて返す（置き換えた回答は差し引く）"""
+        first, second = (d.date for d in schedule.dates)
+        await event_repository.update_vote(Vote.create(schedule.id, 1, first, VoteStatus.CROSS))
+        await event_repository.update_vote(Vote.create(schedule.id, 2, first, VoteStatus.CIRCLE))
+        await event_repository.compact_votes()
+
+        # 同じ回答の変更が末尾に2回、新しい日時への回答が1回
+        await event_repository.update_vote(Vote.create(schedule.id, 1, first, VoteStatus.CIRCLE))
+        await event_repository.update_vote(Vote.create(schedule.id, 1, first, VoteStatus.TRIANGLE))
+        await event_repository.update_vote(Vote.create(schedule.id, 2, second, VoteStatus.CROSS))
+
+        expected = {
+            first: {VoteStatus.CIRCLE: 1, VoteStatus.TRIANGLE: 1, VoteStatus.CROSS: 0},
+            second: {VoteStatus.CIRCLE: 0, VoteStatus.TRIANGLE: 0, VoteStatus.CROSS: 1},
+        }
+        assert await event_repository.get_vote_tallies(schedule.id) == expected
+        await event_repository.compact_votes()
+        assert await event_repository.get_vote_tallies(schedule.id) == expected
+
+    async def test_upsert_mode_tallies(self, repository, schedule):
+        """upsert 方式でも集計を取得できる"""
+        date = schedule.dates[0].date
+        await repository.update_vote(Vote.create(schedule.id, 1, date, VoteStatus.CIRCLE))
+        await repository.update_vote(Vote.create(schedule.id, 2, date, VoteStatus.CIRCLE))
+
+        assert await repository.compact_votes() == 0
+        tallies = await repository.get_vote_tallies(schedule.id)
+        assert tallies == {date: {VoteStatus.CIRCLE: 2, VoteStatus.TRIANGLE: 0, VoteStatus.CROSS: 0}}
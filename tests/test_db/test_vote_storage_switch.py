@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from conftest import make_schedule
+
+from simple_schedule_bot.core.exceptions import ConfigError
+from simple_schedule_bot.db.repository import (
+    ScheduleRepository, VOTE_STORAGE_EVENT_LOG, VOTE_STORAGE_PACKED, VOTE_STORAGE_UPSERT
+)
+from simple_schedule_bot.models.schedule import Vote, VoteStatus
+
+async def switch(db, mode):
+    repository = ScheduleRepository(db, vote_storage=mode)
+    await repository.sync_vote_storage()
+    return repository
+
+def statuses(schedule, user_id):
+    return {date: vote.vote_status for date, vote in schedule.votes.get(user_id, {}).items()}
+
+class TestVoteStorageSwitch:
+    async def test_votes_survive_every_switch(self, db):
+        """保存方式を切り替えるたびに、それまでの方式で投票された内容が引き継がれる"""
+        repository = await switch(db, VOTE_STORAGE_UPSERT)
+        schedule = make_schedule(dates=5)
+        await repository.create_schedule(schedule)
+        dates = [date.date for date in schedule.dates]
+        await repository.update_vote(Vote.create(schedule.id, 1, dates[0], VoteStatus.CIRCLE))
+
+        repository = await switch(db, VOTE_STORAGE_PACKED)
+        await repository.update_vote(Vote.create(schedule.id, 2, dates[1], VoteStatus.TRIANGLE))
+
+        repository = await switch(db, VOTE_STORAGE_EVENT_LOG)
+        await repository.update_vote(Vote.create(schedule.id, 1, dates[0], VoteStatus.CROSS))
+
+        repository = await switch(db, VOTE_STORAGE_PACKED)
+        await repository.update_vote(Vote.create(schedule.id, 3, dates[4], VoteStatus.CIRCLE))
+
+        repository = await switch(db, VOTE_STORAGE_UPSERT)
+        loaded = await repository.get_schedule(schedule.id)
+        assert statuses(loaded, 1) == {dates[0]: VoteStatus.CROSS}
+        assert statuses(loaded, 2) == {dates[1]: VoteStatus.TRIANGLE}
+        assert statuses(loaded, 3) == {dates[4]: VoteStatus.CIRCLE}
+
+        # 古いイベントが再び反映されず、集計も作り直される
+        repository = await switch(db, VOTE_STORAGE_EVENT_LOG)
+        assert await repository.compact_votes() == 0
+        tallies = await repository.get_vote_tallies(schedule.id)
+        assert tallies[dates[0]][VoteStatus.CROSS] == 1
+        assert tallies[dates[0]][VoteStatus.CIRCLE] == 0
+
+    async def test_unrecorded_database_keeps_newest_votes(self, db):
+        """記録の無い DB では、ballots 作成後に votes へ書かれた新しい回答も失われない"""
+        repository = ScheduleRepository(db)
+        schedule = make_schedule(dates=5)
+        await repository.create_schedule(schedule)
+        dates = [date.date for date in schedule.dates]
+        earlier = datetime.now(timezone.utc) - timedelta(hours=1)
+        await ScheduleRepository(db, vote_storage=VOTE_STORAGE_PACKED).update_votes([
+            Vote(None, schedule.id, 1, dates[0], VoteStatus.CIRCLE, earlier),
+            Vote(None, schedule.id, 2, dates[1], VoteStatus.TRIANGLE, earlier),
+        ])
+        await repository.update_vote(Vote.create(schedule.id, 1, dates[0], VoteStatus.CROSS))
+
+        repository = await switch(db, VOTE_STORAGE_PACKED)
+        loaded = await repository.get_schedule(schedule.id)
+        assert statuses(loaded, 1) == {dates[0]: VoteStatus.CROSS}
+        assert statuses(loaded, 2) == {dates[1]: VoteStatus.TRIANGLE}
+
+    async def test_same_mode_is_left_alone(self, db):
+        """記録と設定が同じなら何も変換しない"""
+        assert await ScheduleRepository(db).sync_vote_storage()
+        assert not await ScheduleRepository(db).sync_vote_storage()
+
+    async def test_unknown_recorded_mode_refuses_to_start(self, db):
+        """記録された保存方式が不明な場合は起動を止める"""
+        async with db.transaction() as cur:
+            await cur.execute("INSERT INTO settings (key, value) VALUES ('vote_storage', 'columnar')")
+        with pytest.raises(ConfigError):
+            await ScheduleRepository(db).sync_vote_storage()
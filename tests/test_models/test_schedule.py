@@ -1,11 +1,16 @@
 import pytest
 from datetime import datetime, timedelta, timezone
+from itertools import islice
 from simple_schedule_bot.models.schedule import (
+    Frequency,
+    RecurrenceRule,
     Schedule,
     ScheduleDate,
     Vote,
     VoteStatus,
-    ScheduleStatus
+    ScheduleStatus,
+    decode_ballot,
+    encode_ballot
 )
 
 class TestSchedule:
@@ -85,6 +90,56 @@ class TestSchedule:
         assert counts[VoteStatus.TRIANGLE] == 1
         assert counts[VoteStatus.CROSS] == 1
 
+    def test_add_votes(self, sample_dates):
+        """複数日程への一括投票のテスト"""
+        schedule = Schedule.create(
+            title="テスト予定",
+            description="テストの説明",
+            creator_id=123456789,
+            channel_id=987654321,
+            dates=sample_dates
+        )
+
+        votes = schedule.add_votes(111, {
+            sample_dates[0]: VoteStatus.CIRCLE,
+            sample_dates[1]: VoteStatus.CROSS
+        })
+        assert [vote.vote_status for vote in votes] == [VoteStatus.CIRCLE, VoteStatus.CROSS]
+        assert schedule.votes[111][sample_dates[1]].vote_status == VoteStatus.CROSS
+
+        # 候補にない日時を含む投票は全体を拒否する
+        with pytest.raises(ValueError):
+            schedule.add_votes(111, {
+                sample_dates[0]: VoteStatus.TRIANGLE,
+                sample_dates[0] + timedelta(minutes=1): VoteStatus.CIRCLE
+            })
+        assert schedule.votes[111][sample_dates[0]].vote_status == VoteStatus.CIRCLE
+
+    def test_encode_decode_ballot(self, sample_dates):
+        """投票を2ビット/日程に詰めて復元できる"""
+        dates = [sample_dates[0] + timedelta(days=i) for i in range(6)]
+        ballot = {
+            dates[0]: VoteStatus.CIRCLE,
+            dates[2]: VoteStatus.TRIANGLE,
+            dates[5]: VoteStatus.CROSS
+        }
+        packed = encode_ballot(ballot, dates)
+        assert packed == bytes([0b00100001, 0b00001100])
+        assert decode_ballot(packed, dates) == ballot
+
+        schedule = Schedule.create(
+            title="テスト予定",
+            description="テストの説明",
+            creator_id=123456789,
+            channel_id=987654321,
+            dates=list(reversed(dates))
+        )
+        schedule.add_votes(111, ballot)
+        restored = Schedule.create("コピー", None, 1, 1, dates)
+        restored.id = schedule.id
+        restored.decode_ballot(111, schedule.encode_ballot(111), datetime.now(timezone.utc))
+        assert {d: v.vote_status for d, v in restored.votes[111].items()} == ballot
+
     def test_confirm_date(self, sample_dates):
         """スケジュール確定のテスト"""
         schedule = Schedule.create(
@@ -101,6 +156,73 @@ class TestSchedule:
         assert schedule.status == ScheduleStatus.CONFIRMED
         assert schedule.confirmed_date == confirm_date
 
+class TestRecurrenceRule:
+    START = datetime(2030, 1, 7, 19, 0, tzinfo=timezone.utc)
+
+    def test_occurrences_are_generated_lazily(self):
+        """無期限の規則も必要な回数だけ生成し、after 以降から始められる"""
+        rule = RecurrenceRule(start=self.START)
+        assert list(islice(rule.occurrences(), 3)) == [
+            self.START, self.START + timedelta(weeks=1), self.START + timedelta(weeks=2)
+        ]
+        after = self.START + timedelta(weeks=1000, hours=1)
+        assert next(rule.occurrences(after=after)) == self.START + timedelta(weeks=1001)
+        assert rule.last() is None
+
+    def test_until_and_count(self):
+        """until・count で終わる規則"""
+        by_count = RecurrenceRule(start=self.START, frequency=Frequency.DAILY, interval=3, count=4)
+        assert list(by_count.occurrences()) == [self.START + timedelta(days=3 * i) for i in range(4)]
+        assert by_count.last() == self.START + timedelta(days=9)
+
+        by_until = RecurrenceRule(start=self.START, until=self.START + timedelta(days=20))
+        assert list(by_until.occurrences()) == [self.START + timedelta(weeks=i) for i in range(3)]
+        assert by_until.last() == self.START + timedelta(weeks=2)
+        assert by_until.describe() == "毎週（2030-01-27まで）"
+
+        with pytest.raises(ValueError):
+            RecurrenceRule(start=self.START, until=self.START + timedelta(days=1), count=2)
+
+    def test_is_occurrence(self):
+        """規則上の回かどうか"""
+        rule = RecurrenceRule(start=self.START, interval=2, count=3)
+        assert rule.is_occurrence(self.START + timedelta(weeks=4))
+        assert not rule.is_occurrence(self.START + timedelta(weeks=1))
+        assert not rule.is_occurrence(self.START + timedelta(weeks=6))
+        assert not rule.is_occurrence(self.START - timedelta(weeks=2))
+
+    def test_out_of_range_rules(self):
+        """datetime で表せない間隔・回数は拒否し、表せる最後の回より後は生成しない"""
+        with pytest.raises(ValueError):
+            RecurrenceRule(start=self.START, frequency=Frequency.DAILY, interval=3000000)
+        with pytest.raises(ValueError):
+            RecurrenceRule(start=self.START, frequency=Frequency.DAILY, count=99999999)
+
+        late = datetime(9999, 12, 1, tzinfo=timezone.utc)
+        rule = RecurrenceRule(start=late)
+        assert list(rule.occurrences()) == [late + timedelta(weeks=i) for i in range(5)]
+        schedule = Schedule.create("年末", None, 1, 2, [], recurrence=rule)
+        assert schedule.window_dates(late, limit=10) == list(rule.occurrences())
+
+    def test_recurring_schedule(self):
+        """繰り返しスケジュールは直近の回を表示し、投票した回だけを具体化する"""
+        rule = RecurrenceRule(start=self.START)
+        schedule = Schedule.create("週次定例", None, 1, 2, [], recurrence=rule)
+        now = self.START + timedelta(weeks=10, hours=1)
+
+        window = schedule.window_dates(now, limit=3)
+        assert window == [self.START + timedelta(weeks=w) for w in (11, 12, 13)]
+        assert schedule.last_date() is None
+
+        schedule.add_votes(1, {window[1]: VoteStatus.CIRCLE})
+        assert [d.date for d in schedule.dates] == [window[1]]
+        with pytest.raises(ValueError):
+            schedule.add_votes(1, {window[1] + timedelta(days=1): VoteStatus.CIRCLE})
+
+        restored = Schedule.from_dict(schedule.to_dict())
+        assert restored.recurrence == rule
+        assert restored.window_dates(now, limit=3) == window
+
 class TestVoteStatus:
     def test_vote_status_values(self):
         """投票状態の値テスト"""
@@ -0,0 +1,107 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from simple_schedule_bot.db.cache import CachedScheduleRepository
+from simple_schedule_bot.db.title_index import TitleIndex
+from simple_schedule_bot.models.schedule import Schedule, ScheduleStatus
+from simple_schedule_bot.tasks.expiry_sweeper import ExpirySweeperCog
+
+NOW = datetime(2030, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+
+class FakeDispatcher:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, channel, priority, **kwargs):
+        self.sent.append((channel.id, kwargs["content"]))
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(None)
+        return future
+
+class FakeBot:
+    def __init__(self, repository):
+        self.repository = repository
+        self.dispatcher = FakeDispatcher()
+        self.ready = asyncio.Event()
+
+    async def wait_until_ready(self):
+        await self.ready.wait()
+
+    def get_channel(self, channel_id):
+        return FakeChannel(channel_id)
+
+def make_schedule(title, last_day_offset):
+    return Schedule.create(
+        title, None, 1, 10,
+        [NOW + timedelta(days=last_day_offset - 1), NOW + timedelta(days=last_day_offset)]
+    )
+
+@pytest.fixture
+async def sweeper(repository):
+    cog = ExpirySweeperCog(FakeBot(CachedScheduleRepository(repository)))
+    cog.batch_size = 2
+    cog.max_batches = 2
+    return cog
+
+class TestExpirySweeper:
+    async def test_expires_only_past_schedules(self, sweeper):
+        """候補日時がすべて過去のスケジュールだけを EXPIRED にする"""
+        repository = sweeper.bot.repository
+        past = make_schedule("終わった予定", -1)
+        partly_past = make_schedule("最終日が未来", 1)
+        await repository.create_schedule(past)
+        await repository.create_schedule(partly_past)
+        index = TitleIndex(repository)
+        repository.add_listener(index)
+        await index.ensure_loaded(10)
+
+        assert await sweeper.run_once(NOW) == 1
+        assert (await repository.get_schedule(past.id)).status == ScheduleStatus.EXPIRED
+        assert (await repository.get_schedule(partly_past.id)).status == ScheduleStatus.ACTIVE
+        assert [s.id for s in await repository.get_active_schedules()] == [partly_past.id]
+        assert await index.search(10, "") == [(partly_past.id, "最終日が未来")]
+        assert sweeper.bot.dispatcher.sent == []
+
+    async def test_bounded_batches_and_metrics(self, sweeper):
+        """1回の掃除は batch_size × max_batches 件までで、統計を記録する"""
+        repository = sweeper.bot.repository
+        for i in range(5):
+            await repository.create_schedule(make_schedule(f"予定{i}", -i - 1))
+        sweeper.notify_creator = True
+
+        assert await sweeper.run_once(NOW) == 4
+        assert await sweeper.run_once(NOW) == 1
+        await asyncio.sleep(0)
+
+        metrics = sweeper.metrics()
+        assert metrics["expiry.runs"] == 2
+        assert metrics["expiry.swept"] == 5
+        assert metrics["expiry.last_swept"] == 1
+        assert metrics["expiry.notified"] == 5
+        assert all("<@1>" in content for _, content in sweeper.bot.dispatcher.sent)
+
+    async def test_first_sweep_waits_for_ready(self, sweeper):
+        """ゲートウェイの準備が整うまで最初の掃除を始めない（通知先のチャンネルが引けないため）"""
+        runs = []
+
+        async def run_once(now=None):
+            runs.append(now)
+            return 0
+
+        sweeper.run_once = run_once
+        sweeper.sweep.start()
+        try:
+            await asyncio.sleep(0.05)
+            assert runs == []
+
+            sweeper.bot.ready.set()
+            await asyncio.sleep(0.05)
+            assert len(runs) == 1
+        finally:
+            sweeper.sweep.cancel()